@@ -1,12 +1,15 @@
 import logging
 import pandas as pd
-from typing import Optional, List
+import pyarrow as pa
+from typing import Iterator, Optional, List, Sequence, Union
 
 from git2df.backend_interface import GitBackend
-from git2df.backends import GitCliBackend
+from git2df.backends import DEFAULT_REFS, GitCliBackend
 from git2df.dulwich.backend import DulwichRemoteBackend
 from git2df.pygit2_backend import Pygit2Backend # Import Pygit2Backend
 from git2df.dataframe_builder import build_commits_df
+from git2df.arrow_builder import DEFAULT_BATCH_SIZE, build_commits_table, iter_commits_record_batches
+from git2df.rename_detection import RenameDetection
 from git_dataframe_tools.git_repo_info_provider import GitRepoInfoProvider
 
 logger = logging.getLogger(__name__)
@@ -18,15 +21,33 @@ def _get_git_backend(
     remote_branch: str,
     repo_info_provider: Optional[GitRepoInfoProvider] = None,
     local_backend_type: str = "cli", # New parameter for local backend selection
+    extraction_mode: str = "per_commit",
+    jobs: int = 1,
+    use_cache: bool = False,
+    rename_detection: Union[None, str, RenameDetection] = None,
+    refs: Union[None, str, Sequence[str]] = None,
 ) -> GitBackend:
     """Factory function to get the appropriate Git backend."""
     if remote_url:
-        return DulwichRemoteBackend(remote_url, remote_branch)
+        return DulwichRemoteBackend(
+            remote_url, remote_branch, use_cache=use_cache, rename_detection=rename_detection, jobs=jobs
+        )
     else:
         if local_backend_type == "pygit2":
-            return Pygit2Backend(repo_path)
+            # Pygit2Backend walks HEAD only by default; walk what the CLI backend does.
+            return Pygit2Backend(
+                repo_path, use_cache=use_cache, jobs=jobs, rename_detection=rename_detection, refs=refs or DEFAULT_REFS
+            )
         else: # Default to cli
-            return GitCliBackend(repo_path, repo_info_provider=repo_info_provider)
+            return GitCliBackend(
+                repo_path,
+                repo_info_provider=repo_info_provider,
+                extraction_mode=extraction_mode,
+                jobs=jobs,
+                use_cache=use_cache,
+                rename_detection=rename_detection,
+                refs=refs,
+            )
 
 
 def get_commits_df(
@@ -44,6 +65,11 @@ def get_commits_df(
     exclude_paths: Optional[List[str]] = None,
     repo_info_provider: Optional[GitRepoInfoProvider] = None,
     local_backend_type: str = "cli", # New parameter for local backend selection
+    extraction_mode: str = "per_commit",
+    jobs: int = 1,
+    use_cache: bool = False,
+    rename_detection: Union[None, str, RenameDetection] = None,
+    refs: Union[None, str, Sequence[str]] = None,
 ) -> pd.DataFrame:
     """
     Extracts git commit data from a repository and returns it as a Pandas DataFrame.
@@ -62,15 +88,27 @@ def get_commits_df(
         exclude_paths: Optional list of paths to exclude.
         repo_info_provider: Optional GitRepoInfoProvider instance for repository info.
         local_backend_type: Optional string to select the local backend type ('cli' or 'pygit2'). Defaults to 'cli'.
+        extraction_mode: How the 'cli' backend extracts commits: 'per_commit' ('git rev-list' followed by
+                         'git diff-tree --stdin') or 'single_pass' (one 'git log' for the whole range).
+        jobs: Number of parallel workers: 'git diff-tree' processes for the 'cli' backend in
+              'per_commit' mode, diff worker processes for the 'pygit2' and remote backends. Defaults to 1.
+        use_cache: If True, reuse the per-commit results cached under <git dir>/git2df-cache by
+                   earlier runs and store newly extracted commits there. Defaults to False.
+        rename_detection: A git2df.rename_detection.RenameDetection, or just its mode ('off', 'renames'
+                          or 'copies'). Defaults to each backend's previous behaviour: off for the 'cli'
+                          and remote backends, copies for 'pygit2'.
+        refs: What the local history is walked from: ref names, glob patterns over ref names
+              ("release/*"), '--branches' or '--all'. Defaults to '--all', every ref and HEAD,
+              for both local backends. Ignored with remote_url, which reads remote_branch.
 
     Returns:
         A Pandas DataFrame containing commit information.
     """
     logger.debug(
-        f"get_commits_df called with: repo_path={repo_path}, remote_url={remote_url}, remote_branch={remote_branch}, since={since}, until={until}, author={author}, me={me}, grep={grep}, merged_only={merged_only}, include_paths={include_paths}, exclude_paths={exclude_paths}, repo_info_provider={repo_info_provider}, local_backend_type={local_backend_type}"
+        f"get_commits_df called with: repo_path={repo_path}, remote_url={remote_url}, remote_branch={remote_branch}, since={since}, until={until}, author={author}, me={me}, grep={grep}, merged_only={merged_only}, include_paths={include_paths}, exclude_paths={exclude_paths}, repo_info_provider={repo_info_provider}, local_backend_type={local_backend_type}, extraction_mode={extraction_mode}, jobs={jobs}, use_cache={use_cache}, rename_detection={rename_detection}, refs={refs}"
     )
 
-    backend = _get_git_backend(repo_path, remote_url, remote_branch, repo_info_provider, local_backend_type)
+    backend = _get_git_backend(repo_path, remote_url, remote_branch, repo_info_provider, local_backend_type, extraction_mode, jobs, use_cache, rename_detection, refs)
 
     parsed_entries = backend.get_log_entries(
         log_args=log_args,
@@ -89,3 +127,114 @@ def get_commits_df(
     logger.info(f"Built DataFrame with {len(df)} rows.")
 
     return df
+
+
+def get_commits_table(
+    repo_path: str = ".",
+    remote_url: Optional[str] = None,
+    remote_branch: str = "main",
+    log_args: Optional[List[str]] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    author: Optional[str] = None,
+    me: bool = False,
+    grep: Optional[str] = None,
+    merged_only: bool = False,
+    include_paths: Optional[List[str]] = None,
+    exclude_paths: Optional[List[str]] = None,
+    repo_info_provider: Optional[GitRepoInfoProvider] = None,
+    local_backend_type: str = "cli",
+    extraction_mode: str = "per_commit",
+    jobs: int = 1,
+    use_cache: bool = False,
+    rename_detection: Union[None, str, RenameDetection] = None,
+    refs: Union[None, str, Sequence[str]] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> pa.Table:
+    """
+    Extracts git commit data like get_commits_df, but returns a pyarrow Table of
+    git2df.arrow_builder.COMMITS_SCHEMA without going through pandas.
+
+    The table has the same columns as get_commits_df's DataFrame, typed explicitly:
+    commit_date is timestamp[us, UTC], additions and deletions are int32, and string
+    columns are dictionary encoded. Entries are turned into RecordBatches of about
+    batch_size rows as the backend yields them.
+
+    Args:
+        Same as get_commits_df, plus:
+        batch_size: Approximate number of rows per RecordBatch.
+
+    Returns:
+        A pyarrow Table with one row per file change per commit.
+    """
+    logger.debug(
+        f"get_commits_table called with: repo_path={repo_path}, remote_url={remote_url}, remote_branch={remote_branch}, since={since}, until={until}, author={author}, me={me}, grep={grep}, merged_only={merged_only}, include_paths={include_paths}, exclude_paths={exclude_paths}, local_backend_type={local_backend_type}, extraction_mode={extraction_mode}, jobs={jobs}, use_cache={use_cache}, rename_detection={rename_detection}, refs={refs}, batch_size={batch_size}"
+    )
+
+    backend = _get_git_backend(repo_path, remote_url, remote_branch, repo_info_provider, local_backend_type, extraction_mode, jobs, use_cache, rename_detection, refs)
+
+    entries = backend.iter_log_entries(
+        log_args=log_args,
+        since=since,
+        until=until,
+        author=author,
+        me=me,
+        grep=grep,
+        merged_only=merged_only,
+        include_paths=include_paths,
+        exclude_paths=exclude_paths,
+    )
+    return build_commits_table(entries, batch_size)
+
+
+def iter_commits_batches(
+    repo_path: str = ".",
+    remote_url: Optional[str] = None,
+    remote_branch: str = "main",
+    log_args: Optional[List[str]] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    author: Optional[str] = None,
+    me: bool = False,
+    grep: Optional[str] = None,
+    merged_only: bool = False,
+    include_paths: Optional[List[str]] = None,
+    exclude_paths: Optional[List[str]] = None,
+    repo_info_provider: Optional[GitRepoInfoProvider] = None,
+    local_backend_type: str = "cli",
+    extraction_mode: str = "per_commit",
+    jobs: int = 1,
+    use_cache: bool = False,
+    rename_detection: Union[None, str, RenameDetection] = None,
+    refs: Union[None, str, Sequence[str]] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Iterator[pa.RecordBatch]:
+    """
+    Extracts git commit data like get_commits_table, but yields the RecordBatches of
+    git2df.arrow_builder.COMMITS_SCHEMA one at a time instead of collecting them into a
+    Table, so that they can be written out while the rest of the history is extracted.
+
+    Args:
+        Same as get_commits_table.
+
+    Returns:
+        An iterator of RecordBatches with about batch_size rows each.
+    """
+    logger.debug(
+        f"iter_commits_batches called with: repo_path={repo_path}, remote_url={remote_url}, remote_branch={remote_branch}, since={since}, until={until}, author={author}, me={me}, grep={grep}, merged_only={merged_only}, include_paths={include_paths}, exclude_paths={exclude_paths}, local_backend_type={local_backend_type}, extraction_mode={extraction_mode}, jobs={jobs}, use_cache={use_cache}, rename_detection={rename_detection}, refs={refs}, batch_size={batch_size}"
+    )
+
+    backend = _get_git_backend(repo_path, remote_url, remote_branch, repo_info_provider, local_backend_type, extraction_mode, jobs, use_cache, rename_detection, refs)
+
+    entries = backend.iter_log_entries(
+        log_args=log_args,
+        since=since,
+        until=until,
+        author=author,
+        me=me,
+        grep=grep,
+        merged_only=merged_only,
+        include_paths=include_paths,
+        exclude_paths=exclude_paths,
+    )
+    return iter_commits_record_batches(entries, batch_size)
@@ -0,0 +1,154 @@
+import logging
+from array import array
+from itertools import repeat
+from typing import Any, Iterable, Iterator, List
+
+import pandas as pd
+import pyarrow as pa
+from git2df.git_parser import GitLogEntry
+
+logger = logging.getLogger(__name__)
+
+# Rows per RecordBatch; bounds the Python-side buffers while a batch is being filled.
+DEFAULT_BATCH_SIZE = 64 * 1024
+
+_DICTIONARY_STRING = pa.dictionary(pa.int32(), pa.string())
+
+# Same columns as build_commits_df, with explicit types: strings that repeat across
+# rows (every commit-level field repeats once per file change) are dictionary
+# encoded, and nulls are kept as nulls.
+COMMITS_SCHEMA = pa.schema(
+    [
+        pa.field("commit_hash", _DICTIONARY_STRING, nullable=False),
+        pa.field("parent_hashes", pa.list_(pa.string()), nullable=False),
+        pa.field("author_name", _DICTIONARY_STRING, nullable=False),
+        pa.field("author_email", _DICTIONARY_STRING, nullable=False),
+        pa.field("commit_date", pa.timestamp("us", tz="UTC"), nullable=False),
+        pa.field("commit_timestamp", pa.int64(), nullable=False),
+        pa.field("commit_message", _DICTIONARY_STRING, nullable=False),
+        pa.field("file_paths", _DICTIONARY_STRING),
+        pa.field("change_type", _DICTIONARY_STRING),
+        pa.field("additions", pa.int32(), nullable=False),
+        pa.field("deletions", pa.int32(), nullable=False),
+        pa.field("old_file_path", _DICTIONARY_STRING),
+    ]
+)
+
+
+class _CommitBatchBuffers:
+    """Per-column buffers for the rows of one RecordBatch."""
+
+    def __init__(self):
+        self.rows = 0
+        self.commit_hashes: List[str] = []
+        self.parent_hashes: List[List[str]] = []
+        self.author_names: List[str] = []
+        self.author_emails: List[str] = []
+        self.commit_dates: List[Any] = []
+        self.commit_timestamps = array("q")
+        self.commit_messages: List[str] = []
+        self.file_paths: List[Any] = []
+        self.change_types: List[Any] = []
+        self.additions = array("i")
+        self.deletions = array("i")
+        self.old_file_paths: List[Any] = []
+
+    def append(self, entry: GitLogEntry) -> None:
+        if entry.file_changes:
+            for file_change in entry.file_changes:
+                self.file_paths.append(file_change.file_path)
+                self.change_types.append(file_change.change_type)
+                self.additions.append(file_change.additions)
+                self.deletions.append(file_change.deletions)
+                self.old_file_paths.append(file_change.old_file_path)
+            rows = len(entry.file_changes)
+        else:
+            # Commits without file changes still get one row, as in build_commits_df.
+            self.file_paths.append(None)
+            self.change_types.append(None)
+            self.additions.append(0)
+            self.deletions.append(0)
+            self.old_file_paths.append(None)
+            rows = 1
+
+        self.commit_hashes.extend(repeat(entry.commit_hash, rows))
+        self.parent_hashes.extend(repeat(entry.parent_hashes, rows))
+        self.author_names.extend(repeat(entry.author_name, rows))
+        self.author_emails.extend(repeat(entry.author_email, rows))
+        self.commit_dates.extend(repeat(entry.commit_date, rows))
+        self.commit_timestamps.extend(repeat(entry.commit_timestamp, rows))
+        self.commit_messages.extend(repeat(entry.commit_message, rows))
+        self.rows += rows
+
+    def to_record_batch(self) -> pa.RecordBatch:
+        columns = [
+            self.commit_hashes,
+            self.parent_hashes,
+            self.author_names,
+            self.author_emails,
+            self.commit_dates,
+            # The typed arrays expose their buffers, so these convert without a per-value pass.
+            pa.py_buffer(self.commit_timestamps),
+            self.commit_messages,
+            self.file_paths,
+            self.change_types,
+            pa.py_buffer(self.additions),
+            pa.py_buffer(self.deletions),
+            self.old_file_paths,
+        ]
+        arrays = [
+            pa.Array.from_buffers(field.type, self.rows, [None, column])
+            if isinstance(column, pa.Buffer)
+            else pa.array(column, type=field.type)
+            for field, column in zip(COMMITS_SCHEMA, columns)
+        ]
+        return pa.RecordBatch.from_arrays(arrays, schema=COMMITS_SCHEMA)
+
+
+def iter_commits_record_batches(
+    entries: Iterable[GitLogEntry], batch_size: int = DEFAULT_BATCH_SIZE
+) -> Iterator[pa.RecordBatch]:
+    """
+    Converts GitLogEntry objects into RecordBatches of COMMITS_SCHEMA, with one row
+    per file change per commit. A commit's rows are never split across batches, so
+    a batch may hold somewhat more than batch_size rows.
+    """
+    if batch_size < 1:
+        raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+
+    buffers = _CommitBatchBuffers()
+    for entry in entries:
+        buffers.append(entry)
+        if buffers.rows >= batch_size:
+            yield buffers.to_record_batch()
+            buffers = _CommitBatchBuffers()
+    if buffers.rows:
+        yield buffers.to_record_batch()
+
+
+def build_commits_table(entries: Iterable[GitLogEntry], batch_size: int = DEFAULT_BATCH_SIZE) -> pa.Table:
+    """Builds a pyarrow Table of COMMITS_SCHEMA from GitLogEntry objects."""
+    table = pa.Table.from_batches(iter_commits_record_batches(entries, batch_size), schema=COMMITS_SCHEMA)
+    logger.info(f"Built Arrow table with {table.num_rows} rows in {table.column(0).num_chunks} batches.")
+    return table
+
+
+def decode_dictionary_columns(table: pa.Table) -> pa.Table:
+    """Returns table with its dictionary-encoded columns cast back to their value type."""
+    decoded_fields = [
+        pa.field(field.name, field.type.value_type, field.nullable, field.metadata)
+        if pa.types.is_dictionary(field.type)
+        else field
+        for field in table.schema
+    ]
+    return table.cast(pa.schema(decoded_fields, metadata=table.schema.metadata))
+
+
+def commits_table_to_df(table: pa.Table) -> pd.DataFrame:
+    """
+    Converts a commits table to pandas. Dictionary-encoded columns are decoded to
+    plain strings first, so callers get object columns rather than Categoricals
+    (which would, for example, change groupby results); numeric columns without
+    nulls are converted without copying.
+    """
+    return decode_dictionary_columns(table).to_pandas()
@@ -1,5 +1,5 @@
 import abc
-from typing import List, Optional
+from typing import Iterator, List, Optional
 
 # Assuming GitLogEntry is defined in git2df.git_parser
 from git2df.git_parser import GitLogEntry
@@ -42,3 +42,34 @@ class GitBackend(abc.ABC):
             A list of GitLogEntry objects.
         """
         pass
+
+    def iter_log_entries(
+        self,
+        log_args: Optional[List[str]] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        author: Optional[str] = None,
+        me: bool = False,
+        grep: Optional[str] = None,
+        merged_only: bool = False,
+        include_paths: Optional[List[str]] = None,
+        exclude_paths: Optional[List[str]] = None,
+    ) -> Iterator[GitLogEntry]:
+        """
+        Yields the GitLogEntry objects get_log_entries would return. Backends that can
+        produce entries incrementally override this so callers can consume them as a
+        stream; the default simply iterates over get_log_entries().
+        """
+        return iter(
+            self.get_log_entries(
+                log_args=log_args,
+                since=since,
+                until=until,
+                author=author,
+                me=me,
+                grep=grep,
+                merged_only=merged_only,
+                include_paths=include_paths,
+                exclude_paths=exclude_paths,
+            )
+        )
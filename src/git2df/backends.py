@@ -1,39 +1,67 @@
+import os
 import subprocess
 import logging
-from typing import List, Optional
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
 from git_dataframe_tools.git_repo_info_provider import GitRepoInfoProvider
 from git2df.backend_interface import GitBackend
+from git2df.commit_cache import CommitCache
 from git2df.git_parser import GitLogEntry
-from git2df.git_parser._chunk_processor import _process_commit_chunk
+from git2df.git_parser._nul_log_parser import _NUL_PRETTY_FORMAT, _iter_nul_log_entries
+from git2df.rename_detection import RENAME_DETECTION_OFF, RenameDetection, resolve_rename_detection
+from git2df.repo_metadata import DEFAULT_BRANCH, GLOBAL_USER_IDENTITY, repo_metadata_cache
 
 logger = logging.getLogger(__name__)
 
-
-def _parse_name_status_line(line: str, name_status_changes: dict[str, dict[str, str]]):
-    if not line.strip():
-        return
-    parts = line.split("\t")
-    if len(parts) == 2:
-        change_type = parts[0]
-        file_path = parts[1].strip()
-        if file_path in name_status_changes:
-            name_status_changes[file_path]["change_type"] = change_type
-        else:
-            name_status_changes[file_path] = {
-                "change_type": change_type
-            }
-    elif len(parts) == 3:
-        change_type = parts[0]
-        file_path = parts[2].strip()
-        if file_path in name_status_changes:
-            name_status_changes[file_path]["change_type"] = change_type
+EXTRACTION_MODES = ("per_commit", "single_pass")
+
+_STREAM_READ_SIZE = 64 * 1024
+
+# Commit cache entries written by this backend: per-commit diff-tree output, author
+# dates. The rename detection settings are appended.
+_COMMIT_CACHE_VARIANT = "cli"
+_COMMIT_CACHE_WRITE_BATCH = 1000
+
+# Below this many commits per job, starting extra diff-tree processes costs more than it saves.
+_MIN_COMMITS_PER_JOB = 64
+# Most commits per diff-tree process when extracting in parallel. Small chunks keep
+# the jobs evenly loaded when large commits cluster, and bound the entries waiting to
+# be yielded in order.
+_MAX_COMMITS_PER_CHUNK = 256
+# Chunks running or finished but not yet yielded, per job.
+_CHUNKS_IN_FLIGHT_PER_JOB = 2
+
+# What the history is walked from unless refs are given: every ref and HEAD.
+DEFAULT_REFS = ("--all",)
+_REF_SELECTORS = ("--all", "--branches")
+# Namespaces that glob patterns not starting with 'refs/' are matched in, as by Pygit2Backend.
+_GLOB_NAMESPACES = ("refs/", "refs/tags/", "refs/heads/", "refs/remotes/")
+_GLOB_CHARS = frozenset("*?[")
+
+
+def ref_args(refs: Sequence[str]) -> List[str]:
+    """
+    Maps refs, as Pygit2Backend takes them, to 'git rev-list' arguments: the
+    "--all" and "--branches" selectors as they are, glob patterns to '--glob'
+    options over the same ref namespaces, and HEAD or ref names as revisions.
+    """
+    args = []
+    for ref in refs:
+        if ref in _REF_SELECTORS:
+            args.append(ref)
+        elif ref.startswith("-"):
+            raise ValueError(f"Unknown ref selector '{ref}'. Expected one of: {', '.join(_REF_SELECTORS)}.")
+        elif _GLOB_CHARS.intersection(ref):
+            namespaces = ("",) if ref.startswith("refs/") else _GLOB_NAMESPACES
+            args.extend(f"--glob={namespace}{ref}" for namespace in namespaces)
         else:
-            name_status_changes[file_path] = {
-                "change_type": change_type
-            }
-    else:
-        logger.warning(f"Unexpected name-status line format: '{line}'")
+            args.append(ref)
+    return args
+
 
 class GitCliBackend(GitBackend):
     """A backend for git2df that interacts with the Git CLI."""
@@ -42,48 +70,84 @@ class GitCliBackend(GitBackend):
         self,
         repo_path: str = ".",
         repo_info_provider: Optional[GitRepoInfoProvider] = None,
+        extraction_mode: str = "per_commit",
+        jobs: int = 1,
+        use_cache: bool = False,
+        rename_detection: Union[None, str, RenameDetection] = None,
+        refs: Union[None, str, Sequence[str]] = None,
     ):
+        """
+        refs are what the history is walked from, as for Pygit2Backend: HEAD, ref
+        names, glob patterns over ref names, "--branches" or "--all". Defaults to
+        "--all", every ref and HEAD.
+        """
+        if extraction_mode not in EXTRACTION_MODES:
+            raise ValueError(
+                f"Unknown extraction mode '{extraction_mode}'. Expected one of: {', '.join(EXTRACTION_MODES)}."
+            )
+        if jobs < 1:
+            raise ValueError(f"jobs must be at least 1, got {jobs}.")
         self.repo_path = repo_path
         self.repo_info_provider = repo_info_provider
+        self.extraction_mode = extraction_mode
+        self.jobs = jobs
+        self.use_cache = use_cache
+        # Renames are reported as a deletion plus an addition unless asked for.
+        self.rename_detection = resolve_rename_detection(rename_detection, RENAME_DETECTION_OFF)
+        self.refs = [refs] if isinstance(refs, str) else list(refs or DEFAULT_REFS)
+        self._ref_args = ref_args(self.refs)
         logger.info(f"Using GitPython backend for git operations on {self.repo_path}.")
 
-    def _get_default_branch(self) -> str:
+    def _get_default_branch(self) -> Optional[str]:
         """
-        Returns the default branch of the remote 'origin'.
+        Returns the default branch of the remote 'origin', or None if the repository
+        has no remote-tracking refs for 'origin'. The value is cached per repository.
         """
-        try:
-            result = self._run_git_command(["git", "remote", "show", "origin"])
-            for line in result.splitlines():
-                if "HEAD branch" in line:
-                    return line.split(":")[-1].strip()
-            return "main" # Fallback to main if not found
-        except subprocess.CalledProcessError as e:
-            logger.warning(
-                "Could not determine default branch from remote 'origin'. "
-                "Falling back to 'main'. Error: %s", e.stderr
-            )
-            return "main"
-
-    def _parse_git_data_to_log_entries(self, git_data: str) -> List[GitLogEntry]:
-        if not git_data.strip():
-            return []
-
-        commit_chunks = git_data.split("@@@COMMIT@@@")
-        commit_chunks = [chunk for chunk in commit_chunks if chunk.strip()]
+        return repo_metadata_cache.get(self.repo_path, DEFAULT_BRANCH, self._read_default_branch)
 
-        parsed_entries: List[GitLogEntry] = []
+    def _read_default_branch(self) -> Optional[str]:
+        # Read the remote-tracking refs locally instead of asking the remote with
+        # 'git remote show origin', which is a network round-trip.
+        refs_output = self._run_git_command(
+            ["git", "for-each-ref", "--format=%(refname)%09%(symref)", "refs/remotes/origin/"]
+        )
+        remote_refs = dict(line.partition("\t")[::2] for line in refs_output.splitlines() if line)
+        origin_head = remote_refs.get("refs/remotes/origin/HEAD")
+        if origin_head:
+            return origin_head.removeprefix("refs/remotes/origin/")
+        if not remote_refs:
+            return None
+        for candidate in ("main", "master"):
+            if f"refs/remotes/origin/{candidate}" in remote_refs:
+                return candidate
+        logger.warning(
+            "Could not determine the default branch of remote 'origin' from refs/remotes/origin/HEAD. "
+            "Falling back to 'main'."
+        )
+        return "main"
 
-        for chunk in commit_chunks:
-            entry = _process_commit_chunk(chunk)
-            if entry:
-                parsed_entries.append(entry)
+    def _get_user_identity(self) -> Tuple[Optional[str], Optional[str]]:
+        """Returns the globally configured (user.name, user.email), cached per repository."""
+        return repo_metadata_cache.get(self.repo_path, GLOBAL_USER_IDENTITY, self._read_user_identity)
 
-        logger.debug(f"Parsed {len(parsed_entries)} GitLogEntry objects.")
-        return parsed_entries
+    def _read_user_identity(self) -> Tuple[Optional[str], Optional[str]]:
+        # One 'git config' call for both keys.
+        try:
+            config_output = self._run_git_command(["git", "config", "--global", "--get-regexp", r"^user\.(name|email)$"])
+        except subprocess.CalledProcessError as e:
+            # 'git config --get-regexp' exits with 1 when nothing matches.
+            if e.returncode == 1:
+                return None, None
+            raise
+        identity: Dict[str, str] = {}
+        for line in config_output.splitlines():
+            key, _, value = line.partition(" ")
+            identity[key] = value.strip()
+        return identity.get("user.name") or None, identity.get("user.email") or None
 
     def _get_commit_hashes(self, base_args_no_pretty_no_paths: List[str], path_filters: List[str]) -> List[str]:
         rev_list_cmd = (
-            ["git", "rev-list", "--all"]
+            ["git", "rev-list", *self._ref_args]
             + base_args_no_pretty_no_paths[2:]
             + path_filters
         )
@@ -118,8 +182,40 @@ class GitCliBackend(GitBackend):
         exclude_paths: Optional[List[str]] = None,
     ) -> List[GitLogEntry]:
         """
-        Retrieves a list of GitLogEntry objects by calling get_raw_log_output
-        and then parsing the result.
+        Retrieves a list of GitLogEntry objects by collecting the entries
+        yielded by iter_log_entries.
+        """
+        parsed_entries = list(
+            self.iter_log_entries(
+                log_args=log_args,
+                since=since,
+                until=until,
+                author=author,
+                me=me,
+                grep=grep,
+                merged_only=merged_only,
+                include_paths=include_paths,
+                exclude_paths=exclude_paths,
+            )
+        )
+        logger.debug(f"Parsed {len(parsed_entries)} GitLogEntry objects.")
+        return parsed_entries
+
+    def iter_log_entries(
+        self,
+        log_args: Optional[List[str]] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        author: Optional[str] = None,
+        me: bool = False,
+        grep: Optional[str] = None,
+        merged_only: bool = False,
+        include_paths: Optional[List[str]] = None,
+        exclude_paths: Optional[List[str]] = None,
+    ) -> Iterator[GitLogEntry]:
+        """
+        Yields GitLogEntry objects one commit at a time, so peak memory depends on
+        the largest commit rather than on the size of the history.
         """
         if author and me:
             raise ValueError("Cannot use both 'author' and 'me' filters together.")
@@ -127,10 +223,9 @@ class GitCliBackend(GitBackend):
         effective_author = author
         if me:
             try:
-                user_name = self._run_git_command(["git", "config", "--global", "user.name"]).strip()
-                user_email = self._run_git_command(["git", "config", "--global", "user.email"]).strip()
+                user_name, user_email = self._get_user_identity()
                 if user_name or user_email:
-                    effective_author = f"{user_name}|{user_email}"
+                    effective_author = "|".join(p for p in (user_name, user_email) if p)
                 else:
                     logger.warning("'--me' was used, but Git user.name and user.email are not configured globally.")
             except Exception as e:
@@ -148,20 +243,148 @@ class GitCliBackend(GitBackend):
 
         path_filters = self._build_path_filters(include_paths, exclude_paths)
 
-        commit_hashes = self._get_commit_hashes(base_args_no_pretty_no_paths, path_filters)
+        if self.extraction_mode == "single_pass":
+            # One 'git log' computes every diff anyway, so the commit cache only
+            # applies to per-commit extraction.
+            yield from self._iter_log_entries_single_pass(base_args_no_pretty_no_paths, path_filters)
+            return
 
+        commit_hashes = self._get_commit_hashes(base_args_no_pretty_no_paths, path_filters)
         if not commit_hashes:
-            return []
+            return
+
+        commit_cache = self._open_commit_cache(include_paths, exclude_paths) if self.use_cache else None
+        if commit_cache is None:
+            yield from self._extract_commits(commit_hashes, path_filters)
+            return
+        with commit_cache:
+            yield from self._iter_log_entries_cached(commit_cache, commit_hashes, path_filters)
+
+    def _open_commit_cache(self, include_paths: Optional[List[str]], exclude_paths: Optional[List[str]]) -> Optional[CommitCache]:
+        try:
+            git_dir = self._run_git_command(["git", "rev-parse", "--git-common-dir"]).strip()
+        except subprocess.CalledProcessError:
+            logger.warning(f"Could not locate the git directory of {self.repo_path}; extracting without the commit cache.")
+            return None
+        return CommitCache.for_git_dir(
+            os.path.join(self.repo_path, git_dir),
+            f"{_COMMIT_CACHE_VARIANT}-{self.rename_detection.cache_key}",
+            include_paths,
+            exclude_paths,
+        )
 
-        combined_output_lines = []
+    def _iter_log_entries_cached(self, commit_cache: CommitCache, commit_hashes: List[str], path_filters: List[str]) -> Iterator[GitLogEntry]:
+        """
+        Yields cached entries as they are, extracts only the commits missing from the
+        cache and stores those, keeping the rev-list order.
+        """
+        cached_entries = commit_cache.get_many(commit_hashes)
+        missing_hashes = [h for h in commit_hashes if h not in cached_entries]
+        logger.info(f"Commit cache: {len(cached_entries)} hits, {len(missing_hashes)} misses.")
 
+        extracted = self._extract_commits(missing_hashes, path_filters) if missing_hashes else iter(())
+        new_entries: List[GitLogEntry] = []
         for commit_hash in commit_hashes:
-            combined_output_lines.extend(self._process_commit(commit_hash, path_filters))
+            entry = cached_entries.get(commit_hash)
+            if entry is None:
+                # Entries are matched by hash, not position, so that git leaving out or
+                # reordering a commit cannot cache one commit's changes under another.
+                entry = next(extracted, None)
+                if entry is None:
+                    raise ValueError(f"git stopped before commit {commit_hash}; expected it next in the diff-tree output.")
+                if entry.commit_hash != commit_hash:
+                    raise ValueError(f"Expected commit {commit_hash} next in the diff-tree output, got {entry.commit_hash}.")
+                new_entries.append(entry)
+                if len(new_entries) >= _COMMIT_CACHE_WRITE_BATCH:
+                    commit_cache.put_many(new_entries)
+                    new_entries = []
+            yield entry
+        commit_cache.put_many(new_entries)
+
+    def _extract_commits(self, commit_hashes: List[str], path_filters: List[str]) -> Iterator[GitLogEntry]:
+        jobs = min(self.jobs, len(commit_hashes) // _MIN_COMMITS_PER_JOB)
+        if jobs <= 1:
+            yield from self._iter_log_entries_for_commits(commit_hashes, path_filters)
+            return
+
+        yield from self._iter_log_entries_parallel(commit_hashes, path_filters, jobs)
+
+    def _iter_log_entries_parallel(self, commit_hashes: List[str], path_filters: List[str], jobs: int) -> Iterator[GitLogEntry]:
+        """
+        Splits the rev-list output into chunks of at most _MAX_COMMITS_PER_CHUNK
+        commits, runs a diff-tree process per chunk on a thread pool of jobs threads and
+        yields the chunks in rev-list order as they complete. At most
+        _CHUNKS_IN_FLIGHT_PER_JOB chunks per job are submitted ahead of the one being
+        yielded, so memory is bounded by those rather than by the history.
+        """
+        in_flight = jobs * _CHUNKS_IN_FLIGHT_PER_JOB
+        chunk_size = max(_MIN_COMMITS_PER_JOB, min(_MAX_COMMITS_PER_CHUNK, -(-len(commit_hashes) // in_flight)))
+        chunks = (commit_hashes[i : i + chunk_size] for i in range(0, len(commit_hashes), chunk_size))
+        logger.debug(f"Processing {len(commit_hashes)} commits in chunks of {chunk_size} on {jobs} parallel diff-tree jobs.")
+        pending: "deque[Future[List[GitLogEntry]]]" = deque()
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            try:
+                for hashes in chunks:
+                    # Each generator only starts its diff-tree process once list() runs it on a worker.
+                    pending.append(executor.submit(list, self._iter_log_entries_for_commits(hashes, path_filters)))
+                    if len(pending) >= in_flight:
+                        yield from pending.popleft().result()
+                while pending:
+                    yield from pending.popleft().result()
+            finally:
+                # A consumer that stops early should not wait for chunks nobody reads.
+                for future in pending:
+                    future.cancel()
+
+    def _iter_log_entries_for_commits(self, commit_hashes: List[str], path_filters: List[str]) -> Iterator[GitLogEntry]:
+        """
+        Pipes the commit hashes into one long-lived 'git diff-tree --stdin' process,
+        which prints the header and the raw/numstat records of each commit in turn,
+        instead of forking 'git show' plus two 'git diff-tree' runs per commit.
 
-        git_data = "\n".join(combined_output_lines)
+        '--root' diffs root commits against the empty tree and '--always' keeps
+        commits whose diff is empty (merges, or everything filtered out by paths).
+        """
+        diff_tree_cmd = (
+            ["git", "diff-tree", "--stdin", "--always", "--root", "-r"]
+            + [_NUL_PRETTY_FORMAT, "--date=iso-strict", "-z", "--raw", "--numstat"]
+            + self._rename_args()
+            + path_filters
+        )
+        yield from _iter_nul_log_entries(
+            self._stream_git_command(diff_tree_cmd, text=False, input_lines=commit_hashes)
+        )
 
-        return self._parse_git_data_to_log_entries(git_data)
+    def _iter_log_entries_single_pass(self, base_args_no_pretty_no_paths: List[str], path_filters: List[str]) -> Iterator[GitLogEntry]:
+        """
+        Extracts metadata, numstat and name-status for the whole range with a single
+        'git log' invocation instead of a rev-list followed by a diff-tree pass.
 
+        '--raw' stands in for '--name-status' (git only honours one of the two next to
+        '--numstat'), and the rename options are the same as for 'git diff-tree'.
+        With '-z' every field is NUL-terminated, so the output is streamed as bytes and
+        parsed commit by commit without marker scanning or path unquoting.
+        """
+        log_cmd = (
+            ["git", "log", *self._ref_args]
+            + base_args_no_pretty_no_paths[2:]
+            + [_NUL_PRETTY_FORMAT, "--date=iso-strict", "-z", "--raw", "--numstat"]
+            + self._rename_args()
+            + path_filters
+        )
+
+        yield from _iter_nul_log_entries(self._stream_git_command(log_cmd, text=False))
+
+    def _rename_args(self) -> List[str]:
+        """
+        Maps the rename detection settings to git's options. git applies '-l' itself,
+        falling back from copies to renames to exact renames on commits over the limit.
+        """
+        rename_detection = self.rename_detection
+        if rename_detection.mode == "off":
+            return ["--no-renames"]
+        find_option = "--find-copies" if rename_detection.mode == "copies" else "--find-renames"
+        return [f"{find_option}={rename_detection.similarity_threshold}%", f"-l{rename_detection.rename_limit}"]
 
     def _add_arg_if_present(self, cmd: List[str], arg_name: str, value: Optional[str]) -> None:
         if value:
@@ -175,11 +398,10 @@ class GitCliBackend(GitBackend):
 
     def _add_merged_only_args(self, cmd: List[str], merged_only: bool) -> None:
         if merged_only:
-            try:
-                self._run_git_command(["git", "remote", "show", "origin"])
-                default_branch = self._get_default_branch()
+            default_branch = self._get_default_branch()
+            if default_branch:
                 cmd.extend(["--merges", f"origin/{default_branch}"])
-            except subprocess.CalledProcessError:
+            else:
                 cmd.append("--merges")
 
     def _build_git_log_arguments(
@@ -221,86 +443,71 @@ class GitCliBackend(GitBackend):
             logger.error(f"Git command failed with error: {e.stderr}")
             raise
 
-    def _parse_numstat_output(self, numstat_output: str) -> dict[str, dict[str, str]]:
-        numstat_changes: dict[str, dict[str, str]] = {}
-        lines = numstat_output.strip().splitlines()
-        if lines and len(lines[0]) == 40 and all(c in '0123456789abcdef' for c in lines[0].lower()):
-            lines = lines[1:]
-
-        for line in lines:
-            if line.strip():
-                parts = line.split("\t")
-                if len(parts) == 3:
-                    additions = parts[0]
-                    deletions = parts[1]
-                    file_path = parts[2].strip()
-                    numstat_changes[file_path] = {
-                        "additions": additions,
-                        "deletions": deletions,
-                    }
-                elif len(parts) == 4:
-                    additions = parts[0]
-                    deletions = parts[1]
-                    file_path = parts[3].strip()
-                    numstat_changes[file_path] = {
-                        "additions": additions,
-                        "deletions": deletions,
-                    }
-                else:
-                    logger.warning(f"Unexpected numstat line format: '{line}'")
-        return numstat_changes
-
-    def _parse_name_status_output(self, name_status_output: str) -> dict[str, dict[str, str]]:
-        name_status_changes: dict[str, dict[str, str]] = {}
-        lines = name_status_output.strip().splitlines()
-        if lines and len(lines[0]) == 40 and all(c in '0123456789abcdef' for c in lines[0].lower()):
-            lines = lines[1:]
-
-        for line in lines:
-            _parse_name_status_line(line, name_status_changes)
-        return name_status_changes
-
-    def _process_commit(self, commit_hash: str, path_filters: List[str]) -> List[str]:
-        metadata_cmd = (
-            ["git", "show", commit_hash, "--no-patch"]
-            + [
-                "--pretty=format:@@@COMMIT@@@%H@@@FIELD@@@%P@@@FIELD@@@%an@@@FIELD@@@%ae@@@FIELD@@@%ad%x09%at@@@FIELD@@@---MSG_START---%s---MSG_END---",
-                "--date=iso-strict",
-            ]
-            + path_filters
-        )
-        metadata_output = self._run_git_command(metadata_cmd)
-
-        parent_hashes = metadata_output.split("@@@FIELD@@@")[1].strip()
-
-        if not parent_hashes:
-            numstat_cmd = ["git", "diff-tree", "-r", "--numstat", "4b825dc642cb6eb9a060e54bf8d69288fbee4904", commit_hash] + path_filters
-            name_status_cmd = ["git", "diff-tree", "-r", "--name-status", "4b825dc642cb6eb9a060e54bf8d69288fbee4904", commit_hash] + path_filters
-        else:
-            numstat_cmd = ["git", "diff-tree", "-r", "--numstat", commit_hash] + path_filters
-            name_status_cmd = (
-                ["git", "diff-tree", "-r", "--name-status", commit_hash]
-                + path_filters
-            )
-
-        numstat_output = self._run_git_command(numstat_cmd)
-        name_status_output = self._run_git_command(name_status_cmd)
-
-        commit_lines = [metadata_output.strip()]
-
-        numstat_changes = self._parse_numstat_output(numstat_output)
-        name_status_changes = self._parse_name_status_output(name_status_output)
-
-        all_file_paths = set(numstat_changes.keys()).union(
-            name_status_changes.keys()
-        )
-        for file_path in all_file_paths:
-            additions = numstat_changes.get(file_path, {}).get("additions", "0")
-            deletions = numstat_changes.get(file_path, {}).get("deletions", "0")
-            change_type = name_status_changes.get(file_path, {}).get(
-                "change_type", "U"
-            )
-            commit_lines.append(
-                f"{additions}\t{deletions}\t{change_type}\t{file_path}"
+    def _stream_git_command(
+        self,
+        cmd: List[str],
+        text: bool = True,
+        input_lines: Optional[Iterable[str]] = None,
+    ) -> Iterator:
+        """
+        Runs a git command and yields its stdout in pieces as they are read, instead
+        of buffering the whole output like _run_git_command. With text=False the
+        pieces are raw bytes. input_lines, if given, are written to the command's
+        stdin from a separate thread while its output is being read.
+        """
+        logger.debug(f"Streaming git command: {' '.join(cmd)}")
+        # stderr goes to a temporary file so a chatty git can't block on a full pipe
+        # while we are still draining stdout.
+        with tempfile.TemporaryFile() as stderr_file:
+            process = subprocess.Popen(
+                cmd,
+                cwd=self.repo_path,
+                stdin=subprocess.PIPE if input_lines is not None else None,
+                stdout=subprocess.PIPE,
+                stderr=stderr_file,
+                text=text,
+                encoding="utf-8" if text else None,
             )
-        return commit_lines
+            assert process.stdout is not None
+            writer = None
+            if input_lines is not None:
+                writer = threading.Thread(
+                    target=self._feed_stdin, args=(process.stdin, input_lines, text), daemon=True
+                )
+                writer.start()
+            drained = False
+            try:
+                while True:
+                    data = process.stdout.read(_STREAM_READ_SIZE)
+                    if not data:
+                        break
+                    yield data
+                drained = True
+            finally:
+                if not drained and process.poll() is None:
+                    # The consumer stopped early; don't wait for git to finish writing.
+                    process.kill()
+                process.stdout.close()
+                returncode = process.wait()
+                if writer is not None:
+                    writer.join()
+
+            if returncode != 0:
+                stderr_file.seek(0)
+                stderr = stderr_file.read().decode("utf-8", errors="replace")
+                logger.error(f"Git command failed with error: {stderr}")
+                raise subprocess.CalledProcessError(returncode, cmd, stderr=stderr)
+
+    @staticmethod
+    def _feed_stdin(stdin, input_lines: Iterable[str], text: bool) -> None:
+        try:
+            for line in input_lines:
+                stdin.write(line + "\n" if text else f"{line}\n".encode("utf-8"))
+        except (BrokenPipeError, ValueError):
+            # git exited (or was killed after the consumer stopped) before reading everything.
+            pass
+        finally:
+            try:
+                stdin.close()
+            except BrokenPipeError:
+                pass
@@ -0,0 +1,208 @@
+import logging
+import os
+import sqlite3
+from typing import Callable, Dict, Iterable, List, Optional
+
+from git2df.commit_cache import CACHE_DIR_NAME
+from git2df.commit_graph import ChangedPathFilter, CommitGraph
+
+logger = logging.getLogger(__name__)
+
+_DB_FILE_NAME = "changed-paths.sqlite"
+
+# Bump whenever the stored filters change meaning; older databases are rebuilt.
+_SCHEMA_VERSION = 1
+
+# Newly built filters are written in batches of this many.
+_FLUSH_SIZE = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS changed_path_filters (
+    commit_hash TEXT PRIMARY KEY,
+    filter BLOB NOT NULL
+);
+"""
+
+
+class _ChangedPathSidecar:
+    """Changed-path filters built by git2df, stored under <git_dir>/git2df-cache."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._connection = sqlite3.connect(db_path, timeout=30)
+        self._pending: Dict[str, bytes] = {}
+        with self._connection:
+            (version,) = self._connection.execute("PRAGMA user_version").fetchone()
+            if version != _SCHEMA_VERSION:
+                self._connection.execute("DROP TABLE IF EXISTS changed_path_filters")
+            self._connection.executescript(_SCHEMA)
+            self._connection.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+
+    @classmethod
+    def open(cls, git_dir: str) -> Optional["_ChangedPathSidecar"]:
+        cache_dir = os.path.join(git_dir, CACHE_DIR_NAME)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            return cls(os.path.join(cache_dir, _DB_FILE_NAME))
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Changed-path index under '{cache_dir}' is unavailable: {e}")
+            return None
+
+    def get(self, commit_hash: str) -> Optional[bytes]:
+        data = self._pending.get(commit_hash)
+        if data is not None:
+            return data
+        row = self._connection.execute(
+            "SELECT filter FROM changed_path_filters WHERE commit_hash = ?", (commit_hash,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def put(self, commit_hash: str, data: bytes) -> None:
+        self._pending[commit_hash] = data
+        if len(self._pending) >= _FLUSH_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO changed_path_filters VALUES (?, ?)", self._pending.items()
+            )
+        logger.debug(f"Stored {len(self._pending)} changed-path filters in {self.db_path}")
+        self._pending.clear()
+
+    def close(self) -> None:
+        try:
+            self.flush()
+        finally:
+            self._connection.close()
+
+
+class ChangedPathIndex:
+    """
+    Tells, without diffing a commit, whether it can have changed anything a set of
+    include paths matches.
+
+    Filters come from git's own changed-path Bloom filters when the commit-graph has
+    them ('git commit-graph write --changed-paths'). Otherwise, and for commits
+    newer than the graph, they come from a sidecar under <git_dir>/git2df-cache,
+    which later runs reuse whatever paths they ask about. With changed_paths_of, the
+    first lookup of a commit lists the paths it changes (a tree diff without line
+    counts) and stores a filter for them; without it, filters are only stored by
+    record, from diffs the caller computes anyway. Without a filter, a commit may
+    touch every path.
+
+    Like the backends' path filters, include paths are string prefixes, so the last
+    component of one may be part of a name ('services/bill' matches
+    'services/billing/...'). The filters only hold whole paths, so for those the
+    names starting with the partial component are looked up one by one.
+    """
+
+    def __init__(
+        self,
+        commit_graph: Optional[CommitGraph],
+        sidecar: Optional[_ChangedPathSidecar],
+        changed_paths_of: Optional[Callable[[str], Optional[List[str]]]],
+    ):
+        self._commit_graph = commit_graph
+        self._sidecar = sidecar
+        self._changed_paths_of = changed_paths_of
+
+    @classmethod
+    def open(
+        cls,
+        git_dir: str,
+        objects_dir: str,
+        changed_paths_of: Optional[Callable[[str], Optional[List[str]]]],
+        use_sidecar: bool,
+    ) -> Optional["ChangedPathIndex"]:
+        """
+        Opens the index of a repository. changed_paths_of lists the paths a commit
+        changes relative to its first parent, or returns None if it cannot tell (e.g.
+        at the boundary of a shallow clone); without it, commits without a stored
+        filter may touch every path. Returns None if there are no filters to read and
+        use_sidecar is off.
+        """
+        commit_graph = CommitGraph.open(objects_dir)
+        if commit_graph is not None and not commit_graph.has_changed_path_filters:
+            commit_graph.close()
+            commit_graph = None
+        sidecar = _ChangedPathSidecar.open(git_dir) if use_sidecar else None
+        if commit_graph is None and sidecar is None:
+            return None
+        logger.debug(f"Changed-path index: commit-graph filters {commit_graph is not None}, sidecar {sidecar is not None}.")
+        return cls(commit_graph, sidecar, changed_paths_of)
+
+    def _filter_for(self, commit_hash: str) -> Optional[ChangedPathFilter]:
+        if self._commit_graph is not None:
+            changed_path_filter = self._commit_graph.changed_path_filter(bytes.fromhex(commit_hash))
+            if changed_path_filter is not None:
+                return changed_path_filter
+        if self._sidecar is None:
+            return None
+
+        data = self._sidecar.get(commit_hash)
+        if data is None:
+            if self._changed_paths_of is None:
+                return None
+            changed_paths = self._changed_paths_of(commit_hash)
+            if changed_paths is None:
+                return None
+            data = ChangedPathFilter.from_paths(changed_paths).data
+            self._sidecar.put(commit_hash, data)
+        return ChangedPathFilter(data)
+
+    def _has_filter(self, commit_hash: str) -> bool:
+        if self._commit_graph is not None and self._commit_graph.changed_path_filter(bytes.fromhex(commit_hash)) is not None:
+            return True
+        return self._sidecar is not None and self._sidecar.get(commit_hash) is not None
+
+    def record(self, commit_hash: str, changed_paths: Iterable[str]) -> None:
+        """
+        Stores a filter for the paths a commit changes relative to its first parent,
+        unless one is stored already. A no-op without the sidecar.
+        """
+        if self._sidecar is not None and not self._has_filter(commit_hash):
+            self._sidecar.put(commit_hash, ChangedPathFilter.from_paths(changed_paths).data)
+
+    def may_touch(
+        self,
+        commit_hash: str,
+        include_paths: List[str],
+        names_in_dir: Callable[[str], Iterable[str]],
+    ) -> bool:
+        """
+        False if the commit certainly changes nothing the include paths match.
+        names_in_dir lists the entry names of a directory in the commit's tree and its
+        first parent's; it is only called for partial names in a directory that changed.
+        """
+        changed_path_filter = self._filter_for(commit_hash)
+        if changed_path_filter is None:
+            return True
+
+        for include_path in include_paths:
+            dir_path, _, name_prefix = include_path.rpartition("/")
+            if dir_path and not changed_path_filter.may_contain(dir_path):
+                continue
+            if not name_prefix or changed_path_filter.may_contain(include_path):
+                return True
+            # A changed path under a name that starts with name_prefix has that name in
+            # the commit's tree (added or modified) or its parent's (deleted).
+            path_prefix = f"{dir_path}/" if dir_path else ""
+            for name in names_in_dir(dir_path):
+                if name.startswith(name_prefix) and changed_path_filter.may_contain(path_prefix + name):
+                    return True
+        return False
+
+    def close(self) -> None:
+        if self._commit_graph is not None:
+            self._commit_graph.close()
+        if self._sidecar is not None:
+            self._sidecar.close()
+
+    def __enter__(self) -> "ChangedPathIndex":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,207 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from git2df.git_parser import FileChange, GitLogEntry
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR_NAME = "git2df-cache"
+_DB_FILE_NAME = "commits.sqlite"
+
+# Bump whenever the stored layout or the meaning of a cached entry changes;
+# databases written with another version are dropped and rebuilt.
+_SCHEMA_VERSION = 1
+
+# Stay well below SQLite's limit on host parameters per statement.
+_QUERY_CHUNK_SIZE = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS commits (
+    variant TEXT NOT NULL,
+    filters TEXT NOT NULL,
+    commit_hash TEXT NOT NULL,
+    parent_hashes TEXT NOT NULL,
+    author_name TEXT NOT NULL,
+    author_email TEXT NOT NULL,
+    commit_date TEXT NOT NULL,
+    commit_timestamp INTEGER NOT NULL,
+    commit_message TEXT NOT NULL,
+    PRIMARY KEY (variant, filters, commit_hash)
+);
+CREATE TABLE IF NOT EXISTS file_changes (
+    variant TEXT NOT NULL,
+    filters TEXT NOT NULL,
+    commit_hash TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    file_path TEXT NOT NULL,
+    additions INTEGER NOT NULL,
+    deletions INTEGER NOT NULL,
+    change_type TEXT NOT NULL,
+    old_file_path TEXT,
+    PRIMARY KEY (variant, filters, commit_hash, position)
+);
+"""
+
+
+class CommitCache:
+    """
+    On-disk cache of extracted commits, keyed by commit SHA.
+
+    Commits are immutable, so once a backend has diffed a commit its GitLogEntry can
+    be reused by later runs. Entries are additionally keyed by a backend 'variant'
+    (backends differ in rename detection and in which date they report) and by the
+    include/exclude path filters, which decide the file changes a commit carries.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        variant: str,
+        include_paths: Optional[List[str]] = None,
+        exclude_paths: Optional[List[str]] = None,
+    ):
+        self.db_path = db_path
+        self.variant = variant
+        self.filters = json.dumps([sorted(include_paths or []), sorted(exclude_paths or [])])
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._initialize_schema()
+
+    @classmethod
+    def for_git_dir(
+        cls,
+        git_dir: str,
+        variant: str,
+        include_paths: Optional[List[str]] = None,
+        exclude_paths: Optional[List[str]] = None,
+    ) -> Optional["CommitCache"]:
+        """
+        Opens the cache stored under <git_dir>/git2df-cache. Returns None (and the
+        caller extracts everything as usual) if it cannot be created or opened, e.g.
+        for a read-only repository.
+        """
+        cache_dir = os.path.join(git_dir, CACHE_DIR_NAME)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            return cls(os.path.join(cache_dir, _DB_FILE_NAME), variant, include_paths, exclude_paths)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Commit cache under '{cache_dir}' is unavailable, extracting without it: {e}")
+            return None
+
+    def _initialize_schema(self) -> None:
+        with self._lock, self._connection:
+            (version,) = self._connection.execute("PRAGMA user_version").fetchone()
+            if version != _SCHEMA_VERSION:
+                self._connection.execute("DROP TABLE IF EXISTS commits")
+                self._connection.execute("DROP TABLE IF EXISTS file_changes")
+            self._connection.executescript(_SCHEMA)
+            self._connection.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+
+    def get(self, commit_hash: str) -> Optional[GitLogEntry]:
+        return self.get_many([commit_hash]).get(commit_hash)
+
+    def get_many(self, commit_hashes: Iterable[str]) -> Dict[str, GitLogEntry]:
+        """Returns the cached entries among commit_hashes, keyed by commit hash."""
+        commit_hashes = list(commit_hashes)
+        entries: Dict[str, GitLogEntry] = {}
+        with self._lock:
+            for start in range(0, len(commit_hashes), _QUERY_CHUNK_SIZE):
+                chunk = commit_hashes[start : start + _QUERY_CHUNK_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                params = [self.variant, self.filters, *chunk]
+                for row in self._connection.execute(
+                    "SELECT commit_hash, parent_hashes, author_name, author_email, commit_date, "
+                    "commit_timestamp, commit_message FROM commits "
+                    f"WHERE variant = ? AND filters = ? AND commit_hash IN ({placeholders})",
+                    params,
+                ):
+                    entries[row[0]] = GitLogEntry(
+                        commit_hash=row[0],
+                        parent_hashes=json.loads(row[1]),
+                        author_name=row[2],
+                        author_email=row[3],
+                        commit_date=datetime.fromisoformat(row[4]),
+                        commit_timestamp=row[5],
+                        commit_message=row[6],
+                    )
+                for row in self._connection.execute(
+                    "SELECT commit_hash, file_path, additions, deletions, change_type, old_file_path "
+                    "FROM file_changes "
+                    f"WHERE variant = ? AND filters = ? AND commit_hash IN ({placeholders}) "
+                    "ORDER BY commit_hash, position",
+                    params,
+                ):
+                    entry = entries.get(row[0])
+                    if entry is not None:
+                        entry.file_changes.append(
+                            FileChange(
+                                file_path=row[1],
+                                additions=row[2],
+                                deletions=row[3],
+                                change_type=row[4],
+                                old_file_path=row[5],
+                            )
+                        )
+        return entries
+
+    def put_many(self, entries: Iterable[GitLogEntry]) -> None:
+        """Stores (or replaces) the given entries."""
+        commit_rows = []
+        file_change_rows = []
+        for entry in entries:
+            commit_rows.append(
+                (
+                    self.variant,
+                    self.filters,
+                    entry.commit_hash,
+                    json.dumps(entry.parent_hashes),
+                    entry.author_name,
+                    entry.author_email,
+                    entry.commit_date.isoformat(),
+                    entry.commit_timestamp,
+                    entry.commit_message,
+                )
+            )
+            for position, fc in enumerate(entry.file_changes):
+                file_change_rows.append(
+                    (
+                        self.variant,
+                        self.filters,
+                        entry.commit_hash,
+                        position,
+                        fc.file_path,
+                        fc.additions,
+                        fc.deletions,
+                        fc.change_type,
+                        fc.old_file_path,
+                    )
+                )
+        if not commit_rows:
+            return
+
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "DELETE FROM file_changes WHERE variant = ? AND filters = ? AND commit_hash = ?",
+                [row[:3] for row in commit_rows],
+            )
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO commits VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", commit_rows
+            )
+            self._connection.executemany(
+                "INSERT INTO file_changes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", file_change_rows
+            )
+        logger.debug(f"Stored {len(commit_rows)} commits in the commit cache at {self.db_path}")
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __enter__(self) -> "CommitCache":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
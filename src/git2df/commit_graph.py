@@ -0,0 +1,390 @@
+import logging
+import mmap
+import os
+import struct
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Callable, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Layout of git's commit-graph files, see Documentation/gitformat-commit-graph.txt.
+_SIGNATURE = b"CGPH"
+_HASH_LENGTHS = {1: 20, 2: 32}
+_HEADER = struct.Struct(">4sBBBB")
+_CHUNK_ENTRY = struct.Struct(">4sQ")
+_CHUNK_OID_FANOUT = b"OIDF"
+_CHUNK_OID_LOOKUP = b"OIDL"
+_CHUNK_COMMIT_DATA = b"CDAT"
+# Corrected commit date offsets. git 2.31 to 2.35 wrote them to a 'GDAT' chunk with a
+# bug, which git ignores since; so does this reader.
+_CHUNK_GENERATION_DATA = b"GDA2"
+_CHUNK_GENERATION_DATA_OVERFLOW = b"GDO2"
+_OVERFLOW_BIT = 0x80000000
+# Changed-path Bloom filters, written by 'git commit-graph write --changed-paths'.
+_CHUNK_BLOOM_INDEX = b"BIDX"
+_CHUNK_BLOOM_DATA = b"BDAT"
+_BLOOM_DATA_HEADER = struct.Struct(">III")
+
+# git's Bloom filter settings: the seeds of the two murmur3 hashes every key gets,
+# and the defaults for the number of bits set per key, filter bits per key and the
+# number of changed paths above which a commit gets an all-ones filter instead.
+_BLOOM_SEEDS = (0x293AE76F, 0x7E646E2C)
+DEFAULT_BLOOM_NUM_HASHES = 7
+DEFAULT_BLOOM_BITS_PER_ENTRY = 10
+DEFAULT_BLOOM_MAX_CHANGED_PATHS = 512
+
+_UINT32 = 0xFFFFFFFF
+
+
+def _rotl32(value: int, shift: int) -> int:
+    return ((value << shift) | (value >> (32 - shift))) & _UINT32
+
+
+def _murmur3_32(data: bytes, seed: int, signed_bytes: bool) -> int:
+    """
+    murmur3's 32-bit hash as git computes it. Version 1 filters were hashed reading
+    the key as C chars, which sign-extends bytes above 0x7f; signed_bytes emulates it.
+    """
+    if signed_bytes:
+        data_words = [b | 0xFFFFFF00 if b & 0x80 else b for b in data]
+    else:
+        data_words = list(data)
+    c1, c2 = 0xCC9E2D51, 0x1B873593
+    h = seed
+    length = len(data_words)
+    block_end = length - length % 4
+    for i in range(0, block_end, 4):
+        k = (
+            data_words[i]
+            | (data_words[i + 1] << 8)
+            | (data_words[i + 2] << 16)
+            | (data_words[i + 3] << 24)
+        ) & _UINT32
+        k = _rotl32((k * c1) & _UINT32, 15)
+        h ^= (k * c2) & _UINT32
+        h = (_rotl32(h, 13) * 5 + 0xE6546B64) & _UINT32
+
+    k = 0
+    tail = length - block_end
+    if tail == 3:
+        k ^= data_words[block_end + 2] << 16
+    if tail >= 2:
+        k ^= data_words[block_end + 1] << 8
+    if tail >= 1:
+        k ^= data_words[block_end]
+        k = _rotl32((k * c1) & _UINT32, 15)
+        h ^= (k * c2) & _UINT32
+
+    h ^= length
+    h ^= h >> 16
+    h = (h * 0x85EBCA6B) & _UINT32
+    h ^= h >> 13
+    h = (h * 0xC2B2AE35) & _UINT32
+    h ^= h >> 16
+    return h
+
+
+@lru_cache(maxsize=4096)
+def _bloom_key_hashes(key: bytes, hash_version: int) -> Tuple[int, int]:
+    # The same few include paths are looked up in every commit's filter.
+    signed_bytes = hash_version == 1
+    return _murmur3_32(key, _BLOOM_SEEDS[0], signed_bytes), _murmur3_32(key, _BLOOM_SEEDS[1], signed_bytes)
+
+
+def changed_path_keys(paths: Iterable[str]) -> Set[str]:
+    """Returns the Bloom filter keys of changed paths: each path and its leading directories."""
+    keys = set()
+    for path in paths:
+        keys.add(path)
+        end = path.rfind("/")
+        while end > 0:
+            keys.add(path[:end])
+            end = path.rfind("/", 0, end)
+    return keys
+
+
+class ChangedPathFilter:
+    """
+    A commit's changed-path Bloom filter in git's format. It holds the paths the
+    commit changes relative to its first parent and their leading directories, so a
+    negative answer means the commit leaves a path, and everything under it, alone.
+    """
+
+    def __init__(self, data: bytes, num_hashes: int = DEFAULT_BLOOM_NUM_HASHES, hash_version: int = 2):
+        self.data = data
+        self.num_hashes = num_hashes
+        self.hash_version = hash_version
+
+    @classmethod
+    def from_paths(
+        cls,
+        paths: Iterable[str],
+        num_hashes: int = DEFAULT_BLOOM_NUM_HASHES,
+        bits_per_entry: int = DEFAULT_BLOOM_BITS_PER_ENTRY,
+        max_changed_paths: int = DEFAULT_BLOOM_MAX_CHANGED_PATHS,
+    ) -> "ChangedPathFilter":
+        """Builds a version 2 filter the way git does."""
+        paths = list(paths)
+        if len(paths) > max_changed_paths:
+            return cls(b"\xff", num_hashes)
+        keys = changed_path_keys(paths)
+        data = bytearray(max(1, (len(keys) * bits_per_entry + 7) // 8))
+        filter_bits = len(data) * 8
+        for key in keys:
+            hash0, hash1 = _bloom_key_hashes(key.encode("utf-8", "surrogateescape"), 2)
+            for i in range(num_hashes):
+                position = ((hash0 + i * hash1) & _UINT32) % filter_bits
+                data[position >> 3] |= 1 << (position & 7)
+        return cls(bytes(data), num_hashes)
+
+    def may_contain(self, path: str) -> bool:
+        """False if path (a changed path or directory, without trailing '/') is certainly not in the filter."""
+        data = self.data
+        if not data:
+            return True
+        hash0, hash1 = _bloom_key_hashes(path.encode("utf-8", "surrogateescape"), self.hash_version)
+        filter_bits = len(data) * 8
+        for i in range(self.num_hashes):
+            position = ((hash0 + i * hash1) & _UINT32) % filter_bits
+            if not data[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+
+class _CommitGraphLayer:
+    """One commit-graph file, memory mapped and searched in place."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._parse_chunks(path)
+        except Exception:
+            self._data.close()
+            raise
+
+    def _parse_chunks(self, path: str) -> None:
+        signature, version, hash_version, num_chunks, _ = _HEADER.unpack_from(self._data, 0)
+        if signature != _SIGNATURE or version != 1 or hash_version not in _HASH_LENGTHS:
+            raise ValueError(f"Unsupported commit-graph file '{path}'")
+        self.hash_length = _HASH_LENGTHS[hash_version]
+
+        entries = [
+            _CHUNK_ENTRY.unpack_from(self._data, _HEADER.size + i * _CHUNK_ENTRY.size)
+            for i in range(num_chunks + 1)
+        ]
+        chunks = {chunk_id: offset for chunk_id, offset in entries[:-1]}
+        missing = [c for c in (_CHUNK_OID_FANOUT, _CHUNK_OID_LOOKUP, _CHUNK_COMMIT_DATA) if c not in chunks]
+        if missing:
+            raise ValueError(f"Commit-graph file '{path}' lacks required chunks {missing}")
+
+        self._fanout = struct.unpack_from(">256I", self._data, chunks[_CHUNK_OID_FANOUT])
+        self._oid_lookup = chunks[_CHUNK_OID_LOOKUP]
+        self._commit_data = chunks[_CHUNK_COMMIT_DATA]
+        self._generation_data = chunks.get(_CHUNK_GENERATION_DATA)
+        self._generation_overflow = chunks.get(_CHUNK_GENERATION_DATA_OVERFLOW)
+        self._bloom_index = chunks.get(_CHUNK_BLOOM_INDEX)
+        self._bloom_data = chunks.get(_CHUNK_BLOOM_DATA)
+        if self._bloom_index is not None and self._bloom_data is not None:
+            self._bloom_hash_version, self._bloom_num_hashes, _ = _BLOOM_DATA_HEADER.unpack_from(
+                self._data, self._bloom_data
+            )
+            if self._bloom_hash_version not in (1, 2):
+                self._bloom_index = None
+
+    @property
+    def has_changed_path_filters(self) -> bool:
+        return self._bloom_index is not None and self._bloom_data is not None
+
+    @property
+    def has_corrected_dates(self) -> bool:
+        return self._generation_data is not None
+
+    def _position(self, commit_id: bytes) -> Optional[int]:
+        first_byte = commit_id[0]
+        low = self._fanout[first_byte - 1] if first_byte else 0
+        high = self._fanout[first_byte]
+        hash_length = self.hash_length
+        while low < high:
+            middle = (low + high) // 2
+            offset = self._oid_lookup + middle * hash_length
+            found = self._data[offset : offset + hash_length]
+            if found == commit_id:
+                return middle
+            if found < commit_id:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def corrected_commit_date(self, commit_id: bytes) -> Optional[int]:
+        position = self._position(commit_id)
+        if position is None or self._generation_data is None:
+            return None
+        # CDAT entries: tree id, two parent positions, then 30 bits of topological
+        # level and the 34-bit commit time.
+        dates_offset = self._commit_data + position * (self.hash_length + 16) + self.hash_length + 8
+        high, low = struct.unpack_from(">II", self._data, dates_offset)
+        commit_time = ((high & 0x3) << 32) | low
+        (offset,) = struct.unpack_from(">I", self._data, self._generation_data + position * 4)
+        if offset & _OVERFLOW_BIT:
+            overflow_offset = self._generation_overflow + (offset ^ _OVERFLOW_BIT) * 8
+            (offset,) = struct.unpack_from(">Q", self._data, overflow_offset)
+        return commit_time + offset
+
+    def changed_path_filter(self, commit_id: bytes) -> Optional[ChangedPathFilter]:
+        if not self.has_changed_path_filters:
+            return None
+        position = self._position(commit_id)
+        if position is None:
+            return None
+        start = struct.unpack_from(">I", self._data, self._bloom_index + (position - 1) * 4)[0] if position else 0
+        (end,) = struct.unpack_from(">I", self._data, self._bloom_index + position * 4)
+        if end == start:
+            # git leaves the filter empty for commits it did not compute one for.
+            return None
+        data_start = self._bloom_data + _BLOOM_DATA_HEADER.size
+        return ChangedPathFilter(
+            self._data[data_start + start : data_start + end], self._bloom_num_hashes, self._bloom_hash_version
+        )
+
+    def close(self) -> None:
+        self._data.close()
+
+
+class CommitGraph:
+    """
+    Reads corrected commit dates and changed-path Bloom filters from a repository's
+    commit-graph file (or chain of files), as written by 'git commit-graph write' or
+    'git gc'.
+
+    A commit's corrected commit date is at least its own commit date and greater than
+    the corrected date of each of its parents, so it bounds the commit dates of all
+    of its ancestors however skewed their clocks were.
+    """
+
+    def __init__(self, layers: List[_CommitGraphLayer]):
+        self._layers = layers
+
+    @classmethod
+    def open(cls, objects_dir: str) -> Optional["CommitGraph"]:
+        """Opens the commit-graph under objects_dir. Returns None if there is none."""
+        info_dir = os.path.join(objects_dir, "info")
+        chain_path = os.path.join(info_dir, "commit-graphs", "commit-graph-chain")
+        if os.path.exists(chain_path):
+            with open(chain_path) as f:
+                paths = [
+                    os.path.join(info_dir, "commit-graphs", f"graph-{line.strip()}.graph")
+                    for line in f
+                    if line.strip()
+                ]
+        elif os.path.exists(os.path.join(info_dir, "commit-graph")):
+            paths = [os.path.join(info_dir, "commit-graph")]
+        else:
+            return None
+
+        layers: List[_CommitGraphLayer] = []
+        try:
+            for path in paths:
+                layers.append(_CommitGraphLayer(path))
+        except (OSError, ValueError, struct.error) as e:
+            logger.warning(f"Ignoring unreadable commit-graph in {objects_dir}: {e}")
+            for layer in layers:
+                layer.close()
+            return None
+
+        logger.debug(f"Using commit-graph with {len(layers)} layer(s) in {objects_dir}.")
+        return cls(layers)
+
+    @property
+    def has_corrected_dates(self) -> bool:
+        """False for graphs written before git 2.36, or with generation numbers v1."""
+        return all(layer.has_corrected_dates for layer in self._layers)
+
+    @property
+    def has_changed_path_filters(self) -> bool:
+        return any(layer.has_changed_path_filters for layer in self._layers)
+
+    def corrected_commit_date(self, commit_id: bytes) -> Optional[int]:
+        """Returns the corrected commit date of a binary commit id, or None if the graph lacks it."""
+        for layer in self._layers:
+            corrected_date = layer.corrected_commit_date(commit_id)
+            if corrected_date is not None:
+                return corrected_date
+        return None
+
+    def changed_path_filter(self, commit_id: bytes) -> Optional[ChangedPathFilter]:
+        """Returns the changed-path Bloom filter of a binary commit id, or None if the graph has none."""
+        for layer in self._layers:
+            changed_path_filter = layer.changed_path_filter(commit_id)
+            if changed_path_filter is not None:
+                return changed_path_filter
+        return None
+
+    def close(self) -> None:
+        for layer in self._layers:
+            layer.close()
+
+    def __enter__(self) -> "CommitGraph":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class SinceHorizon:
+    """
+    Follows a walk from the tip commits towards older ones and tells when no commit
+    left to walk can have been committed at or after since_dt, so the walk can stop
+    there instead of going through the rest of the history.
+
+    With a commit graph the stop is exact: a parent whose corrected commit date is
+    older than since_dt only has older ancestors. Commits missing from the graph
+    (newer than it) are always followed. Without a graph, a parent is judged by its
+    own commit date, as 'git log --since' does, which can miss commits behind
+    several consecutive commits with skewed clocks.
+
+    Commit ids can be of any hashable type; raw_id turns one into the binary id the
+    graph is keyed by, and commit_time_of loads a commit's date.
+    """
+
+    def __init__(
+        self,
+        tip_ids: Iterable[Any],
+        since_dt: datetime,
+        commit_time_of: Callable[[Any], int],
+        raw_id: Callable[[Any], bytes],
+        commit_graph: Optional[CommitGraph] = None,
+    ):
+        self._since = since_dt.timestamp()
+        self._commit_time_of = commit_time_of
+        self._raw_id = raw_id
+        # Without corrected dates the graph's generation numbers bound nothing.
+        self._commit_graph = commit_graph if commit_graph and commit_graph.has_corrected_dates else None
+        self._seen: Set[Any] = set(tip_ids)
+        # Walked-to but not yet visited commits that may lead to one since since_dt.
+        self._open: Set[Any] = set(self._seen)
+
+    def _may_lead_into_window(self, commit_id: Any) -> bool:
+        if self._commit_graph is not None:
+            corrected_date = self._commit_graph.corrected_commit_date(self._raw_id(commit_id))
+            if corrected_date is None:
+                return True
+            return corrected_date >= self._since
+        return self._commit_time_of(commit_id) >= self._since
+
+    def visit(self, commit_id: Any, parent_ids: Iterable[Any]) -> None:
+        """Records that the walk has output commit_id and will go on to parent_ids."""
+        self._open.discard(commit_id)
+        for parent_id in parent_ids:
+            if parent_id in self._seen:
+                continue
+            self._seen.add(parent_id)
+            if self._may_lead_into_window(parent_id):
+                self._open.add(parent_id)
+
+    @property
+    def reached(self) -> bool:
+        """True once every commit left to walk is older than since_dt, as are its ancestors."""
+        return not self._open
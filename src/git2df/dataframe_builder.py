@@ -1,15 +1,44 @@
 import logging
+from array import array
+from itertools import repeat
+from typing import Any, List
+
+import numpy as np
 import pandas as pd
-from typing import List
 from git2df.git_parser import GitLogEntry
 
 logger = logging.getLogger(__name__)
 
+COMMITS_DF_COLUMNS = [
+    "commit_hash",
+    "parent_hashes",
+    "author_name",
+    "author_email",
+    "commit_date",
+    "commit_timestamp",
+    "commit_message",
+    "file_paths",
+    "change_type",
+    "additions",
+    "deletions",
+    "old_file_path",
+]
+
+
+def _int64_column(values: array) -> np.ndarray:
+    # array("q") holds C long longs, which numpy can view without converting each int.
+    return np.frombuffer(values, dtype=np.int64)
+
 
 def build_commits_df(parsed_data: List[GitLogEntry]) -> pd.DataFrame:
     """
     Converts parsed git data (list of GitLogEntry objects) into a Pandas DataFrame.
 
+    Rows are appended column by column rather than as one dict per row: commit-level
+    fields are repeated once per file change by reference, and the integer columns
+    are packed into typed arrays, so building a frame for millions of file changes
+    does not allocate millions of transient dicts or run pandas' per-row inference.
+
     Args:
         parsed_data: A list of GitLogEntry objects, where each object represents a commit
                      and contains all the extracted commit and file information.
@@ -22,63 +51,64 @@ def build_commits_df(parsed_data: List[GitLogEntry]) -> pd.DataFrame:
     )
     if not parsed_data:
         logger.info("No parsed data entries, returning empty DataFrame.")
-        return pd.DataFrame(
-            columns=[
-                "commit_hash",
-                "parent_hashes",
-                "author_name",
-                "author_email",
-                "commit_date",
-                "commit_timestamp",
-                "commit_message",
-                "file_paths",
-                "change_type",
-                "additions",
-                "deletions",
-                "old_file_path",
-            ]
-        )
+        return pd.DataFrame(columns=COMMITS_DF_COLUMNS)
+
+    commit_hashes: List[str] = []
+    parent_hashes: List[List[str]] = []
+    author_names: List[str] = []
+    author_emails: List[str] = []
+    commit_dates: List[Any] = []
+    commit_timestamps = array("q")
+    commit_messages: List[str] = []
+    file_paths: List[Any] = []
+    change_types: List[Any] = []
+    additions = array("q")
+    deletions = array("q")
+    old_file_paths: List[Any] = []
 
-    records = []
     for entry in parsed_data:
         if entry.file_changes:
             for file_change in entry.file_changes:
-                records.append(
-                    {
-                        "commit_hash": entry.commit_hash,
-                        "parent_hashes": entry.parent_hashes,
-                        "author_name": entry.author_name,
-                        "author_email": entry.author_email,
-                        "commit_date": entry.commit_date,
-                        "commit_timestamp": entry.commit_timestamp,
-                        "commit_message": entry.commit_message,
-                        "file_paths": file_change.file_path,
-                        "change_type": file_change.change_type,
-                        "additions": file_change.additions,
-                        "deletions": file_change.deletions,
-                        "old_file_path": file_change.old_file_path,
-                    }
-                )
-                logger.debug(f"Appended record for commit {entry.commit_hash}, file {file_change.file_path}")
+                file_paths.append(file_change.file_path)
+                change_types.append(file_change.change_type)
+                additions.append(file_change.additions)
+                deletions.append(file_change.deletions)
+                old_file_paths.append(file_change.old_file_path)
+            rows = len(entry.file_changes)
         else:
             # Handle commits with no file changes (e.g., merge commits without --numstat output)
-            records.append(
-                {
-                    "commit_hash": entry.commit_hash,
-                    "parent_hashes": entry.parent_hashes,
-                    "author_name": entry.author_name,
-                    "author_email": entry.author_email,
-                    "commit_date": entry.commit_date,
-                    "commit_timestamp": entry.commit_timestamp,
-                    "commit_message": entry.commit_message,
-                    "file_paths": None,  # Or an appropriate default
-                    "change_type": None,  # Or an appropriate default
-                    "additions": 0,
-                    "deletions": 0,
-                    "old_file_path": None,
-                }
-            )
+            file_paths.append(None)
+            change_types.append(None)
+            additions.append(0)
+            deletions.append(0)
+            old_file_paths.append(None)
+            rows = 1
 
-    df = pd.DataFrame(records)
+        commit_hashes.extend(repeat(entry.commit_hash, rows))
+        parent_hashes.extend(repeat(entry.parent_hashes, rows))
+        author_names.extend(repeat(entry.author_name, rows))
+        author_emails.extend(repeat(entry.author_email, rows))
+        commit_dates.extend(repeat(entry.commit_date, rows))
+        commit_timestamps.extend(repeat(entry.commit_timestamp, rows))
+        commit_messages.extend(repeat(entry.commit_message, rows))
+
+    df = pd.DataFrame(
+        {
+            "commit_hash": commit_hashes,
+            "parent_hashes": parent_hashes,
+            "author_name": author_names,
+            "author_email": author_emails,
+            "commit_date": commit_dates,
+            "commit_timestamp": _int64_column(commit_timestamps),
+            "commit_message": commit_messages,
+            "file_paths": file_paths,
+            "change_type": change_types,
+            "additions": _int64_column(additions),
+            "deletions": _int64_column(deletions),
+            "old_file_path": old_file_paths,
+        },
+        columns=COMMITS_DF_COLUMNS,
+        copy=True,
+    )
     logger.info(f"Successfully built DataFrame with {len(df)} rows.")
     return df
@@ -1,17 +1,21 @@
+import datetime
 import logging
-from typing import List, Optional
+from typing import Iterator, List, Optional, Union
 import subprocess
 
 from dulwich.repo import Repo
 
 from ..backend_interface import GitBackend
 from ..git_parser import GitLogEntry
+from ..rename_detection import RenameDetection
+from ..tree_diff_cache import DEFAULT_TREE_DIFF_CACHE_SIZE, TreeDiffCache
 from .date_utils import get_date_filters
-from .diff_parser import DulwichDiffParser
+from .diff_parser import BlobLineCountCache, DulwichDiffParser
+from .mirror_cache import DEFAULT_MIRROR_CACHE_MAX_BYTES, MirrorCache
 from .commit_filters import DulwichCommitFilters
 from .commit_formatter import DulwichCommitFormatter
 from .commit_walker import DulwichCommitWalker
-from .repo_handler import DulwichRepoHandler
+from .repo_handler import DEFAULT_SHALLOW_SINCE_MARGIN, DulwichRepoHandler
 
 logger = logging.getLogger(__name__)
 
@@ -19,9 +23,48 @@ logger = logging.getLogger(__name__)
 class DulwichRemoteBackend(GitBackend):
     """A backend for git2df that interacts with remote Git repositories using Dulwich."""
 
-    def __init__(self, remote_url: str, remote_branch: str = "main"):
+    def __init__(
+        self,
+        remote_url: str,
+        remote_branch: str = "main",
+        use_cache: bool = False,
+        rename_detection: Union[None, str, RenameDetection] = None,
+        tree_diff_cache_size: int = DEFAULT_TREE_DIFF_CACHE_SIZE,
+        mirror_cache_dir: Optional[str] = None,
+        mirror_cache_max_bytes: int = DEFAULT_MIRROR_CACHE_MAX_BYTES,
+        shallow_since_margin: Optional[datetime.timedelta] = DEFAULT_SHALLOW_SINCE_MARGIN,
+        partial_clone: bool = False,
+        jobs: int = 1,
+    ):
+        """
+        With use_cache, or a mirror_cache_dir given, remote repositories are fetched
+        into bare mirrors kept across runs (see MirrorCache), so later runs only fetch
+        new objects. The mirrors live in mirror_cache_dir, $GIT2DF_MIRROR_CACHE_DIR or
+        ~/.cache/git2df/mirrors and are trimmed to mirror_cache_max_bytes.
+
+        With since, only the history since then, less shallow_since_margin, is
+        fetched from remotes (a shallow fetch), plus whatever it takes to diff the
+        oldest commits in the window. None fetches the whole history regardless.
+
+        With partial_clone, remotes are fetched without blobs (filter 'blob:none') and
+        only the blobs of the changed files that the path filters keep are fetched,
+        in batches, as the commits are diffed. Servers without filter support send
+        everything, as without it.
+
+        With jobs > 1, commits are diffed on up to jobs worker processes once the
+        fetch is done, in this process for short ranges.
+        """
         self.remote_url = remote_url
         self.remote_branch = remote_branch
+        self.use_cache = use_cache
+        self.rename_detection = rename_detection
+        # File changes per tree pair, kept across get_log_entries calls; see TreeDiffCache.
+        self.tree_diff_cache = TreeDiffCache(tree_diff_cache_size)
+        self.blob_line_counts = BlobLineCountCache()
+
+        self.mirror_cache = (
+            MirrorCache(mirror_cache_dir, mirror_cache_max_bytes) if use_cache or mirror_cache_dir else None
+        )
 
         self.repo: Optional[Repo] = None # Always treat as remote
         logger.info(
@@ -31,7 +74,7 @@ class DulwichRemoteBackend(GitBackend):
         self.commit_filters = DulwichCommitFilters()
         self.commit_formatter = DulwichCommitFormatter()
         self.commit_walker = DulwichCommitWalker(
-            self.commit_filters, self.commit_formatter, self.remote_branch
+            self.commit_filters, self.commit_formatter, self.remote_branch, jobs=jobs
         )
         self.repo_handler = DulwichRepoHandler(
             self.remote_url,
@@ -39,6 +82,10 @@ class DulwichRemoteBackend(GitBackend):
             False, # Always treat as remote
             self.repo,
             self.commit_walker,
+            use_cache=self.use_cache,
+            mirror_cache=self.mirror_cache,
+            shallow_since_margin=shallow_since_margin,
+            partial_clone=partial_clone,
         )
 
     def get_log_entries(
@@ -54,7 +101,38 @@ class DulwichRemoteBackend(GitBackend):
         exclude_paths: Optional[List[str]] = None,
     ) -> List[GitLogEntry]:
         """
-        Retrieves a list of GitLogEntry objects directly from the Dulwich backend.
+        Retrieves a list of GitLogEntry objects by collecting the entries
+        yielded by iter_log_entries.
+        """
+        return list(
+            self.iter_log_entries(
+                log_args=log_args,
+                since=since,
+                until=until,
+                author=author,
+                me=me,
+                grep=grep,
+                merged_only=merged_only,
+                include_paths=include_paths,
+                exclude_paths=exclude_paths,
+            )
+        )
+
+    def iter_log_entries(
+        self,
+        log_args: Optional[List[str]] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        author: Optional[str] = None,
+        me: bool = False,
+        grep: Optional[str] = None,
+        merged_only: bool = False,
+        include_paths: Optional[List[str]] = None,
+        exclude_paths: Optional[List[str]] = None,
+    ) -> Iterator[GitLogEntry]:
+        """
+        Yields GitLogEntry objects as the commits are walked and diffed, a batch at a
+        time, so peak memory does not grow with the length of the history.
         """
         if author and me:
             raise ValueError("Cannot use both 'author' and 'me' filters together.")
@@ -76,10 +154,15 @@ class DulwichRemoteBackend(GitBackend):
         since_dt, until_dt = get_date_filters(since, until)
 
         diff_parser = DulwichDiffParser(
-            include_paths=include_paths, exclude_paths=exclude_paths
+            include_paths=include_paths,
+            exclude_paths=exclude_paths,
+            rename_detection=self.rename_detection,
+            tree_diff_cache=self.tree_diff_cache,
+            blob_line_counts=self.blob_line_counts,
         )
 
-        return self.repo_handler.handle_remote_repo(
+        yield from self.repo_handler.iter_remote_repo(
             since_dt, until_dt, effective_author, grep, diff_parser
         )
+        self.tree_diff_cache.log_info()
 
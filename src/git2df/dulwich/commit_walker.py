@@ -1,18 +1,34 @@
 import datetime
 import logging
-from typing import List, Optional, cast
-from git2df.git_parser import GitLogEntry
+from itertools import islice
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple, Union, cast
+from git2df.changed_paths import ChangedPathIndex
+from git2df.commit_cache import CommitCache
+from git2df.commit_graph import CommitGraph, SinceHorizon
+from git2df.git_parser import FileChange, GitLogEntry
 
 from dulwich.repo import Repo
-from dulwich.objects import Commit
+from dulwich.diff_tree import tree_changes
+from dulwich.object_store import DiskObjectStore, tree_lookup_path
+from dulwich.errors import NotTreeError
+from dulwich.objects import Commit, Tree, hex_to_sha
 from tqdm import tqdm
 
 from .commit_filters import DulwichCommitFilters
 from .commit_formatter import DulwichCommitFormatter
 from .diff_parser import DulwichDiffParser
+from .diff_workers import DulwichDiffWorkers, TreePair
 
 logger = logging.getLogger(__name__)
 
+# A commit to parse: (commit, metadata, parent tree, whether to diff it).
+_PendingCommit = Tuple[Commit, Dict[str, Any], Optional[bytes], bool]
+
+# Commits are read from the walk and diffed this many at a time, which bounds how many
+# are held in memory; with fetch_blobs, each batch follows a single fetch of the blobs
+# it lacks.
+DIFF_BATCH_SIZE = 256
+
 
 class DulwichCommitWalker:
     """
@@ -24,10 +40,15 @@ class DulwichCommitWalker:
         commit_filters: DulwichCommitFilters,
         commit_formatter: DulwichCommitFormatter,
         remote_branch: str,
+        jobs: int = 1,
     ):
+        if jobs < 1:
+            raise ValueError(f"jobs must be at least 1, got {jobs}")
         self.commit_filters = commit_filters
         self.commit_formatter = commit_formatter
         self.remote_branch = remote_branch
+        # Diff worker processes; see DulwichDiffWorkers.
+        self.jobs = jobs
 
     def _get_commit_output_lines(
         self,
@@ -97,13 +118,97 @@ class DulwichCommitWalker:
         grep: Optional[str],
         diff_parser: DulwichDiffParser,
         pbar: tqdm,
+        commit_cache: Optional[CommitCache] = None,
+        fetch_blobs: Optional[Callable[[Set[bytes]], None]] = None,
     ) -> List[GitLogEntry]:
-        all_commits = self._collect_and_filter_commits(repo, since_dt, until_dt)
+        """The entries iter_commits yields, as a list."""
+        return list(
+            self.iter_commits(
+                repo, since_dt, until_dt, author, grep, diff_parser, pbar, commit_cache=commit_cache, fetch_blobs=fetch_blobs
+            )
+        )
+
+    def iter_commits(
+        self,
+        repo: Repo,
+        since_dt: Optional[datetime.datetime],
+        until_dt: Optional[datetime.datetime],
+        author: Optional[str],
+        grep: Optional[str],
+        diff_parser: DulwichDiffParser,
+        pbar: tqdm,
+        commit_cache: Optional[CommitCache] = None,
+        fetch_blobs: Optional[Callable[[Set[bytes]], None]] = None,
+    ) -> Iterator[GitLogEntry]:
+        """
+        Walks the branch and yields a GitLogEntry per commit that passes the filters,
+        newest first. Commits are taken from the walk, filtered and diffed a batch of
+        DIFF_BATCH_SIZE at a time, so memory depends on the batch size rather than
+        on the length of the history, and the first entries come out before the walk
+        ends.
 
-        self._initialize_progress_bar(pbar, all_commits)
+        fetch_blobs, given for partial clones, is called with the SHAs of blobs that
+        diffs need but the repository lacks, before those diffs are run.
 
+        With jobs > 1, batches are jobs times larger and their diffs are spread over
+        worker processes, the results merged back in walk order.
+        """
+        self._initialize_progress_bar(pbar)
+        changed_path_index = (
+            self._open_changed_path_index(repo, use_sidecar=commit_cache is not None)
+            if diff_parser.include_paths
+            else None
+        )
+        # Workers open the repository from disk; in-memory ones are diffed here.
+        diff_workers = (
+            DulwichDiffWorkers(repo, diff_parser, self.jobs)
+            if self.jobs > 1 and isinstance(repo.object_store, DiskObjectStore)
+            else None
+        )
+        try:
+            commits = self._iter_commits_in_range(repo, since_dt, until_dt)
+            while True:
+                batch = list(islice(commits, DIFF_BATCH_SIZE * self.jobs))
+                if not batch:
+                    break
+                yield from self._parse_commits(
+                    repo,
+                    batch,
+                    author,
+                    grep,
+                    diff_parser,
+                    pbar,
+                    commit_cache,
+                    changed_path_index,
+                    fetch_blobs,
+                    diff_workers,
+                )
+        finally:
+            if diff_workers:
+                diff_workers.close()
+            if changed_path_index:
+                changed_path_index.close()
+
+    def _parse_commits(
+        self,
+        repo: Repo,
+        commits: List[Commit],
+        author: Optional[str],
+        grep: Optional[str],
+        diff_parser: DulwichDiffParser,
+        pbar: tqdm,
+        commit_cache: Optional[CommitCache],
+        changed_path_index: Optional[ChangedPathIndex],
+        fetch_blobs: Optional[Callable[[Set[bytes]], None]],
+        diff_workers: Optional[DulwichDiffWorkers] = None,
+    ) -> List[GitLogEntry]:
+        """Parses a batch of commits, storing the newly diffed ones in commit_cache."""
+        cached_entries = commit_cache.get_many(commit.id.hex() for commit in commits) if commit_cache else {}
+        new_entries: List[GitLogEntry] = []
         parsed_entries: List[GitLogEntry] = []
-        for commit in all_commits:
+        # Cached entries, or commits to diff.
+        batch: List[Union[GitLogEntry, _PendingCommit]] = []
+        for commit in commits:
             pbar.update(1)
             commit_metadata = self.commit_formatter.extract_commit_metadata(commit)
 
@@ -113,6 +218,13 @@ class DulwichCommitWalker:
                 logger.debug(f"Commit {commit.id.hex()} filtered out by author/grep.")
                 continue
 
+            cached_entry = cached_entries.get(commit_metadata["commit_hash"])
+            if cached_entry is not None:
+                if (diff_parser.include_paths or diff_parser.exclude_paths) and not cached_entry.file_changes:
+                    continue
+                batch.append(cached_entry)
+                continue
+
             old_tree_id = None
             if commit.parents:  # Not an initial commit
                 try:
@@ -123,11 +235,28 @@ class DulwichCommitWalker:
                     # (e.g. shallow clone). We can't get file changes in this case.
                     logger.warning(f"Parent commit {commit.parents[0].hex()} not found for commit {commit.id.hex()}. Cannot determine file changes.")
 
-            file_changes_list = diff_parser.extract_file_changes(repo, commit, old_tree_id)
-            
-            if (diff_parser.include_paths or diff_parser.exclude_paths) and not file_changes_list:
-                logger.debug(f"Commit {commit.id.hex()} filtered out by path filters.")
+            needs_diff = not changed_path_index or changed_path_index.may_touch(
+                commit.id.decode("ascii"),
+                diff_parser.include_paths,
+                lambda dir_path: self._names_in_dir(repo, [commit.tree, old_tree_id], dir_path),
+            )
+            batch.append((commit, commit_metadata, old_tree_id, needs_diff))
+
+        if fetch_blobs:
+            self._fetch_missing_blobs(repo, batch, diff_parser, fetch_blobs)
+        diffed = self._diff_in_workers(batch, diff_parser, diff_workers) if diff_workers else {}
+
+        for item in batch:
+            if isinstance(item, GitLogEntry):
+                parsed_entries.append(item)
                 continue
+            commit, commit_metadata, old_tree_id, needs_diff = item
+            if not needs_diff:
+                file_changes_list = []
+            elif (old_tree_id, commit.tree) in diffed:
+                file_changes_list = list(diffed[(old_tree_id, commit.tree)])
+            else:
+                file_changes_list = diff_parser.extract_file_changes(repo, commit, old_tree_id)
 
             entry = GitLogEntry(
                 commit_hash=commit_metadata["commit_hash"],
@@ -139,48 +268,178 @@ class DulwichCommitWalker:
                 commit_message=commit_metadata["commit_message"],
                 file_changes=file_changes_list,
             )
+            new_entries.append(entry)
+
+            if (diff_parser.include_paths or diff_parser.exclude_paths) and not file_changes_list:
+                logger.debug(f"Commit {commit.id.hex()} filtered out by path filters.")
+                continue
+
             parsed_entries.append(entry)
 
-        logger.debug(f"Final parsed_entries: {parsed_entries}")
+        if commit_cache:
+            commit_cache.put_many(new_entries)
         return parsed_entries
 
-    def _collect_and_filter_commits(
+    @staticmethod
+    def _fetch_missing_blobs(
+        repo: Repo,
+        batch: List[Union[GitLogEntry, _PendingCommit]],
+        diff_parser: DulwichDiffParser,
+        fetch_blobs: Callable[[Set[bytes]], None],
+    ) -> None:
+        """Fetches the blobs the batch's diffs need that a partial clone left out, in one request."""
+        missing: Set[bytes] = set()
+        for item in batch:
+            if isinstance(item, GitLogEntry):
+                continue
+            commit, _, old_tree_id, needs_diff = item
+            if needs_diff:
+                missing |= diff_parser.missing_blobs(repo, old_tree_id, commit.tree)
+        if missing:
+            fetch_blobs(missing)
+
+    @staticmethod
+    def _diff_in_workers(
+        batch: List[Union[GitLogEntry, _PendingCommit]],
+        diff_parser: DulwichDiffParser,
+        diff_workers: DulwichDiffWorkers,
+    ) -> Dict[TreePair, List[FileChange]]:
+        """
+        Diffs each tree pair of the batch once, those the tree diff cache lacks on the
+        workers, and returns the file changes by pair.
+        """
+        diffed: Dict[TreePair, List[FileChange]] = {}
+        pending: List[TreePair] = []
+        seen: Set[TreePair] = set()
+        for item in batch:
+            if isinstance(item, GitLogEntry) or not item[3]:
+                continue
+            commit, _, old_tree_id, _ = item
+            pair = (old_tree_id, commit.tree)
+            if pair in seen:
+                diff_parser.tree_diff_cache.hits += 1
+                continue
+            seen.add(pair)
+            file_changes = diff_parser.tree_diff_cache.get(diff_parser.tree_diff_key(*pair))
+            if file_changes is None:
+                pending.append(pair)
+            else:
+                diffed[pair] = file_changes
+        for pair, file_changes in zip(pending, diff_workers.diff(pending)):
+            diff_parser.tree_diff_cache.put(diff_parser.tree_diff_key(*pair), file_changes)
+            diffed[pair] = file_changes
+        return diffed
+
+    @staticmethod
+    def _open_commit_graph(repo: Repo) -> Optional[CommitGraph]:
+        # Repositories held in memory have no commit-graph file.
+        if not isinstance(repo.object_store, DiskObjectStore):
+            return None
+        return CommitGraph.open(repo.object_store.path)
+
+    def _open_changed_path_index(self, repo: Repo, use_sidecar: bool) -> Optional[ChangedPathIndex]:
+        if not isinstance(repo.object_store, DiskObjectStore):
+            return None
+        return ChangedPathIndex.open(
+            repo.controldir(),
+            repo.object_store.path,
+            lambda commit_hash: self._list_changed_paths(repo, commit_hash),
+            use_sidecar=use_sidecar,
+        )
+
+    @staticmethod
+    def _list_changed_paths(repo: Repo, commit_hash: str) -> Optional[List[str]]:
+        """Lists the paths a commit changes relative to its first parent, without diffing contents."""
+        commit = cast(Commit, repo[commit_hash.encode("ascii")])
+        try:
+            old_tree_id = cast(Commit, repo[commit.parents[0]]).tree if commit.parents else None
+        except KeyError:
+            return None
+        changed_paths = set()
+        for change in tree_changes(repo.object_store, old_tree_id, commit.tree):
+            for entry in (change.old, change.new):
+                if entry is not None and entry.path is not None:
+                    changed_paths.add(entry.path.decode("utf-8", "surrogateescape"))
+        return list(changed_paths)
+
+    @staticmethod
+    def _names_in_dir(repo: Repo, tree_ids: List[Optional[bytes]], dir_path: str) -> List[str]:
+        names: List[str] = []
+        for tree_id in tree_ids:
+            if tree_id is None:
+                continue
+            try:
+                if dir_path:
+                    _, tree_id = tree_lookup_path(repo.__getitem__, tree_id, dir_path.encode("utf-8", "surrogateescape"))
+                tree = repo[tree_id]
+            except (KeyError, NotTreeError):
+                continue
+            if isinstance(tree, Tree):
+                names.extend(entry.path.decode("utf-8", "surrogateescape") for entry in tree.iteritems())
+        return names
+
+    def _iter_commits_in_range(
         self,
         repo: Repo,
         since_dt: Optional[datetime.datetime],
         until_dt: Optional[datetime.datetime],
-    ) -> List[Commit]:
-        all_commits = []
+    ) -> Iterator[Commit]:
+        commits_in_range = 0
         logger.debug(f"Starting commit collection for repo: {repo.path}")
         # Explicitly get the head of the remote_branch (main) and walk from there
         try:
             main_branch_sha = repo.refs[f"refs/heads/{self.remote_branch}".encode("utf-8")]
         except KeyError:
             logger.warning(f"Branch {self.remote_branch} not found in repo {repo.path}. No commits to walk.")
-            return []
+            return
 
-        for entry in repo.get_walker(include=[main_branch_sha]):
-            commit: Commit = entry.commit
-            commit_datetime = datetime.datetime.fromtimestamp(
-                commit.commit_time, tz=datetime.timezone.utc
+        commit_graph = self._open_commit_graph(repo) if since_dt else None
+        try:
+            horizon = (
+                SinceHorizon(
+                    [main_branch_sha],
+                    since_dt,
+                    commit_time_of=lambda commit_id: repo[commit_id].commit_time,
+                    raw_id=hex_to_sha,
+                    commit_graph=commit_graph,
+                )
+                if since_dt
+                else None
             )
-
-            if not self.commit_filters.filter_commits_by_date(
-                commit_datetime, since_dt, until_dt
-            ):
-                logger.debug(
-                    f"Commit {commit.id.hex()} (date: {commit_datetime}) filtered out by date."
+            for entry in repo.get_walker(include=[main_branch_sha]):
+                commit: Commit = entry.commit
+                commit_datetime = datetime.datetime.fromtimestamp(
+                    commit.commit_time, tz=datetime.timezone.utc
                 )
-                continue
 
-            all_commits.append(commit)
+                if self.commit_filters.filter_commits_by_date(
+                    commit_datetime, since_dt, until_dt
+                ):
+                    commits_in_range += 1
+                    yield commit
+                else:
+                    logger.debug(
+                        f"Commit {commit.id.hex()} (date: {commit_datetime}) filtered out by date."
+                    )
+
+                if horizon:
+                    # Parents beyond the boundary of a shallow clone are not walked.
+                    horizon.visit(commit.id, repo.get_parents(commit.id, commit))
+                    if horizon.reached:
+                        logger.debug(
+                            f"Stopping the walk at {commit.id.hex()}: no older commit can be since {since_dt}."
+                        )
+                        break
+        finally:
+            if commit_graph:
+                commit_graph.close()
         logger.debug(
-            f"Finished commit collection. Found {len(all_commits)} commits after date filtering."
+            f"Finished commit collection. Found {commits_in_range} commits after date filtering."
         )
-        return all_commits
 
-    def _initialize_progress_bar(self, pbar: tqdm, all_commits: List[Commit]) -> None:
-        """Initializes and updates the progress bar for commit processing."""
+    def _initialize_progress_bar(self, pbar: tqdm) -> None:
+        """Switches the progress bar to counting parsed commits, whose number is not known up front."""
         if not pbar.disable:
-            pbar.total += len(all_commits)  # Add the number of commits to the total
+            pbar.reset(total=None)
+            pbar.unit = "commit"
         pbar.set_description("Parsing git log")  # Update description for parsing phase
@@ -1,15 +1,132 @@
-import io
 import logging
-from typing import List, Optional
+from collections import Counter, OrderedDict
+from difflib import SequenceMatcher
+from typing import List, NamedTuple, Optional, Sequence, Set, Union
 import dulwich.diff_tree
-from dulwich.diff_tree import TreeChange
+from dulwich.diff_tree import CHANGE_ADD, CHANGE_COPY, CHANGE_DELETE, CHANGE_MODIFY, RenameDetector, TreeChange
 import dulwich.patch
-from dulwich.objects import Commit
+from dulwich.objects import S_ISGITLINK, Commit, TreeEntry
 from dulwich.repo import Repo
 from ..git_parser import FileChange
+from ..rename_detection import RENAME_DETECTION_OFF, RenameDetection, count_exact_renames, resolve_rename_detection
+from ..tree_diff_cache import TreeDiffCache, TreeDiffKey
 
 logger = logging.getLogger(__name__)
 
+# Line counts are a single int per blob, so many can be kept.
+DEFAULT_BLOB_LINE_COUNT_CACHE_SIZE = 100_000
+
+
+def count_blob_lines(data: bytes) -> int:
+    """
+    Counts the lines of an added or deleted file as 'git diff --numstat' does: a last
+    line without a newline counts, and binary content (a NUL byte in the first 8000
+    bytes, git's heuristic) has no lines.
+    """
+    if dulwich.patch.is_binary(data):
+        return 0
+    lines = data.count(b"\n")
+    if data and not data.endswith(b"\n"):
+        lines += 1
+    return lines
+
+
+# Past this many lines left to align once the common head and tail are set aside,
+# changed lines are counted without aligning them; see count_line_changes.
+MAX_ALIGNED_LINES = 20_000
+
+
+def count_line_changes(
+    old_lines: Sequence[bytes], new_lines: Sequence[bytes], max_aligned_lines: int = MAX_ALIGNED_LINES
+) -> tuple[int, int]:
+    """
+    Counts the (added, deleted) lines a unified diff of two versions of a file would
+    show, without rendering one. The lines both versions start and end with are set
+    aside and difflib's SequenceMatcher, the matcher dulwich.patch uses, aligns the
+    rest. Alignment can take quadratic time, so beyond max_aligned_lines lines the
+    two sides are compared as multisets of lines instead: exact for edits in place,
+    but moved lines then count as unchanged.
+    """
+    start = 0
+    old_end, new_end = len(old_lines), len(new_lines)
+    while start < old_end and start < new_end and old_lines[start] == new_lines[start]:
+        start += 1
+    while old_end > start and new_end > start and old_lines[old_end - 1] == new_lines[new_end - 1]:
+        old_end -= 1
+        new_end -= 1
+    old_lines, new_lines = old_lines[start:old_end], new_lines[start:new_end]
+    if not old_lines or not new_lines:
+        return len(new_lines), len(old_lines)
+
+    if len(old_lines) + len(new_lines) > max_aligned_lines:
+        logger.debug(f"Counting {len(old_lines)} old and {len(new_lines)} new changed lines without aligning them.")
+        old_counts, new_counts = Counter(old_lines), Counter(new_lines)
+        return sum((new_counts - old_counts).values()), sum((old_counts - new_counts).values())
+
+    additions = deletions = 0
+    for tag, old_start, old_stop, new_start, new_stop in SequenceMatcher(None, old_lines, new_lines).get_opcodes():
+        if tag != "equal":
+            deletions += old_stop - old_start
+            additions += new_stop - new_start
+    return additions, deletions
+
+
+class BlobLineCountCacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    max_entries: int
+    entries: int
+
+
+class BlobLineCountCache:
+    """
+    Line counts of blobs by SHA, least recently used dropped beyond max_entries (0
+    turns the cache off). A blob added or deleted on many branches, like a vendored
+    file, is read and counted once.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_BLOB_LINE_COUNT_CACHE_SIZE):
+        if max_entries < 0:
+            raise ValueError(f"max_entries must not be negative, got {max_entries}")
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._counts: "OrderedDict[bytes, int]" = OrderedDict()
+
+    def line_count(self, repo: Repo, sha: bytes) -> int:
+        """The blob's line count; 0 if it is not in the object store."""
+        count = self._counts.get(sha)
+        if count is not None:
+            self.hits += 1
+            self._counts.move_to_end(sha)
+            return count
+        self.misses += 1
+        try:
+            count = count_blob_lines(repo.get_object(sha).as_raw_string())
+        except KeyError:
+            return 0
+        if self.max_entries:
+            self._counts[sha] = count
+            if len(self._counts) > self.max_entries:
+                self._counts.popitem(last=False)
+        return count
+
+    def cache_info(self) -> BlobLineCountCacheInfo:
+        return BlobLineCountCacheInfo(self.hits, self.misses, self.max_entries, len(self._counts))
+
+
+class _RenamesOnlyDetector(RenameDetector):
+    """
+    Dulwich's RenameDetector always treats modified files as copy sources. For plain
+    rename detection (git's -M without -C) only deleted files may be paired.
+    """
+
+    def _add_change(self, change: TreeChange) -> None:
+        if change.type == CHANGE_MODIFY:
+            self._changes.append(change)
+        else:
+            super()._add_change(change)
+
 
 class DulwichDiffParser:
     """
@@ -21,9 +138,17 @@ class DulwichDiffParser:
         self,
         include_paths: Optional[List[str]] = None,
         exclude_paths: Optional[List[str]] = None,
+        rename_detection: Union[None, str, RenameDetection] = None,
+        tree_diff_cache: Optional[TreeDiffCache] = None,
+        blob_line_counts: Optional[BlobLineCountCache] = None,
     ):
         self.include_paths = include_paths
         self.exclude_paths = exclude_paths
+        # Off unless asked for, as before rename detection was configurable.
+        self.rename_detection = resolve_rename_detection(rename_detection, RENAME_DETECTION_OFF)
+        # Backends pass theirs in so it outlives a single get_log_entries call.
+        self.tree_diff_cache = tree_diff_cache if tree_diff_cache is not None else TreeDiffCache()
+        self.blob_line_counts = blob_line_counts if blob_line_counts is not None else BlobLineCountCache()
 
     def _get_path_from_change(self, change: TreeChange) -> Optional[bytes]:
         # Path is in the 'new' entry for adds and modifies, and 'old' for deletes.
@@ -52,18 +177,31 @@ class DulwichDiffParser:
             return "D"
         elif change_type == "modify":
             return "M"
+        elif change_type == "rename":
+            return "R"
+        elif change_type == "copy":
+            return "C"
         return "U"  # Unknown
 
     @staticmethod
-    def _parse_patch_for_additions_deletions(patch_content: str) -> tuple[int, int]:
-        additions = 0
-        deletions = 0
-        for line in patch_content.splitlines():
-            if line.startswith("+") and not line.startswith("+++"):
-                additions += 1
-            elif line.startswith("-") and not line.startswith("---"):
-                deletions += 1
-        return additions, deletions
+    def _get_entry_content(repo: Repo, entry: TreeEntry) -> Optional[bytes]:
+        # Like dulwich.patch, a submodule diffs as the commit it points at.
+        if entry.mode is not None and S_ISGITLINK(entry.mode):
+            return b"Subproject commit " + entry.sha + b"\n"
+        try:
+            return repo.get_object(entry.sha).as_raw_string()
+        except KeyError:
+            return None
+
+    def _count_modified_lines(self, repo: Repo, old: TreeEntry, new: TreeEntry) -> tuple[int, int]:
+        old_content = self._get_entry_content(repo, old)
+        new_content = self._get_entry_content(repo, new)
+        if old_content is None or new_content is None:
+            return 0, 0
+        # Binary files have no line counts, as in 'git diff --numstat'.
+        if dulwich.patch.is_binary(old_content) or dulwich.patch.is_binary(new_content):
+            return 0, 0
+        return count_line_changes(old_content.splitlines(True), new_content.splitlines(True))
 
     def _calculate_additions_deletions(
         self, repo: Repo, change: TreeChange
@@ -73,42 +211,104 @@ class DulwichDiffParser:
 
         if change.type == "add":
             assert change.new is not None
-            try:
-                blob = repo.get_object(change.new.sha)
-                additions = len(blob.as_pretty_string().splitlines())
-            except KeyError:
-                additions = 0
+            additions = self.blob_line_counts.line_count(repo, change.new.sha)
         elif change.type == "delete":
             assert change.old is not None
-            try:
-                blob = repo.get_object(change.old.sha)
-                deletions = len(blob.as_pretty_string().splitlines())
-            except KeyError:
-                deletions = 0
-        elif change.type == "modify":
-            if change.old and change.new:
-                patch_stream = io.BytesIO()
-                dulwich.patch.write_object_diff(
-                    patch_stream,
-                    repo.object_store,
-                    change.old,
-                    change.new,
-                )
-                patch_content = patch_stream.getvalue().decode("utf-8", errors="ignore")
-                additions, deletions = self._parse_patch_for_additions_deletions(patch_content)
+            deletions = self.blob_line_counts.line_count(repo, change.old.sha)
+        elif change.type in ("modify", "rename", "copy"):
+            # Exact renames and copies, and mode-only changes, have nothing to diff.
+            if change.old and change.new and change.old.sha != change.new.sha:
+                additions, deletions = self._count_modified_lines(repo, change.old, change.new)
         return additions, deletions
 
+    def _get_tree_changes(
+        self, repo: Repo, old_tree_id: Optional[bytes], new_tree_id: bytes
+    ) -> List[TreeChange]:
+        """
+        Returns the changes between two trees, with renames and copies paired up as
+        configured. The plain changes decide whether that is needed at all and, like
+        git's diff.renameLimit, which mode the commit can afford.
+        """
+        changes = list(dulwich.diff_tree.tree_changes(repo.object_store, old_tree_id, new_tree_id))
+        rename_detection = self.rename_detection
+        if rename_detection.mode == "off":
+            return changes
+
+        added_shas = [change.new.sha for change in changes if change.type == CHANGE_ADD]
+        deleted_shas = [change.old.sha for change in changes if change.type == CHANGE_DELETE]
+        modified = sum(1 for change in changes if change.type == CHANGE_MODIFY)
+        exact = count_exact_renames(added_shas, deleted_shas)
+        added, deleted = len(added_shas) - exact, len(deleted_shas) - exact
+        mode = rename_detection.effective_mode(added, deleted, modified)
+        if mode != rename_detection.mode:
+            logger.info(
+                f"Diff with {added} added and {deleted} deleted files left after exact renames exceeds the rename limit of "
+                f"{rename_detection.rename_limit}; using '{mode}' rename detection instead of '{rename_detection.mode}'."
+            )
+        if not added_shas or (not deleted_shas and mode != "copies"):
+            return changes
+
+        detector_class = RenameDetector if mode == "copies" else _RenamesOnlyDetector
+        detector = detector_class(
+            repo.object_store,
+            rename_threshold=rename_detection.similarity_threshold,
+            # With max_files=0 Dulwich only pairs files with identical content.
+            max_files=0 if mode == "exact" else None,
+        )
+        renamed_changes = detector.changes_with_renames(old_tree_id, new_tree_id)
+        if mode == "copies":
+            return renamed_changes
+        # Identical content added twice comes out as a copy; without copy detection
+        # the second file is an addition.
+        return [
+            TreeChange.add(change.new) if change.type == CHANGE_COPY else change
+            for change in renamed_changes
+        ]
+
+    def missing_blobs(self, repo: Repo, old_tree_id: Optional[bytes], new_tree_id: bytes) -> Set[bytes]:
+        """
+        The blobs that diffing the two trees reads and repo lacks, as a partial clone
+        does. Those are the blobs of changed files that pass the path filters and, when
+        renames are paired by similarity, of every added and deleted file (and modified
+        file, for copies) whatever its path.
+        """
+        mode = self.rename_detection.mode
+        needed: Set[bytes] = set()
+        for change in dulwich.diff_tree.tree_changes(repo.object_store, old_tree_id, new_tree_id):
+            paired_by_similarity = mode == "copies" or (mode == "renames" and change.type != CHANGE_MODIFY)
+            if not paired_by_similarity:
+                if change.type == CHANGE_MODIFY and change.old.sha == change.new.sha:
+                    continue
+                path = self._get_path_from_change(change)
+                if not path or not self._should_include_path(path.decode("utf-8")):
+                    continue
+            for entry in (change.old, change.new):
+                if entry is not None and entry.sha is not None and not S_ISGITLINK(entry.mode):
+                    needed.add(entry.sha)
+        return {sha for sha in needed if sha not in repo.object_store}
+
+    def tree_diff_key(self, old_tree_id: Optional[bytes], new_tree_id: bytes) -> TreeDiffKey:
+        return TreeDiffCache.key(
+            old_tree_id, new_tree_id, self.include_paths, self.exclude_paths, self.rename_detection.cache_key
+        )
+
     def extract_file_changes(
         self,
         repo: Repo,
         commit: Commit,
         old_tree_id: Optional[bytes],
     ) -> List[FileChange]:
+        key = self.tree_diff_key(old_tree_id, commit.tree)
+        file_changes = self.tree_diff_cache.get(key)
+        if file_changes is None:
+            file_changes = self._diff_trees(repo, old_tree_id, commit.tree)
+            self.tree_diff_cache.put(key, file_changes)
+        return file_changes
+
+    def _diff_trees(self, repo: Repo, old_tree_id: Optional[bytes], new_tree_id: bytes) -> List[FileChange]:
         file_changes = []
 
-        for change in dulwich.diff_tree.tree_changes(
-            repo.object_store, old_tree_id, commit.tree
-        ):
+        for change in self._get_tree_changes(repo, old_tree_id, new_tree_id):
             path = self._get_path_from_change(change)
             if not path:
                 continue
@@ -119,6 +319,11 @@ class DulwichDiffParser:
 
             additions, deletions = self._calculate_additions_deletions(repo, change)
             change_type_char = self._get_change_type_char(change.type)
+            old_file_path = (
+                change.old.path.decode("utf-8")
+                if change.type in ("rename", "copy") and change.old and change.old.path
+                else None
+            )
 
             file_changes.append(
                 FileChange(
@@ -126,7 +331,7 @@ class DulwichDiffParser:
                     additions=additions,
                     deletions=deletions,
                     change_type=change_type_char,
-                    old_file_path=None,
+                    old_file_path=old_file_path,
                 )
             )
 
@@ -0,0 +1,118 @@
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+from dulwich.repo import Repo
+
+from ..git_parser import FileChange
+from ..rename_detection import RenameDetection
+from ..tree_diff_cache import TreeDiffCache
+from .diff_parser import DulwichDiffParser
+
+logger = logging.getLogger(__name__)
+
+# Tree pairs diffed in this process before the pool is started. A spawned worker
+# imports git2df, pandas and pyarrow before it diffs anything, which takes about a
+# second, while Dulwich diffs a typical pair in about a millisecond; a run that
+# ends sooner is over before workers would have paid off.
+POOL_START_PAIRS = 1000
+# Below this many tree pairs per worker, shipping them out costs more than it saves.
+MIN_PAIRS_PER_JOB = 64
+# Chunks handed out per worker; more than one evens out chunks that diff slower.
+_CHUNKS_PER_JOB = 4
+
+# (old tree, new tree); the old tree is None for root commits.
+TreePair = Tuple[Optional[bytes], bytes]
+
+# A FileChange flattened for the trip back from a worker process:
+# (file_path, additions, deletions, change_type, old_file_path).
+_CompactFileChange = Tuple[str, int, int, str, Optional[str]]
+
+# Per-process state of diff workers, set up once by _init_diff_worker.
+_worker_repo: Optional[Repo] = None
+_worker_parser: Optional[DulwichDiffParser] = None
+
+
+def _init_diff_worker(
+    repo_path: str,
+    include_paths: Optional[List[str]],
+    exclude_paths: Optional[List[str]],
+    rename_detection: RenameDetection,
+) -> None:
+    global _worker_repo, _worker_parser
+    # Workers only read objects; blobs fetched later (partial clones) land in new
+    # packs, which Dulwich picks up when a lookup misses.
+    _worker_repo = Repo(repo_path)
+    # The parent process hands out each tree pair once, so workers keep no memo.
+    _worker_parser = DulwichDiffParser(
+        include_paths=include_paths,
+        exclude_paths=exclude_paths,
+        rename_detection=rename_detection,
+        tree_diff_cache=TreeDiffCache(0),
+    )
+
+
+def _diff_tree_pairs(pairs: List[TreePair]) -> List[List[_CompactFileChange]]:
+    """Computes the file changes of each tree pair in a worker process, in input order."""
+    results = []
+    for old_tree_id, new_tree_id in pairs:
+        file_changes = _worker_parser._diff_trees(_worker_repo, old_tree_id, new_tree_id)
+        results.append(
+            [(fc.file_path, fc.additions, fc.deletions, fc.change_type, fc.old_file_path) for fc in file_changes]
+        )
+    return results
+
+
+class DulwichDiffWorkers:
+    """
+    Diffs tree pairs of one on-disk repository on up to jobs worker processes, each of
+    which opens the repository itself. Dulwich is pure Python, so diffing is CPU
+    bound and a single process leaves the other cores idle. The first
+    POOL_START_PAIRS pairs are diffed in this process, so short ranges never pay for
+    starting the pool; after that, the pool is started and kept until close().
+    Batches with fewer than MIN_PAIRS_PER_JOB pairs per worker are still diffed here.
+    """
+
+    def __init__(self, repo: Repo, diff_parser: DulwichDiffParser, jobs: int):
+        if jobs < 1:
+            raise ValueError(f"jobs must be at least 1, got {jobs}")
+        self.repo = repo
+        self.diff_parser = diff_parser
+        self.jobs = jobs
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pairs_diffed_here = 0
+
+    def diff(self, pairs: Sequence[TreePair]) -> List[List[FileChange]]:
+        """The file changes of each tree pair, in order."""
+        jobs = min(self.jobs, len(pairs) // MIN_PAIRS_PER_JOB)
+        if jobs <= 1 or (self._executor is None and self._pairs_diffed_here < POOL_START_PAIRS):
+            self._pairs_diffed_here += len(pairs)
+            return [self.diff_parser._diff_trees(self.repo, old_tree_id, new_tree_id) for old_tree_id, new_tree_id in pairs]
+
+        if self._executor is None:
+            # Spawned rather than forked: the parent holds open pack files and, when
+            # fetching, sockets that workers have no business inheriting.
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.jobs,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_diff_worker,
+                initargs=(
+                    self.repo.path,
+                    self.diff_parser.include_paths,
+                    self.diff_parser.exclude_paths,
+                    self.diff_parser.rename_detection,
+                ),
+            )
+        chunk_size = max(MIN_PAIRS_PER_JOB, -(-len(pairs) // (jobs * _CHUNKS_PER_JOB)))
+        chunks = [list(pairs[i : i + chunk_size]) for i in range(0, len(pairs), chunk_size)]
+        logger.debug(f"Diffing {len(pairs)} tree pairs in {len(chunks)} chunks on {jobs} worker processes.")
+        file_changes = []
+        for results in self._executor.map(_diff_tree_pairs, chunks):
+            file_changes.extend([FileChange(*change) for change in compact_changes] for compact_changes in results)
+        return file_changes
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
@@ -0,0 +1,124 @@
+import hashlib
+import logging
+import os
+import re
+import shutil
+import time
+from typing import List, Optional, Tuple
+from urllib.parse import urlparse
+
+from dulwich.errors import NotGitRepository
+from dulwich.repo import Repo
+
+logger = logging.getLogger(__name__)
+
+# Overrides where mirrors are kept when no directory is passed in.
+MIRROR_CACHE_DIR_ENV = "GIT2DF_MIRROR_CACHE_DIR"
+
+DEFAULT_MIRROR_CACHE_MAX_BYTES = 5 * 1024**3
+
+# Touched whenever a mirror is used; its mtime orders mirrors for eviction.
+_LAST_USED_FILE = "git2df-last-used"
+
+
+def default_mirror_cache_dir() -> str:
+    """$GIT2DF_MIRROR_CACHE_DIR, else git2df/mirrors in the user's cache directory."""
+    configured = os.environ.get(MIRROR_CACHE_DIR_ENV)
+    if configured:
+        return configured
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "git2df", "mirrors")
+
+
+def _dir_size(path: str) -> int:
+    size = 0
+    for dir_path, _, file_names in os.walk(path):
+        for file_name in file_names:
+            try:
+                size += os.lstat(os.path.join(dir_path, file_name)).st_size
+            except OSError:
+                pass
+    return size
+
+
+class MirrorCache:
+    """
+    Bare mirrors of remote repositories, one per URL, kept across runs so that a run
+    only fetches the objects that are new since the last one.
+
+    Mirrors are keyed by the URL without credentials. After each run the mirrors
+    unused for longest are removed until the cache fits in max_bytes; the mirror
+    just used is kept even if it alone is larger.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = DEFAULT_MIRROR_CACHE_MAX_BYTES):
+        if max_bytes < 0:
+            raise ValueError(f"max_bytes must not be negative, got {max_bytes}")
+        self.cache_dir = cache_dir or default_mirror_cache_dir()
+        self.max_bytes = max_bytes
+
+    def mirror_path(self, url: str) -> str:
+        parsed = urlparse(url)
+        host = (parsed.hostname or "") + (f":{parsed.port}" if parsed.port else "")
+        path = parsed.path.rstrip("/")
+        key = f"{parsed.scheme.lower()}://{host}{path}"
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+        name = re.sub(r"[^A-Za-z0-9._-]+", "-", os.path.basename(path) or host).strip("-.")[:40]
+        return os.path.join(self.cache_dir, f"{name or 'repo'}-{digest}.git")
+
+    def open(self, url: str) -> Repo:
+        """Opens the mirror of url, creating an empty one on first use."""
+        path = self.mirror_path(url)
+        repo = None
+        if os.path.isdir(path):
+            try:
+                repo = Repo(path, bare=True)
+            except NotGitRepository:
+                logger.warning(f"Replacing unreadable mirror {path} of {url}")
+                shutil.rmtree(path, ignore_errors=True)
+        if repo is None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            repo = Repo.init_bare(path, mkdir=True)
+            logger.info(f"Created mirror of {url} at {path}")
+        else:
+            logger.info(f"Using mirror of {url} at {path}")
+        with open(os.path.join(path, _LAST_USED_FILE), "w"):
+            pass
+        return repo
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        """(last used, size in bytes, path) of every mirror."""
+        try:
+            names = os.listdir(self.cache_dir)
+        except FileNotFoundError:
+            return []
+        entries = []
+        for name in names:
+            path = os.path.join(self.cache_dir, name)
+            if not name.endswith(".git") or not os.path.isdir(path):
+                continue
+            try:
+                last_used = os.stat(os.path.join(path, _LAST_USED_FILE)).st_mtime
+            except OSError:
+                last_used = os.stat(path).st_mtime
+            entries.append((last_used, _dir_size(path), path))
+        return entries
+
+    def collect_garbage(self, keep: Optional[str] = None) -> List[str]:
+        """Removes the least recently used mirrors beyond max_bytes, except keep. Returns the removed paths."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        removed = []
+        for last_used, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if keep and os.path.realpath(path) == os.path.realpath(keep):
+                continue
+            logger.info(
+                f"Removing mirror {path} ({size} bytes, last used {time.ctime(last_used)}): "
+                f"the mirror cache holds {total} bytes, over its budget of {self.max_bytes}."
+            )
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            removed.append(path)
+        return removed
@@ -1,21 +1,45 @@
 import logging
 import tempfile
 import datetime
-from typing import Optional, List
+from typing import Any, Callable, Dict, Iterator, Optional, List, Set
 import sys
 import re
 from urllib.parse import urlparse
 
 from dulwich.repo import Repo
-from dulwich.client import HttpGitClient
+from dulwich.client import get_transport_and_path
+from dulwich.errors import HangupException
+from dulwich.object_store import ObjectStoreGraphWalker
 from tqdm import tqdm
 
+from ..commit_cache import CommitCache
 from ..git_parser import GitLogEntry
 from .commit_walker import DulwichCommitWalker
 from .diff_parser import DulwichDiffParser
+from .mirror_cache import MirrorCache
 
 logger = logging.getLogger(__name__)
 
+# Commit cache entries written by this backend: Dulwich tree changes, committer dates.
+# The rename detection settings are appended.
+_COMMIT_CACHE_VARIANT = "dulwich"
+
+# With since, only history committed after since minus this margin is fetched
+# ('deepen-since'). The margin keeps commits with slightly skewed clocks and, usually,
+# the parent that the oldest commit in the window is diffed against.
+DEFAULT_SHALLOW_SINCE_MARGIN = datetime.timedelta(days=7)
+# Times the margin is doubled while commits in the window still lack their parents,
+# before the whole history is fetched instead.
+_MAX_DEEPEN_ATTEMPTS = 3
+# The depth git asks for on 'fetch --unshallow'.
+_INFINITE_DEPTH = 0x7FFFFFFF
+
+# Partial clones fetch commits and trees only; blobs are fetched as diffs need them.
+PARTIAL_CLONE_FILTER = b"blob:none"
+# Set in a mirror's config once a partial fetch went into it, so that later runs,
+# partial or not, fetch the blobs it lacks.
+_PARTIAL_CLONE_CONFIG = ((b"git2df",), b"partialCloneFilter")
+
 
 class DulwichRepoHandler:
     """
@@ -29,12 +53,33 @@ class DulwichRepoHandler:
         is_local_repo: bool,
         repo: Optional[Repo],
         commit_walker: DulwichCommitWalker,
+        use_cache: bool = False,
+        mirror_cache: Optional[MirrorCache] = None,
+        shallow_since_margin: Optional[datetime.timedelta] = DEFAULT_SHALLOW_SINCE_MARGIN,
+        partial_clone: bool = False,
     ):
         self.remote_url = remote_url
         self.remote_branch = remote_branch
         self.is_local_repo = is_local_repo
         self.repo = repo
         self.commit_walker = commit_walker
+        self.use_cache = use_cache
+        self.mirror_cache = mirror_cache
+        # None fetches the whole history even when since is given.
+        self.shallow_since_margin = shallow_since_margin
+        self.partial_clone = partial_clone
+
+    def _open_commit_cache(self, repo: Repo, diff_parser: DulwichDiffParser) -> Optional[CommitCache]:
+        # Only repositories that outlive this run are worth caching for (local ones
+        # and mirrors); a fresh clone into a temporary directory is not.
+        if not self.use_cache:
+            return None
+        return CommitCache.for_git_dir(
+            repo.controldir(),
+            f"{_COMMIT_CACHE_VARIANT}-{diff_parser.rename_detection.cache_key}",
+            diff_parser.include_paths,
+            diff_parser.exclude_paths,
+        )
 
     def handle_local_repo(
         self,
@@ -69,164 +114,324 @@ class DulwichRepoHandler:
                 pbar_dummy,
             )
 
-    def handle_remote_repo(
+    def _walk_local_repo(
         self,
+        repo: Repo,
         since_dt: Optional[datetime.datetime],
         until_dt: Optional[datetime.datetime],
         author: Optional[str],
         grep: Optional[str],
         diff_parser: DulwichDiffParser,
-    ) -> List[GitLogEntry]:
-        with tempfile.TemporaryDirectory() as tmpdir:
-
-            parsed_url = urlparse(self.remote_url)
-            if parsed_url.scheme == "file":
-                local_path = parsed_url.path
-                # Directly open the bare repository
-                repo = Repo(local_path, bare=True)
-                logger.info(f"Directly opening local bare repository: {local_path}")
-                # For local bare repos, we don't need to fetch, just walk the commits
-                return self.commit_walker.walk_commits(
-                    repo,
-                    since_dt,
-                    until_dt,
-                    author,
-                    grep,
-                    diff_parser,
-                    tqdm(disable=True, file=sys.stderr), # Dummy pbar
-                )
-            elif not parsed_url.scheme: # Handle plain local paths without a scheme
-                local_path = self.remote_url
-                repo = Repo(local_path, bare=True)
-                logger.info(f"Directly opening local bare repository (no scheme): {local_path}")
-                return self.commit_walker.walk_commits(
-                    repo,
-                    since_dt,
-                    until_dt,
-                    author,
-                    grep,
-                    diff_parser,
-                    tqdm(disable=True, file=sys.stderr), # Dummy pbar
-                )
-            else:
-                # For other schemes (http, https), use HttpGitClient and fetch into a temporary non-bare repo
+    ) -> Iterator[GitLogEntry]:
+        commit_cache = self._open_commit_cache(repo, diff_parser)
+        try:
+            yield from self.commit_walker.iter_commits(
+                repo,
+                since_dt,
+                until_dt,
+                author,
+                grep,
+                diff_parser,
+                tqdm(disable=True, file=sys.stderr), # Dummy pbar
+                commit_cache=commit_cache,
+            )
+        finally:
+            if commit_cache:
+                commit_cache.close()
+
+    def iter_remote_repo(
+        self,
+        since_dt: Optional[datetime.datetime],
+        until_dt: Optional[datetime.datetime],
+        author: Optional[str],
+        grep: Optional[str],
+        diff_parser: DulwichDiffParser,
+    ) -> Iterator[GitLogEntry]:
+        """
+        Fetches the remote branch, unless it is a local path, and yields its entries as
+        they are parsed. The repository is closed, and a temporary one removed, once
+        the iterator is exhausted or closed.
+        """
+        parsed_url = urlparse(self.remote_url)
+        if parsed_url.scheme == "file":
+            local_path = parsed_url.path
+            # Directly open the bare repository
+            repo = Repo(local_path, bare=True)
+            logger.info(f"Directly opening local bare repository: {local_path}")
+            # For local bare repos, we don't need to fetch, just walk the commits
+            yield from self._walk_local_repo(repo, since_dt, until_dt, author, grep, diff_parser)
+            return
+        elif not parsed_url.scheme: # Handle plain local paths without a scheme
+            local_path = self.remote_url
+            repo = Repo(local_path, bare=True)
+            logger.info(f"Directly opening local bare repository (no scheme): {local_path}")
+            yield from self._walk_local_repo(repo, since_dt, until_dt, author, grep, diff_parser)
+            return
+
+        if self.mirror_cache is None:
+            # Without a mirror cache, fetch into a temporary repository dropped afterwards.
+            with tempfile.TemporaryDirectory() as tmpdir:
                 repo = Repo.init(tmpdir)
-                client = HttpGitClient(self.remote_url)
-
-            _disable_tqdm = (
-                not sys.stdout.isatty() or not sys.stderr.isatty()
-            ) or logger.level > logging.INFO
-
-            # Create a single tqdm instance for overall progress
-            with tqdm(
-                total=0,  # Will be updated dynamically
-                unit="obj",
-                desc=f"Fetching {self.remote_branch} from {self.remote_url}",
-                disable=_disable_tqdm,
-                mininterval=0.5,
-                leave=True,  # Keep the final bar visible
-                dynamic_ncols=True,
-                file=sys.stderr,
-            ) as pbar:
-
-                def determine_wants_func(
-                    refs: dict[bytes, bytes], depth: Optional[int] = None
-                ) -> list[bytes]:
-                    head_sha = refs.get(b"HEAD")
-                    if head_sha:
-                        return [head_sha]
-                    try:
-                        return [
-                            refs[f"refs/heads/{self.remote_branch}".encode("utf-8")]
-                        ]
-                    except KeyError:
-                        logger.error(
-                            f"Branch '{self.remote_branch}' not found in remote refs."
-                        )
-                        raise
+                try:
+                    yield from self._fetch_and_walk(repo, since_dt, until_dt, author, grep, diff_parser, commit_cache=None)
+                finally:
+                    repo.close()
+            return
 
-                def dulwich_progress_callback(progress_bytes: bytes) -> None:
-                    message = progress_bytes.decode("utf-8", errors="ignore").strip()
-                    if not message:
-                        return
+        repo = self.mirror_cache.open(self.remote_url)
+        try:
+            commit_cache = self._open_commit_cache(repo, diff_parser)
+            try:
+                yield from self._fetch_and_walk(repo, since_dt, until_dt, author, grep, diff_parser, commit_cache)
+            finally:
+                if commit_cache:
+                    commit_cache.close()
+        finally:
+            repo.close()
+            self.mirror_cache.collect_garbage(keep=repo.controldir())
 
-                    try:
-                        # Regex to capture progress for "Receiving objects", "Compressing objects", "Counting objects"
-                        match_progress = re.match(
-                            r".*\s+(\d+)%\s+\((\d+)/(\d+)\)", message
+    def _fetch_and_walk(
+        self,
+        repo: Repo,
+        since_dt: Optional[datetime.datetime],
+        until_dt: Optional[datetime.datetime],
+        author: Optional[str],
+        grep: Optional[str],
+        diff_parser: DulwichDiffParser,
+        commit_cache: Optional[CommitCache],
+    ) -> Iterator[GitLogEntry]:
+        """Fetches the branch into repo, which may hold an earlier fetch, and walks it."""
+        client, path = get_transport_and_path(self.remote_url)
+        branch_ref = f"refs/heads/{self.remote_branch}".encode("utf-8")
+
+        _disable_tqdm = (
+            not sys.stdout.isatty() or not sys.stderr.isatty()
+        ) or logger.level > logging.INFO
+
+        # Create a single tqdm instance for overall progress
+        with tqdm(
+            total=0,  # Will be updated dynamically
+            unit="obj",
+            desc=f"Fetching {self.remote_branch} from {self.remote_url}",
+            disable=_disable_tqdm,
+            mininterval=0.5,
+            leave=True,  # Keep the final bar visible
+            dynamic_ncols=True,
+            file=sys.stderr,
+        ) as pbar:
+            # Set while a fetch deepens the history, which needs the tip asked for
+            # even if the repository has it already.
+            deepening = False
+
+            def determine_wants_func(
+                refs: dict[bytes, bytes], depth: Optional[int] = None
+            ) -> list[bytes]:
+                branch_sha = refs.get(branch_ref)
+                if branch_sha is None:
+                    logger.error(
+                        f"Branch '{self.remote_branch}' not found in remote refs."
+                    )
+                    return []
+                # The client offers what the repository already has as haves, so
+                # a mirror only receives the objects it lacks. If it has the tip
+                # already, nothing is fetched at all.
+                if branch_sha in repo.object_store and not deepening:
+                    logger.info(f"Branch '{self.remote_branch}' is up to date at {branch_sha.decode('ascii')}.")
+                    return []
+                return [branch_sha]
+
+            def dulwich_progress_callback(progress_bytes: bytes) -> None:
+                message = progress_bytes.decode("utf-8", errors="ignore").strip()
+                if not message:
+                    return
+
+                try:
+                    # Regex to capture progress for "Receiving objects", "Compressing objects", "Counting objects"
+                    match_progress = re.match(
+                        r".*\s+(\d+)%\s+\((\d+)/(\d+)\)", message
+                    )
+                    if match_progress:
+                        current, total = int(match_progress.group(2)), int(
+                            match_progress.group(3)
                         )
-                        if match_progress:
-                            current, total = int(match_progress.group(2)), int(
-                                match_progress.group(3)
-                            )
-                            if pbar.total == 0:
-                                pbar.total = total
-                            pbar.n = current
-                            pbar.set_description(
-                                f"Fetching {self.remote_branch} from {self.remote_url}: {message}"
-                            )
-                            pbar.refresh()
-                            return
-
-                        # Regex to capture total objects from "Total" message
-                        match_total = re.match(r"Total (\d+)", message)
-                        if match_total:
-                            total_objects = int(match_total.group(1))
-                            if pbar.total == 0:
-                                pbar.total = total_objects
-                            pbar.set_description(
-                                f"Fetching {self.remote_branch} from {self.remote_url}: {message}"
-                            )
-                            pbar.refresh()
-                            return
-                    except (ValueError, IndexError) as e:
-                        logger.debug(
-                            f"Could not parse progress message: '{message}'. Error: {e}"
+                        if pbar.total == 0:
+                            pbar.total = total
+                        pbar.n = current
+                        pbar.set_description(
+                            f"Fetching {self.remote_branch} from {self.remote_url}: {message}"
                         )
+                        pbar.refresh()
+                        return
 
-                    # Fallback for other messages, just update description
-                    pbar.set_description(
-                        f"Fetching {self.remote_branch} from {self.remote_url}: {message}"
+                    # Regex to capture total objects from "Total" message
+                    match_total = re.match(r"Total (\d+)", message)
+                    if match_total:
+                        total_objects = int(match_total.group(1))
+                        if pbar.total == 0:
+                            pbar.total = total_objects
+                        pbar.set_description(
+                            f"Fetching {self.remote_branch} from {self.remote_url}: {message}"
+                        )
+                        pbar.refresh()
+                        return
+                except (ValueError, IndexError) as e:
+                    logger.debug(
+                        f"Could not parse progress message: '{message}'. Error: {e}"
                     )
-                    pbar.refresh()
 
-                _dulwich_progress_callback = None
-                if not _disable_tqdm:
-                    _dulwich_progress_callback = dulwich_progress_callback
+                # Fallback for other messages, just update description
+                pbar.set_description(
+                    f"Fetching {self.remote_branch} from {self.remote_url}: {message}"
+                )
+                pbar.refresh()
 
+            _dulwich_progress_callback = None
+            if not _disable_tqdm:
+                _dulwich_progress_callback = dulwich_progress_callback
+
+            def fetch(deepen: bool = False, **fetch_args: Any) -> Dict[bytes, bytes]:
+                nonlocal deepening
+                deepening = deepen
+                if self.partial_clone:
+                    fetch_args["filter_spec"] = PARTIAL_CLONE_FILTER
                 logger.info(
-                    f"Fetching entire history of branch '{self.remote_branch}' from {self.remote_url}..."
+                    f"Fetching history of branch '{self.remote_branch}' from {self.remote_url} ({fetch_args or 'full'})..."
                 )
-                fetch_result = client.fetch(
-                    self.remote_url,
+                return client.fetch(
+                    path,
                     repo,
                     determine_wants=determine_wants_func,
                     progress=_dulwich_progress_callback,
-                )
-                remote_refs = fetch_result.refs
+                    **fetch_args,
+                ).refs
 
-                branch_ref = f"refs/heads/{self.remote_branch}".encode("utf-8")
-                if branch_ref not in remote_refs:
-                    raise ValueError(
-                        f"Branch '{self.remote_branch}' not found in remote repository."
-                    )
+            shallow_at_open = repo.get_shallow()
+            remote_refs = self._fetch_history(repo, since_dt, fetch)
+            if self.partial_clone:
+                self._mark_partial_clone(repo)
 
-                head_sha = remote_refs[branch_ref]
-                assert head_sha is not None  # Ensure head_sha is not None
-                repo.refs[f"refs/heads/{self.remote_branch}".encode("utf-8")] = (
-                    head_sha  # Set the branch ref
+            if branch_ref not in remote_refs:
+                raise ValueError(
+                    f"Branch '{self.remote_branch}' not found in remote repository."
                 )
-                repo.refs.set_symbolic_ref(
-                    b"HEAD", f"refs/heads/{self.remote_branch}".encode("utf-8")
-                )  # Set HEAD to the branch
 
-                # Pass the overall pbar to _walk_commits
-                return self.commit_walker.walk_commits(
-                    repo,
+            head_sha = remote_refs[branch_ref]
+            assert head_sha is not None  # Ensure head_sha is not None
+            repo.refs[branch_ref] = head_sha  # Set the branch ref
+            repo.refs.set_symbolic_ref(b"HEAD", branch_ref)  # Set HEAD to the branch
+
+            walk_repo = repo
+            if shallow_at_open - repo.get_shallow():
+                # Repo reads the shallow file once, when it is opened, and keeps treating
+                # the commits listed then as parentless. Walk a freshly opened instance
+                # so that commits the fetch made whole get their parents back.
+                walk_repo = Repo(repo.path)
+            try:
+                # Pass the overall pbar to iter_commits
+                yield from self.commit_walker.iter_commits(
+                    walk_repo,
                     since_dt,
                     until_dt,
                     author,
                     grep,
                     diff_parser,
                     pbar,
+                    commit_cache=commit_cache,
+                    fetch_blobs=(
+                        (lambda blob_ids: self._fetch_blobs(client, path, walk_repo, blob_ids))
+                        if self._is_partial_clone(walk_repo)
+                        else None
+                    ),
                 )
+            finally:
+                if walk_repo is not repo:
+                    walk_repo.close()
+
+    @staticmethod
+    def _mark_partial_clone(repo: Repo) -> None:
+        section, name = _PARTIAL_CLONE_CONFIG
+        config = repo.get_config()
+        config.set(section, name, PARTIAL_CLONE_FILTER)
+        config.write_to_path()
+
+    @staticmethod
+    def _is_partial_clone(repo: Repo) -> bool:
+        section, name = _PARTIAL_CLONE_CONFIG
+        try:
+            return bool(repo.get_config().get(section, name))
+        except KeyError:
+            return False
+
+    def _fetch_blobs(self, client: Any, path: str, repo: Repo, blob_ids: Set[bytes]) -> None:
+        """Fetches the given blobs, which a partial fetch left out, in a single request."""
+        logger.info(f"Fetching {len(blob_ids)} blobs from {self.remote_url}...")
+        with tempfile.SpooledTemporaryFile(max_size=16 * 1024**2, dir=repo.object_store.path) as pack:
+            # Offering no haves: the server leaves out whatever the haves reach, and the
+            # commits the repository has reach these blobs.
+            client.fetch_pack(
+                path,
+                lambda refs, depth=None: sorted(blob_ids),
+                ObjectStoreGraphWalker([], lambda sha: []),
+                pack.write,
+            )
+            if pack.tell():
+                pack.seek(0)
+                repo.object_store.add_thin_pack(pack.read, None)
+
+    @staticmethod
+    def _commits_missing_parents(repo: Repo, since_dt: datetime.datetime) -> List[bytes]:
+        """Commits at or after since_dt on the shallow boundary, whose parents were not fetched."""
+        since = since_dt.timestamp()
+        missing = []
+        for commit_id in repo.get_shallow():
+            try:
+                commit_time = repo[commit_id].commit_time
+            except KeyError:
+                continue
+            if commit_time >= since:
+                missing.append(commit_id)
+        return missing
+
+    def _fetch_history(
+        self,
+        repo: Repo,
+        since_dt: Optional[datetime.datetime],
+        fetch: Callable[..., Dict[bytes, bytes]],
+    ) -> Dict[bytes, bytes]:
+        """
+        Fetches the history iter_commits needs into repo and returns the remote refs.
+        With since_dt, and a shallow_since_margin set, that is the commits since then
+        and the parents of the oldest of them, so a short window of a long history
+        costs a short transfer. A repository left shallow by an earlier run is
+        deepened, or made complete, as far as this run needs.
+        """
+        shallow = repo.get_shallow()
+        if since_dt is None or self.shallow_since_margin is None:
+            if shallow:
+                return fetch(deepen=True, depth=_INFINITE_DEPTH)
+            return fetch()
+        has_history = bool(repo.refs.as_dict(b"refs/heads/"))
+        if has_history and (not shallow or not self._commits_missing_parents(repo, since_dt)):
+            # The window is there already, bar commits newer than the last fetch.
+            return fetch()
+
+        margin = self.shallow_since_margin
+        for _ in range(_MAX_DEEPEN_ATTEMPTS):
+            cutoff = since_dt - margin
+            try:
+                remote_refs = fetch(deepen=has_history, shallow_since=str(int(cutoff.timestamp())))
+            except HangupException:
+                # git refuses deepen-since when no commit is that recent; then
+                # nothing is in the window and the tip is all that is needed.
+                logger.info(f"No commits since {cutoff} on the remote; fetching the tip only.")
+                return fetch(depth=1) if not has_history else fetch()
+            has_history = True
+            missing_parents = self._commits_missing_parents(repo, since_dt)
+            if not missing_parents:
+                return remote_refs
+            margin *= 2
+            logger.info(
+                f"{len(missing_parents)} commits since {since_dt} lack their parents; deepening to {since_dt - margin}."
+            )
+        logger.info("Fetching the whole history.")
+        return fetch(deepen=True, depth=_INFINITE_DEPTH)
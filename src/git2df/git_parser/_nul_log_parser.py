@@ -0,0 +1,151 @@
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from ._commit_metadata_parser import GitLogEntry
+from ._file_stat_parser import FileChange
+
+logger = logging.getLogger(__name__)
+
+# Every header field is NUL-terminated, so none of them (paths, names, subjects) needs
+# escaping or marker scanning. Used together with 'git log -z --raw --numstat'.
+_NUL_PRETTY_FORMAT = "--pretty=format:%H%x00%P%x00%an%x00%ae%x00%ad%x00%at%x00%s%x00"
+_HEADER_FIELD_COUNT = 7
+
+
+def _iter_nul_fields(stream: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Splits incrementally read bytes on NUL and yields every complete field. A field
+    that straddles two reads is kept back until its terminator arrives.
+    """
+    pending = b""
+    for data in stream:
+        fields = (pending + data).split(b"\0")
+        pending = fields.pop()
+        yield from fields
+    if pending:
+        yield pending
+
+
+def _next_field(fields: Iterator[bytes], what: str) -> bytes:
+    field = next(fields, None)
+    if field is None:
+        raise ValueError(f"Truncated git log -z output: expected {what}.")
+    return field
+
+
+def _decode(value: bytes) -> str:
+    return value.decode("utf-8", errors="replace")
+
+
+def _parse_count(value: bytes, field: bytes) -> int:
+    # Binary files are reported as '-' by --numstat.
+    if value == b"-":
+        return 0
+    if not value.isdigit():
+        raise ValueError(f"Malformed numstat entry in git log -z output: {field!r}")
+    return int(value)
+
+
+def _read_file_changes(
+    fields: Iterator[bytes],
+) -> Tuple[Dict[bytes, bytes], Dict[bytes, Tuple[int, int]], Dict[bytes, bytes]]:
+    """
+    Consumes the --raw and --numstat records of one commit, up to the empty field that
+    separates it from the next commit (or the end of the output).
+    """
+    change_types: Dict[bytes, bytes] = {}
+    line_stats: Dict[bytes, Tuple[int, int]] = {}
+    old_paths: Dict[bytes, bytes] = {}
+
+    field = next(fields, b"")
+    # git separates the header from the diff records with a newline.
+    field = field.lstrip(b"\n")
+    while field:
+        if field.startswith(b":"):
+            # ':<old mode> <new mode> <old sha> <new sha> <status>' followed by the path(s)
+            status = field.rsplit(b" ", 1)[-1]
+            if not status or status == field:
+                raise ValueError(f"Malformed raw entry in git log -z output: {field!r}")
+            file_path = _next_field(fields, "a path after a raw entry")
+            if status[:1] in b"RC":
+                old_file_path = file_path
+                file_path = _next_field(fields, "a rename target")
+                old_paths[file_path] = old_file_path
+            # Keep the letter only: 'R095' and 'C075' carry git's similarity score,
+            # which the other backends do not report.
+            change_types[file_path] = status[:1]
+        else:
+            # '<added>\t<deleted>\t<path>', or '<added>\t<deleted>\t' followed by the
+            # old and new paths for renames and copies.
+            parts = field.split(b"\t", 2)
+            if len(parts) != 3:
+                raise ValueError(f"Malformed numstat entry in git log -z output: {field!r}")
+            file_path = parts[2]
+            if not file_path:
+                _next_field(fields, "a rename source")
+                file_path = _next_field(fields, "a rename target")
+            line_stats[file_path] = (_parse_count(parts[0], field), _parse_count(parts[1], field))
+        field = next(fields, b"")
+    return change_types, line_stats, old_paths
+
+
+def _build_log_entry(
+    header: List[bytes],
+    change_types: Dict[bytes, bytes],
+    line_stats: Dict[bytes, Tuple[int, int]],
+    old_paths: Dict[bytes, bytes],
+) -> GitLogEntry:
+    commit_hash, parents, author_name, author_email, commit_date, commit_timestamp, subject = header
+    if not commit_timestamp.isdigit():
+        raise ValueError(f"Malformed commit timestamp in git log -z output: {commit_timestamp!r}")
+    try:
+        parsed_date = datetime.fromisoformat(_decode(commit_date).replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError(f"Malformed commit date in git log -z output: {commit_date!r}") from None
+
+    file_changes = []
+    # Both record kinds list the same paths in the same order; keep the union just in case.
+    for file_path in dict.fromkeys([*change_types, *line_stats]):
+        additions, deletions = line_stats.get(file_path, (0, 0))
+        old_file_path = old_paths.get(file_path)
+        file_changes.append(
+            FileChange(
+                file_path=_decode(file_path),
+                additions=additions,
+                deletions=deletions,
+                change_type=_decode(change_types.get(file_path, b"U")),
+                old_file_path=_decode(old_file_path) if old_file_path is not None else None,
+            )
+        )
+
+    return GitLogEntry(
+        commit_hash=_decode(commit_hash),
+        parent_hashes=_decode(parents).split(),
+        author_name=_decode(author_name),
+        author_email=_decode(author_email),
+        commit_date=parsed_date,
+        commit_timestamp=int(commit_timestamp),
+        commit_message=_decode(subject).strip(),
+        file_changes=file_changes,
+    )
+
+
+def _iter_nul_log_entries(stream: Iterable[bytes]) -> Iterator[GitLogEntry]:
+    """
+    Parses the byte output of 'git log -z --raw --numstat' formatted with
+    _NUL_PRETTY_FORMAT, yielding one GitLogEntry per commit as soon as it is complete.
+
+    Unlike the marker-based text parser, paths are taken verbatim (no core.quotePath
+    escaping), nothing is decoded until a commit is complete, and malformed input
+    raises ValueError instead of being skipped.
+    """
+    fields = _iter_nul_fields(stream)
+    for commit_hash in fields:
+        if not commit_hash:
+            continue
+        header = [commit_hash]
+        for _ in range(_HEADER_FIELD_COUNT - 1):
+            header.append(_next_field(fields, "a commit header field"))
+        change_types, line_stats, old_paths = _read_file_changes(fields)
+        yield _build_log_entry(header, change_types, line_stats, old_paths)
@@ -1,20 +1,138 @@
+import fnmatch
+import heapq
 import pygit2
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
 import logging
 
 from git2df.backend_interface import GitBackend
 from git2df.git_parser import GitLogEntry, FileChange
+from .changed_paths import ChangedPathIndex
+from .commit_cache import CommitCache
+from .commit_graph import CommitGraph, SinceHorizon
 from .date_utils import get_date_filters
+from .rename_detection import RenameDetection, count_exact_renames, resolve_rename_detection
+from .repo_metadata import BIG_FILE_THRESHOLD, USER_IDENTITY, repo_metadata_cache
+from .tree_diff_cache import DEFAULT_TREE_DIFF_CACHE_SIZE, TreeDiffCache
 
 logger = logging.getLogger(__name__)
 
+# Commit cache entries written by this backend: libgit2 diffs, committer dates. The
+# diff mode (it decides how large files are counted) and the rename detection
+# settings are appended.
+_COMMIT_CACHE_VARIANT = "pygit2"
+
+# This backend has always detected copies as well as renames.
+_DEFAULT_RENAME_DETECTION = RenameDetection("copies")
+
+_FIND_SIMILAR_FLAGS = {
+    "exact": pygit2.enums.DiffFind.FIND_RENAMES | pygit2.enums.DiffFind.FIND_EXACT_MATCH_ONLY,
+    "renames": pygit2.enums.DiffFind.FIND_RENAMES,
+    "copies": pygit2.enums.DiffFind.FIND_RENAMES | pygit2.enums.DiffFind.FIND_COPIES,
+}
+# The mode is picked before find_similar runs, so libgit2's own limit (which would
+# stop even exact renames, and replaces 0 with 1000) is lifted.
+_NO_LIBGIT2_RENAME_LIMIT = 2**31 - 1
+
+# How per-file line counts are computed. "stats" only reads libgit2's line counters,
+# diffs without context lines and skips binary and oversized blobs; "patch" builds
+# full patches, context included, for every file regardless of size.
+DIFF_MODES = ("stats", "patch")
+
+# What get_log_entries walks from unless told otherwise.
+DEFAULT_REFS = ("HEAD",)
+# Ref selectors standing for several refs, as in 'git rev-list': every ref plus HEAD,
+# and every local branch.
+_REF_SELECTORS = {"--all": "refs/*", "--branches": "refs/heads/*"}
+_GLOB_CHARS = frozenset("*?[")
+# Where a pattern not starting with "refs/" is looked for, in git's order for ref names.
+_REF_NAMESPACES = ("refs/", "refs/tags/", "refs/heads/", "refs/remotes/")
+
+# git's default core.bigFileThreshold.
+_DEFAULT_BIG_FILE_THRESHOLD = 512 * 1024 * 1024
+
+# DiffFile flags as plain ints. The same bits are on DiffDelta.flags, but reading
+# that (or delta.is_binary) builds an enum and costs more than diffing small files.
+_BINARY_FLAG = int(pygit2.enums.DiffFlag.BINARY)
+_EXISTS_FLAG = int(pygit2.enums.DiffFlag.EXISTS)
+_VALID_SIZE_FLAG = int(pygit2.enums.DiffFlag.VALID_SIZE)
+
+# Below this many commits per worker, starting worker processes costs more than it saves.
+_MIN_COMMITS_PER_JOB = 64
+# Chunks handed out per worker; more than one evens out chunks that diff slower.
+_CHUNKS_PER_JOB = 4
+
+# A FileChange flattened for the trip back from a worker process:
+# (file_path, additions, deletions, change_type, old_file_path).
+_CompactFileChange = Tuple[str, int, int, str, Optional[str]]
+
+# Per-process state of diff workers, set up once by _init_diff_worker.
+_worker_backend: Optional["Pygit2Backend"] = None
+_worker_repo: Optional[pygit2.Repository] = None
+
+
+def _init_diff_worker(repo_path: str, diff_mode: str, rename_detection: RenameDetection) -> None:
+    global _worker_backend, _worker_repo
+    # The parent process hands out each tree pair once, so workers keep no memo.
+    _worker_backend = Pygit2Backend(
+        repo_path, diff_mode=diff_mode, rename_detection=rename_detection, tree_diff_cache_size=0
+    )
+    _worker_repo = pygit2.Repository(repo_path)
+
+
+def _diff_commit_chunk(
+    commit_hashes: List[str],
+    include_paths: Optional[List[str]],
+    exclude_paths: Optional[List[str]],
+) -> List[List[_CompactFileChange]]:
+    """Computes the file changes of each commit in a worker process, in input order."""
+    results = []
+    for commit_hash in commit_hashes:
+        commit = _worker_repo.get(commit_hash)
+        file_changes = _worker_backend._process_commit_file_changes(_worker_repo, commit, include_paths, exclude_paths)
+        results.append(
+            [(fc.file_path, fc.additions, fc.deletions, fc.change_type, fc.old_file_path) for fc in file_changes]
+        )
+    return results
+
 
 class Pygit2Backend(GitBackend):
     """A backend for git2df that interacts with Git repositories using pygit2."""
 
-    def __init__(self, repo_path: str = "."):
+    def __init__(
+        self,
+        repo_path: str = ".",
+        use_cache: bool = False,
+        jobs: int = 1,
+        diff_mode: str = "stats",
+        rename_detection: Union[None, str, RenameDetection] = None,
+        refs: Union[None, str, Sequence[str]] = None,
+        tree_diff_cache_size: int = DEFAULT_TREE_DIFF_CACHE_SIZE,
+    ):
+        """
+        refs are what the history is walked from: "HEAD", ref names ("main",
+        "refs/tags/v1.0"), glob patterns over ref names ("release/*" matches branches,
+        tags and remote branches, like a short ref name does), "--branches" for every
+        local branch and "--all" for every ref and HEAD, which matches what the CLI
+        backend walks. Defaults to HEAD only.
+
+        tree_diff_cache_size bounds the tree pairs whose file changes are kept across
+        commits and calls (see TreeDiffCache); 0 turns that off.
+        """
+        if jobs < 1:
+            raise ValueError(f"jobs must be at least 1, got {jobs}")
+        if diff_mode not in DIFF_MODES:
+            raise ValueError(f"Invalid diff_mode '{diff_mode}'. Must be one of {DIFF_MODES}")
         self.repo_path = repo_path
+        self.use_cache = use_cache
+        self.jobs = jobs
+        self.diff_mode = diff_mode
+        self.rename_detection = resolve_rename_detection(rename_detection, _DEFAULT_RENAME_DETECTION)
+        self.refs = [refs] if isinstance(refs, str) else list(refs or DEFAULT_REFS)
+        self.tree_diff_cache = TreeDiffCache(tree_diff_cache_size)
 
     def _is_merged_only_match(self, commit, merged_only: bool) -> bool:
         if merged_only and len(commit.parent_ids) <= 1:
@@ -49,19 +167,26 @@ class Pygit2Backend(GitBackend):
             return author
 
         try:
-            user_name = repo.config['user.name']
-            user_email = repo.config['user.email']
-            if user_name or user_email:
-                return f"{user_name}|{user_email}"
-            else:
-                logger.warning("'--me' was used, but Git user.name and user.email are not configured in the repository.")
-        except KeyError:
-            logger.warning("'--me' was used, but Git user.name or user.email are not configured in the repository.")
+            user_name, user_email = repo_metadata_cache.get(
+                self.repo_path, USER_IDENTITY, lambda: self._read_user_identity(repo)
+            )
         except Exception as e:
             logger.error(f"Error retrieving current Git user config for '--me': {e}")
             raise
+        if user_name and user_email:
+            return f"{user_name}|{user_email}"
+        if user_name or user_email:
+            logger.warning("'--me' was used, but Git user.name or user.email are not configured in the repository.")
+        else:
+            logger.warning("'--me' was used, but Git user.name and user.email are not configured in the repository.")
         return author
 
+    def _read_user_identity(self, repo: pygit2.Repository) -> Tuple[Optional[str], Optional[str]]:
+        config = repo.config
+        user_name = config['user.name'] if 'user.name' in config else None
+        user_email = config['user.email'] if 'user.email' in config else None
+        return user_name, user_email
+
     def _commit_matches_filters(self, commit, since_dt, until_dt, author, grep, merged_only, repo, include_paths, exclude_paths):
         commit_time = datetime.fromtimestamp(commit.committer.time, tz=timezone.utc) # Use committer time
         logger.debug(f"Commit hash: {commit.id}, Commit time: {commit_time}, Since date: {since_dt}, Until date: {until_dt}, Merged only: {merged_only}")
@@ -69,7 +194,7 @@ class Pygit2Backend(GitBackend):
         if not self._is_merged_only_match(commit, merged_only):
             return False, False
         if not self._is_since_dt_match(commit, commit_time, since_dt):
-            return False, True # False for match, True to break walk
+            return False, True # False for match, True: older than since_dt
         if not self._is_until_dt_match(commit, commit_time, until_dt):
             return False, False # False for match, False to continue walk
         if not self._is_author_match(commit, author):
@@ -99,52 +224,247 @@ class Pygit2Backend(GitBackend):
         return False
 
     def _get_change_stats(self, patch, commit_parents):
-        additions = patch.line_stats[1]
-        deletions = patch.line_stats[2]
-        current_change_type = patch.delta.status_char()
+        _, additions, deletions = patch.line_stats
+        return self._get_delta_change_stats(patch.delta, additions, deletions, commit_parents)
+
+    def _get_delta_change_stats(self, delta, additions, deletions, commit_parents):
+        current_change_type = delta.status_char()
 
         if not commit_parents and current_change_type == 'D':
-            additions = patch.line_stats[2]
+            additions = deletions
             deletions = 0
             final_change_type = 'A'
         else:
             final_change_type = current_change_type
         return additions, deletions, final_change_type
 
+    def _get_big_file_threshold(self, repo: pygit2.Repository) -> int:
+        def read_threshold() -> int:
+            config = repo.config
+            if 'core.bigFileThreshold' in config:
+                # get_int understands git's k/m/g suffixes.
+                return config.get_int('core.bigFileThreshold')
+            return _DEFAULT_BIG_FILE_THRESHOLD
+
+        return repo_metadata_cache.get(self.repo_path, BIG_FILE_THRESHOLD, read_threshold)
+
+    def _exceeds_big_file_threshold(self, repo: pygit2.Repository, diff_files, threshold: int) -> bool:
+        for diff_file in diff_files:
+            if not diff_file.flags & _EXISTS_FLAG:
+                continue
+            if diff_file.flags & _VALID_SIZE_FLAG:
+                size = diff_file.size
+            else:
+                # Reads the object header only, not the blob.
+                _, size = repo.odb.read_header(diff_file.id)
+            if size > threshold:
+                return True
+        return False
+
+    def _get_delta_line_stats(self, repo, diff, index, delta, big_file_threshold: int) -> Tuple[int, int]:
+        """
+        Returns (additions, deletions) for one delta of diff. Binary files, whether
+        detected by libgit2 or marked by a 'binary'/'-diff' attribute, and blobs over
+        core.bigFileThreshold count as 0/0, as they do in git's --numstat.
+        """
+        old_file, new_file = delta.old_file, delta.new_file
+        if (old_file.flags | new_file.flags) & _BINARY_FLAG or self._exceeds_big_file_threshold(
+            repo, (old_file, new_file), big_file_threshold
+        ):
+            return 0, 0
+        # Only libgit2's counters are read; no hunk or line objects are created.
+        _, additions, deletions = diff[index].line_stats
+        return additions, deletions
 
     def _get_file_paths_from_patch(self, patch):
+        return self._get_file_paths_from_delta(patch.delta)
+
+    def _get_file_paths_from_delta(self, delta):
         file_path = None
         old_file_path = None
 
-        if patch.delta.status == pygit2.enums.DeltaStatus.RENAMED:
-            old_file_path_raw = patch.delta.old_file.path
-            file_path_raw = patch.delta.new_file.path
+        if delta.status in (pygit2.enums.DeltaStatus.RENAMED, pygit2.enums.DeltaStatus.COPIED):
+            old_file_path_raw = delta.old_file.path
+            file_path_raw = delta.new_file.path
             old_file_path = old_file_path_raw.decode('utf-8') if isinstance(old_file_path_raw, bytes) else old_file_path_raw
             file_path = file_path_raw.decode('utf-8') if isinstance(file_path_raw, bytes) else file_path_raw
-        elif patch.delta.status == pygit2.enums.DeltaStatus.DELETED:
-            file_path_raw = patch.delta.old_file.path
+        elif delta.status == pygit2.enums.DeltaStatus.DELETED:
+            file_path_raw = delta.old_file.path
             file_path = file_path_raw.decode('utf-8') if isinstance(file_path_raw, bytes) else file_path_raw
         else:
-            file_path_raw = patch.delta.new_file.path
+            file_path_raw = delta.new_file.path
             file_path = file_path_raw.decode('utf-8') if isinstance(file_path_raw, bytes) else file_path_raw
         return file_path, old_file_path
 
-    def _process_commit_file_changes(self, repo, commit, include_paths, exclude_paths) -> List[FileChange]:
+    @staticmethod
+    def _get_subtree(tree, dir_path: str):
+        """Returns the tree at dir_path inside tree, or None if there is no such directory."""
+        if tree is None or not dir_path:
+            return tree
+        try:
+            obj = tree[dir_path]
+        except KeyError:
+            return None
+        return obj if obj.type == pygit2.enums.ObjectType.TREE else None
+
+    @staticmethod
+    def _get_include_dirs(include_paths: List[str]) -> List[str]:
+        """
+        Returns the deepest directories that hold everything the include paths can
+        match. Include paths are prefixes, so their last component may be a partial
+        name ('services/bill' matches 'services/billing/...'); only the components
+        before it are directories for sure. Directories inside another are dropped.
+        """
+        dirs = {p.rpartition("/")[0] for p in include_paths}
+        if "" in dirs:
+            return [""]
+        include_dirs: List[str] = []
+        # Sorting on "dir/" keeps git's tree order and puts parents before children.
+        for dir_path in sorted(dirs, key=lambda d: d + "/"):
+            if not any(dir_path.startswith(parent + "/") for parent in include_dirs):
+                include_dirs.append(dir_path)
+        return include_dirs
+
+    def _touches_include_paths(self, old_tree, new_tree, include_paths: List[str]) -> bool:
+        """
+        Tells whether anything the include paths match differs between the two trees,
+        by comparing the OIDs of the entries the paths can match rather than diffing.
+        """
+        for include_path in include_paths:
+            dir_path, _, name_prefix = include_path.rpartition("/")
+            old_sub = self._get_subtree(old_tree, dir_path)
+            new_sub = self._get_subtree(new_tree, dir_path)
+            if old_sub is not None and new_sub is not None and old_sub.id == new_sub.id:
+                continue
+            old_entries = {(e.name, e.id, e.filemode) for e in old_sub or () if e.name.startswith(name_prefix)}
+            new_entries = {(e.name, e.id, e.filemode) for e in new_sub or () if e.name.startswith(name_prefix)}
+            if old_entries != new_entries:
+                return True
+        return False
+
+    def _process_included_file_changes(self, repo, commit, include_paths, exclude_paths) -> List[FileChange]:
+        """
+        Like _process_commit_file_changes, but only diffs the subtrees the include
+        paths point into. Commits that leave those subtrees alone are not diffed at
+        all. As with a git pathspec, renames are only detected within one subtree.
+        """
+        old_tree = commit.parents[0].tree if commit.parents else None
+        if not self._touches_include_paths(old_tree, commit.tree, include_paths):
+            return []
+
         file_changes = []
+        for dir_path in self._get_include_dirs(include_paths):
+            old_sub = self._get_subtree(old_tree, dir_path)
+            new_sub = self._get_subtree(commit.tree, dir_path)
+            if old_sub is not None and new_sub is not None:
+                if old_sub.id == new_sub.id:
+                    continue
+                diff = old_sub.diff_to_tree(new_sub, **self._diff_options())
+            elif new_sub is not None:
+                diff = new_sub.diff_to_tree(swap=True, **self._diff_options())
+            elif old_sub is not None:
+                diff = old_sub.diff_to_tree(**self._diff_options())
+            else:
+                continue
+            # Paths in a subtree diff are relative to that subtree.
+            path_prefix = f"{dir_path}/" if dir_path else ""
+            # Additions against a missing old side come out as 'A' already, so
+            # _get_change_stats must not flip them as it does for root commits.
+            file_changes.extend(
+                self._file_changes_from_diff(repo, diff, True, include_paths, exclude_paths, path_prefix)
+            )
+        return file_changes
+
+    def _tree_diff_key(self, commit, include_paths, exclude_paths):
+        return TreeDiffCache.key(
+            commit.parents[0].tree_id if commit.parents else None,
+            commit.tree_id,
+            include_paths,
+            exclude_paths,
+            self.diff_mode,
+            self.rename_detection.cache_key,
+        )
+
+    def _process_commit_file_changes(self, repo, commit, include_paths, exclude_paths) -> List[FileChange]:
+        key = self._tree_diff_key(commit, include_paths, exclude_paths)
+        file_changes = self.tree_diff_cache.get(key)
+        if file_changes is None:
+            file_changes = self._diff_commit(repo, commit, include_paths, exclude_paths)
+            self.tree_diff_cache.put(key, file_changes)
+        return file_changes
+
+    def _diff_commit(self, repo, commit, include_paths, exclude_paths) -> List[FileChange]:
+        if include_paths:
+            return self._process_included_file_changes(repo, commit, include_paths, exclude_paths)
+
         if commit.parents:
-            diff = repo.diff(commit.parents[0], commit)
+            diff = repo.diff(commit.parents[0], commit, **self._diff_options())
         else:
-            diff = commit.tree.diff_to_tree()
+            diff = commit.tree.diff_to_tree(**self._diff_options())
+        return self._file_changes_from_diff(repo, diff, commit.parents, include_paths, exclude_paths)
+
+    def _find_similar(self, diff) -> None:
+        """
+        Runs rename/copy detection on diff, in a cheaper mode if the diff has more
+        candidate pairs than the rename limit allows.
+        """
+        rename_detection = self.rename_detection
+        if rename_detection.mode == "off":
+            return
+
+        mode = rename_detection.mode
+        if rename_detection.rename_limit:
+            added_ids, deleted_ids = [], []
+            modified = 0
+            for delta in diff.deltas:
+                status = delta.status
+                if status == pygit2.enums.DeltaStatus.ADDED:
+                    added_ids.append(delta.new_file.id)
+                elif status == pygit2.enums.DeltaStatus.DELETED:
+                    deleted_ids.append(delta.old_file.id)
+                elif status == pygit2.enums.DeltaStatus.MODIFIED:
+                    modified += 1
+            exact = count_exact_renames(added_ids, deleted_ids)
+            added, deleted = len(added_ids) - exact, len(deleted_ids) - exact
+            mode = rename_detection.effective_mode(added, deleted, modified)
+            if mode != rename_detection.mode:
+                logger.info(
+                    f"Diff with {added} added and {deleted} deleted files left after exact renames exceeds the rename limit of "
+                    f"{rename_detection.rename_limit}; using '{mode}' rename detection instead of '{rename_detection.mode}'."
+                )
+
+        diff.find_similar(
+            flags=_FIND_SIMILAR_FLAGS[mode],
+            rename_threshold=rename_detection.similarity_threshold,
+            copy_threshold=rename_detection.similarity_threshold,
+            rename_limit=_NO_LIBGIT2_RENAME_LIMIT,
+        )
+
+    def _diff_options(self) -> Dict[str, int]:
+        # Context lines do not change the counts, so stats mode does not generate them.
+        return {"context_lines": 0} if self.diff_mode == "stats" else {}
 
-        diff.find_similar(flags=pygit2.enums.DiffFind.FIND_RENAMES | pygit2.enums.DiffFind.FIND_COPIES)
+    def _file_changes_from_diff(self, repo, diff, commit_parents, include_paths, exclude_paths, path_prefix: str = "") -> List[FileChange]:
+        file_changes = []
+        self._find_similar(diff)
+        big_file_threshold = self._get_big_file_threshold(repo) if self.diff_mode == "stats" else None
 
-        for patch in diff:
-            file_path, old_file_path = self._get_file_paths_from_patch(patch)
+        for index, delta in enumerate(diff.deltas):
+            file_path, old_file_path = self._get_file_paths_from_delta(delta)
+            if path_prefix:
+                file_path = path_prefix + file_path
+                old_file_path = path_prefix + old_file_path if old_file_path else old_file_path
 
             if self._is_path_filtered(file_path, include_paths, exclude_paths):
                 continue
 
-            additions, deletions, final_change_type = self._get_change_stats(patch, commit.parents)
+            if self.diff_mode == "patch":
+                additions, deletions, final_change_type = self._get_change_stats(diff[index], commit_parents)
+            else:
+                additions, deletions = self._get_delta_line_stats(repo, diff, index, delta, big_file_threshold)
+                additions, deletions, final_change_type = self._get_delta_change_stats(
+                    delta, additions, deletions, commit_parents
+                )
 
             file_changes.append(
                 FileChange(
@@ -169,18 +489,103 @@ class Pygit2Backend(GitBackend):
             file_changes=file_changes,
         )
 
-    def _initialize_repo_and_head(self):
+    def _initialize_repo_and_tips(self) -> Tuple[Optional[pygit2.Repository], List[pygit2.Oid]]:
         try:
             repo = pygit2.Repository(self.repo_path)
         except KeyError:
             logger.warning(f"No git repository found at {self.repo_path}")
-            return None, None
+            return None, []
+        tips: Dict[pygit2.Oid, None] = {}
+        for ref in self.refs:
+            for tip in self._resolve_ref(repo, ref):
+                tips.setdefault(tip)
+        if not tips:
+            logger.warning(f"No commits to walk from {self.refs} in {self.repo_path}. Assuming empty repository.")
+        return repo, list(tips)
+
+    def _resolve_ref(self, repo: pygit2.Repository, ref: str) -> List[pygit2.Oid]:
+        """Resolves one entry of refs to the commits it points at."""
+        if ref == "HEAD":
+            return [] if repo.head_is_unborn else [repo.head.peel(pygit2.Commit).id]
+        if ref in _REF_SELECTORS or _GLOB_CHARS.intersection(ref):
+            if ref in _REF_SELECTORS:
+                patterns = [_REF_SELECTORS[ref]]
+            elif ref.startswith("refs/"):
+                patterns = [ref]
+            else:
+                patterns = [namespace + ref for namespace in _REF_NAMESPACES]
+            tips = [repo.head.peel(pygit2.Commit).id] if ref == "--all" and not repo.head_is_unborn else []
+            for name in repo.references:
+                if not any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns):
+                    continue
+                try:
+                    tips.append(repo.references[name].peel(pygit2.Commit).id)
+                except (pygit2.GitError, KeyError, ValueError):
+                    # Tags of trees or blobs, dangling symbolic refs: nothing to walk.
+                    logger.debug(f"Skipping ref '{name}', which does not point at a commit.")
+            if not tips:
+                logger.warning(f"No refs match '{ref}' in {self.repo_path}")
+            return tips
         try:
-            last = repo.head.target
-        except pygit2.GitError as e:
-            logger.warning(f"GitError accessing repo.head.target for {self.repo_path}: {e}. Assuming empty repository.")
-            return repo, None
-        return repo, last
+            return [repo.revparse_single(ref).peel(pygit2.Commit).id]
+        except (pygit2.GitError, KeyError, ValueError) as e:
+            raise ValueError(f"Cannot resolve ref '{ref}' to a commit in {self.repo_path}: {e}") from e
+
+    def _walk_commits(
+        self, repo: pygit2.Repository, tips: List[pygit2.Oid], since_dt: Optional[datetime]
+    ) -> Iterator[pygit2.Commit]:
+        """
+        Yields the commits reachable from any of tips, each once, newest first. With
+        since_dt, the walk stops once no commit left can be that recent (see
+        SinceHorizon) rather than going through the whole history.
+        """
+        if since_dt is None:
+            walker = repo.walk(tips[0], pygit2.GIT_SORT_TIME)
+            for tip in tips[1:]:
+                walker.push(tip)
+            yield from walker
+            return
+
+        # libgit2 sorts the entire history before returning the first commit under
+        # GIT_SORT_TIME, so walk by date here instead, in 'git log' order: the newest
+        # of the commits whose children have been walked comes next.
+        commit_graph = CommitGraph.open(os.path.join(repo.path, "objects"))
+        try:
+            horizon = SinceHorizon(
+                tips,
+                since_dt,
+                commit_time_of=lambda oid: repo[oid].commit_time,
+                raw_id=lambda oid: oid.raw,
+                commit_graph=commit_graph,
+            )
+            queue = []
+            for tip in tips:
+                commit = repo[tip]
+                queue.append((-commit.commit_time, len(queue), commit))
+            heapq.heapify(queue)
+            seen = set(tips)
+            while queue:
+                commit = heapq.heappop(queue)[2]
+                yield commit
+
+                parent_ids = []
+                for parent_id in commit.parent_ids:
+                    if parent_id in seen:
+                        continue
+                    seen.add(parent_id)
+                    parent = repo.get(parent_id)
+                    if parent is None:  # Beyond the boundary of a shallow clone.
+                        continue
+                    parent_ids.append(parent_id)
+                    heapq.heappush(queue, (-parent.commit_time, len(seen), parent))
+
+                horizon.visit(commit.id, parent_ids)
+                if horizon.reached:
+                    logger.debug(f"Stopping the walk at {commit.id}: no older commit can be since {since_dt}.")
+                    break
+        finally:
+            if commit_graph:
+                commit_graph.close()
 
     def get_log_entries(
         self,
@@ -195,29 +600,179 @@ class Pygit2Backend(GitBackend):
         exclude_paths: Optional[List[str]] = None,
     ) -> List[GitLogEntry]:
         logger.debug(f"Pygit2Backend.get_log_entries called with repo_path={self.repo_path}")
-        repo, last = self._initialize_repo_and_head()
-        if repo is None or last is None:
+        repo, tips = self._initialize_repo_and_tips()
+        if repo is None or not tips:
             return []
 
         effective_author = self._get_effective_author(author, me, repo)
 
         since_dt, until_dt = get_date_filters(since, until)
 
-        log_entries = []
-        for commit in repo.walk(last, pygit2.GIT_SORT_TIME):
-            matches, should_break = self._commit_matches_filters(commit, since_dt, until_dt, effective_author, grep, merged_only, repo, include_paths, exclude_paths)
-            if should_break:
-                break
-            if not matches:
-                continue
-
-            commit_time = datetime.fromtimestamp(commit.committer.time, tz=timezone.utc)
-
-            file_changes = self._process_commit_file_changes(repo, commit, include_paths, exclude_paths)
-
-            if not file_changes and (include_paths or exclude_paths):
-                continue
+        commit_cache = (
+            CommitCache.for_git_dir(
+                repo.path,
+                f"{_COMMIT_CACHE_VARIANT}-{self.diff_mode}-{self.rename_detection.cache_key}",
+                include_paths,
+                exclude_paths,
+            )
+            if self.use_cache
+            else None
+        )
+        new_entries: List[GitLogEntry] = []
 
-            log_entries.append(self._create_git_log_entry(commit, commit_time, file_changes))
+        log_entries = []
+        try:
+            # Walking and filtering is cheap; collect the matching commits first so
+            # the diffs, which dominate the runtime, can be spread over processes.
+            matching_commits = []
+            for commit in self._walk_commits(repo, tips, since_dt):
+                matches, _ = self._commit_matches_filters(commit, since_dt, until_dt, effective_author, grep, merged_only, repo, include_paths, exclude_paths)
+                if matches:
+                    matching_commits.append(commit)
+
+            cached_entries = (
+                commit_cache.get_many(str(commit.id) for commit in matching_commits) if commit_cache else {}
+            )
+            commits_to_diff = [commit for commit in matching_commits if str(commit.id) not in cached_entries]
+            if include_paths:
+                commits_to_diff = self._drop_commits_outside_include_paths(repo, commits_to_diff, include_paths)
+            file_changes_by_hash = self._compute_file_changes(repo, commits_to_diff, include_paths, exclude_paths)
+
+            for commit in matching_commits:
+                entry = cached_entries.get(str(commit.id))
+                if entry is None:
+                    commit_time = datetime.fromtimestamp(commit.committer.time, tz=timezone.utc)
+                    entry = self._create_git_log_entry(commit, commit_time, file_changes_by_hash.get(str(commit.id), []))
+                    new_entries.append(entry)
+
+                if not entry.file_changes and (include_paths or exclude_paths):
+                    continue
+
+                log_entries.append(entry)
+        finally:
+            if commit_cache:
+                commit_cache.put_many(new_entries)
+                commit_cache.close()
+        if self.use_cache and not include_paths and not exclude_paths:
+            self._record_changed_paths(repo, log_entries)
         logger.debug(f"Pygit2Backend.get_log_entries returning {len(log_entries)} entries.")
         return log_entries
+
+    def _names_in_dir(self, commit, dir_path: str) -> List[str]:
+        names: List[str] = []
+        for tree in [commit.tree] + ([commit.parents[0].tree] if commit.parents else []):
+            subtree = self._get_subtree(tree, dir_path)
+            if subtree is not None:
+                names.extend(entry.name for entry in subtree)
+        return names
+
+    def _open_changed_path_index(self, repo: pygit2.Repository) -> Optional[ChangedPathIndex]:
+        # No changed_paths_of: listing a commit's changes takes a diff of the whole
+        # tree, which costs more than the subtree check the index would save. The
+        # sidecar is filled by _record_changed_paths instead.
+        return ChangedPathIndex.open(repo.path, os.path.join(repo.path, "objects"), None, use_sidecar=self.use_cache)
+
+    def _drop_commits_outside_include_paths(self, repo: pygit2.Repository, commits, include_paths: List[str]):
+        """
+        Leaves out the commits that the changed-path index (see ChangedPathIndex) shows
+        to change nothing the include paths match, so they are never diffed. Commits
+        it has no filter for get the subtree check of _touches_include_paths instead.
+        """
+        index = self._open_changed_path_index(repo)
+        if index is None:
+            return commits
+        with index:
+            kept = [
+                commit
+                for commit in commits
+                if index.may_touch(str(commit.id), include_paths, lambda d, c=commit: self._names_in_dir(c, d))
+                and self._touches_include_paths(
+                    commit.parents[0].tree if commit.parents else None, commit.tree, include_paths
+                )
+            ]
+        logger.debug(f"Changed-path index ruled out {len(commits) - len(kept)} of {len(commits)} commits.")
+        return kept
+
+    def _record_changed_paths(self, repo: pygit2.Repository, entries: List[GitLogEntry]) -> None:
+        """
+        Stores changed-path filters for commits whose full diff the run has at hand,
+        so that later runs with include paths can rule them out without reading trees.
+        """
+        index = self._open_changed_path_index(repo)
+        if index is None:
+            return
+        with index:
+            for entry in entries:
+                changed_paths = {fc.file_path for fc in entry.file_changes}
+                changed_paths.update(fc.old_file_path for fc in entry.file_changes if fc.old_file_path)
+                index.record(entry.commit_hash, changed_paths)
+
+    def _compute_file_changes(self, repo, commits, include_paths, exclude_paths) -> Dict[str, List[FileChange]]:
+        """
+        Diffs the given commits, in this process or, with jobs > 1 and enough commits,
+        on a pool of worker processes that each open their own Repository.
+        """
+        jobs = min(self.jobs, len(commits) // _MIN_COMMITS_PER_JOB)
+        if jobs <= 1:
+            file_changes_by_hash = {
+                str(commit.id): self._process_commit_file_changes(repo, commit, include_paths, exclude_paths)
+                for commit in commits
+            }
+            self.tree_diff_cache.log_info()
+            return file_changes_by_hash
+
+        # Only the first commit of each tree pair the memo does not know yet is sent
+        # to the workers.
+        file_changes_by_hash = {}
+        commit_hashes_by_key: Dict[tuple, List[str]] = {}
+        for commit in commits:
+            key = self._tree_diff_key(commit, include_paths, exclude_paths)
+            if key in commit_hashes_by_key:
+                self.tree_diff_cache.hits += 1
+                commit_hashes_by_key[key].append(str(commit.id))
+                continue
+            file_changes = self.tree_diff_cache.get(key)
+            if file_changes is None:
+                commit_hashes_by_key[key] = [str(commit.id)]
+            else:
+                file_changes_by_hash[str(commit.id)] = file_changes
+        first_hashes = [commit_hashes[0] for commit_hashes in commit_hashes_by_key.values()]
+        diffed = self._diff_in_workers(repo, jobs, first_hashes, include_paths, exclude_paths)
+        for key, commit_hashes in commit_hashes_by_key.items():
+            file_changes = diffed[commit_hashes[0]]
+            self.tree_diff_cache.put(key, file_changes)
+            for commit_hash in commit_hashes:
+                file_changes_by_hash[commit_hash] = list(file_changes)
+        self.tree_diff_cache.log_info()
+        return file_changes_by_hash
+
+    def _diff_in_workers(self, repo, jobs, commit_hashes, include_paths, exclude_paths) -> Dict[str, List[FileChange]]:
+        jobs = min(jobs, len(commit_hashes) // _MIN_COMMITS_PER_JOB)
+        if jobs <= 1:
+            return {
+                commit_hash: self._diff_commit(repo, repo[commit_hash], include_paths, exclude_paths)
+                for commit_hash in commit_hashes
+            }
+
+        chunk_size = max(_MIN_COMMITS_PER_JOB, -(-len(commit_hashes) // (jobs * _CHUNKS_PER_JOB)))
+        chunks = [commit_hashes[i : i + chunk_size] for i in range(0, len(commit_hashes), chunk_size)]
+        logger.debug(f"Diffing {len(commit_hashes)} commits in {len(chunks)} chunks on {jobs} worker processes.")
+
+        # Spawned rather than forked workers: libgit2 state is not safe to inherit across fork().
+        with ProcessPoolExecutor(
+            max_workers=jobs,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_diff_worker,
+            initargs=(repo.path, self.diff_mode, self.rename_detection),
+        ) as executor:
+            chunk_results = executor.map(
+                _diff_commit_chunk,
+                chunks,
+                [include_paths] * len(chunks),
+                [exclude_paths] * len(chunks),
+            )
+            file_changes_by_hash = {}
+            for chunk, results in zip(chunks, chunk_results):
+                for commit_hash, compact_changes in zip(chunk, results):
+                    file_changes_by_hash[commit_hash] = [FileChange(*change) for change in compact_changes]
+        return file_changes_by_hash
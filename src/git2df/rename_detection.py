@@ -0,0 +1,88 @@
+from collections import Counter
+from dataclasses import dataclass
+from typing import Hashable, Iterable, Union
+
+RENAME_DETECTION_MODES = ("off", "renames", "copies")
+
+# What a commit's diff is actually run with once rename_limit is applied; "exact"
+# only pairs files with identical content, which needs no content comparison.
+EFFECTIVE_RENAME_MODES = ("off", "exact", "renames", "copies")
+
+# git's defaults for -M/-C and diff.renameLimit.
+DEFAULT_SIMILARITY_THRESHOLD = 50
+DEFAULT_RENAME_LIMIT = 1000
+
+
+@dataclass(frozen=True)
+class RenameDetection:
+    """
+    Rename and copy detection settings shared by all backends.
+
+    mode is 'off' (a rename is a deletion plus an addition), 'renames' (deleted and
+    added files at least similarity_threshold percent alike are paired) or 'copies'
+    (modified files are candidate sources as well, as with 'git diff -C').
+
+    Comparing every source with every added file is quadratic, so rename_limit works
+    like git's diff.renameLimit: when a commit has more than rename_limit**2 pairs
+    left to compare once files with identical content are paired up, 'copies' falls
+    back to 'renames' and then to exact renames only. A rename_limit of 0 means no
+    limit.
+    """
+
+    mode: str = "renames"
+    similarity_threshold: int = DEFAULT_SIMILARITY_THRESHOLD
+    rename_limit: int = DEFAULT_RENAME_LIMIT
+
+    def __post_init__(self):
+        if self.mode not in RENAME_DETECTION_MODES:
+            raise ValueError(
+                f"Unknown rename detection mode '{self.mode}'. Expected one of: {', '.join(RENAME_DETECTION_MODES)}."
+            )
+        if not 0 <= self.similarity_threshold <= 100:
+            raise ValueError(f"similarity_threshold must be between 0 and 100, got {self.similarity_threshold}.")
+        if self.rename_limit < 0:
+            raise ValueError(f"rename_limit must not be negative, got {self.rename_limit}.")
+
+    @property
+    def cache_key(self) -> str:
+        """Identifies the settings in commit cache variants."""
+        if self.mode == "off":
+            return "off"
+        return f"{self.mode}-{self.similarity_threshold}-{self.rename_limit}"
+
+    def effective_mode(self, added: int, deleted: int, modified: int) -> str:
+        """
+        Returns the mode (one of EFFECTIVE_RENAME_MODES) to diff a commit with, given
+        how many files it adds, deletes and modifies, not counting those that
+        count_exact_renames pairs up.
+        """
+        if self.mode == "off":
+            return "off"
+        mode = self.mode
+        if self.rename_limit:
+            max_pairs = self.rename_limit**2
+            if mode == "copies" and added * (deleted + modified) > max_pairs:
+                mode = "renames"
+            if mode == "renames" and added * deleted > max_pairs:
+                mode = "exact"
+        return mode
+
+
+RENAME_DETECTION_OFF = RenameDetection("off")
+
+
+def count_exact_renames(added_ids: Iterable[Hashable], deleted_ids: Iterable[Hashable]) -> int:
+    """Counts the added files that can be paired with a deleted file by object id alone."""
+    return sum((Counter(added_ids) & Counter(deleted_ids)).values())
+
+
+def resolve_rename_detection(
+    rename_detection: Union[None, str, RenameDetection], default: RenameDetection
+) -> RenameDetection:
+    """Accepts a RenameDetection, a bare mode name, or None for the backend's default."""
+    if rename_detection is None:
+        return default
+    if isinstance(rename_detection, str):
+        return RenameDetection(rename_detection)
+    return rename_detection
+
@@ -0,0 +1,64 @@
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Keys shared by every backend, so whichever one looks a value up first fills it for the others.
+DEFAULT_BRANCH = "default_branch"
+# (user.name, user.email) as seen from the repository (local config overrides global)...
+USER_IDENTITY = "user_identity"
+# ...and from the global config only, which is what the CLI backend's '--me' documents.
+GLOBAL_USER_IDENTITY = "global_user_identity"
+# core.bigFileThreshold in bytes: git treats larger files as binary and does not diff them.
+BIG_FILE_THRESHOLD = "big_file_threshold"
+
+_MISSING = object()
+
+
+class RepoMetadataCache:
+    """
+    Memoizes per-repository metadata that does not change during a run, such as the
+    remote's default branch or the configured user identity.
+
+    Values are keyed by the repository's real path and a metadata key. Each caller
+    supplies the loader for its own library (git CLI, pygit2, GitPython); a loader
+    that raises leaves nothing cached, so the next lookup tries again.
+    """
+
+    def __init__(self):
+        self._values: Dict[Tuple[str, Hashable], Any] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _repo_key(repo_path: str) -> str:
+        return os.path.realpath(repo_path)
+
+    def get(self, repo_path: str, key: Hashable, loader: Callable[[], T]) -> T:
+        cache_key = (self._repo_key(repo_path), key)
+        with self._lock:
+            value = self._values.get(cache_key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        logger.debug(f"Loading '{key}' metadata for repository {cache_key[0]}")
+        value = loader()
+        with self._lock:
+            # Another thread may have loaded it meanwhile; keep the first value.
+            return self._values.setdefault(cache_key, value)
+
+    def clear(self, repo_path: Optional[str] = None) -> None:
+        """Forgets the cached metadata of one repository, or of all of them."""
+        with self._lock:
+            if repo_path is None:
+                self._values.clear()
+                return
+            repo_key = self._repo_key(repo_path)
+            for cache_key in [k for k in self._values if k[0] == repo_key]:
+                del self._values[cache_key]
+
+
+repo_metadata_cache = RepoMetadataCache()
@@ -0,0 +1,86 @@
+import logging
+from collections import OrderedDict
+from typing import Hashable, List, NamedTuple, Optional, Sequence, Tuple
+
+from git2df.git_parser import FileChange
+
+logger = logging.getLogger(__name__)
+
+# Enough for the tree pairs of a long history without growing unbounded; a pair
+# costs a few hundred bytes plus its file changes.
+DEFAULT_TREE_DIFF_CACHE_SIZE = 10_000
+
+TreeDiffKey = Tuple[Hashable, ...]
+
+
+class TreeDiffCacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    max_entries: int
+    entries: int
+
+
+class TreeDiffCache:
+    """
+    Memoizes the file changes between two trees for the lifetime of a backend.
+
+    Cherry-picks, rebased branches, reverts of reverts and merges that leave the
+    first parent's tree alone all repeat (old tree, new tree) pairs, and since trees
+    are content-addressed the second diff of a pair can be skipped. Keys also hold
+    whatever else decides the result (path filters, rename and diff modes), see
+    key(). The least recently used pairs are dropped beyond max_entries; 0 turns the
+    cache off. cache_info() reports hits and misses to size it by.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_TREE_DIFF_CACHE_SIZE):
+        if max_entries < 0:
+            raise ValueError(f"max_entries must not be negative, got {max_entries}")
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[TreeDiffKey, List[FileChange]]" = OrderedDict()
+
+    @staticmethod
+    def key(
+        old_tree_id: Optional[Hashable],
+        new_tree_id: Hashable,
+        include_paths: Optional[Sequence[str]],
+        exclude_paths: Optional[Sequence[str]],
+        *settings: Hashable,
+    ) -> TreeDiffKey:
+        """old_tree_id is None for root commits."""
+        return (
+            old_tree_id,
+            new_tree_id,
+            tuple(include_paths) if include_paths else (),
+            tuple(exclude_paths) if exclude_paths else (),
+            *settings,
+        )
+
+    def get(self, key: TreeDiffKey) -> Optional[List[FileChange]]:
+        file_changes = self._entries.get(key)
+        if file_changes is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return list(file_changes)
+
+    def put(self, key: TreeDiffKey, file_changes: List[FileChange]) -> None:
+        if not self.max_entries:
+            return
+        self._entries[key] = list(file_changes)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def cache_info(self) -> TreeDiffCacheInfo:
+        return TreeDiffCacheInfo(self.hits, self.misses, self.max_entries, len(self._entries))
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = self.misses = 0
+
+    def log_info(self) -> None:
+        info = self.cache_info()
+        logger.debug(f"Tree diff cache: {info.hits} hits, {info.misses} misses, {info.entries}/{info.max_entries} entries.")
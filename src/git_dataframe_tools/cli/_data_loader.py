@@ -3,6 +3,7 @@ import pyarrow.parquet as pq
 import logging
 from typing import Optional
 
+from git2df.arrow_builder import commits_table_to_df
 from git_dataframe_tools.config_models import GitAnalysisConfig
 from git_dataframe_tools.git_repo_info_provider import GitRepoInfoProvider
 
@@ -60,7 +61,7 @@ def _load_dataframe(args, config: GitAnalysisConfig):
             
             config._set_date_range()
 
-            git_log_data = table.to_pandas()
+            git_log_data = commits_table_to_df(table)
         except Exception as e:
             logger.error(f"Error loading DataFrame from '{args.df_path}': {e}")
             return None, 1
@@ -94,6 +95,10 @@ def _gather_git_data(
             merged_only=config.merged_only,
             include_paths=config.include_paths,
             exclude_paths=config.exclude_paths,
+            refs=args.refs,
+            jobs=args.jobs,
+            use_cache=args.use_cache,
+            rename_detection=args.rename_detection,
         )
         return git_log_data, 0
     except Exception as e:
@@ -1,3 +1,4 @@
+from enum import Enum
 from typing import Optional, List
 from typing_extensions import Annotated
 import typer
@@ -95,6 +96,66 @@ ExcludePath = Annotated[
     ),
 ]
 
+Refs = Annotated[
+    Optional[List[str]],
+    typer.Option(
+        "--ref",
+        help="Ref, glob pattern over ref names (e.g. 'release/*'), '--branches' or '--all' to walk the local history from (can be used multiple times; default: --all)",
+    ),
+]
+
+Jobs = Annotated[
+    int,
+    typer.Option(
+        "-j",
+        "--jobs",
+        min=1,
+        help="Number of parallel processes used to extract commits (default: 1)",
+    ),
+]
+
+UseCache = Annotated[
+    bool,
+    typer.Option(
+        "--cache",
+        help="Reuse per-commit results cached under the repository's .git/git2df-cache and store new ones there",
+    ),
+]
+
+
+class RenameMode(str, Enum):
+    OFF = "off"
+    RENAMES = "renames"
+    COPIES = "copies"
+
+
+Renames = Annotated[
+    Optional[RenameMode],
+    typer.Option(
+        "--renames",
+        help="Pair renamed (and, with 'copies', copied) files instead of reporting a deletion and an addition (default: off)",
+    ),
+]
+
+RenameThreshold = Annotated[
+    int,
+    typer.Option(
+        "--rename-threshold",
+        min=0,
+        max=100,
+        help="Minimum similarity, in percent, for --renames to pair two files (default: 50)",
+    ),
+]
+
+RenameLimit = Annotated[
+    int,
+    typer.Option(
+        "--rename-limit",
+        min=0,
+        help="Like git's diff.renameLimit: commits with more candidate pairs than its square only get exact renames (default: 1000, 0 for no limit)",
+    ),
+]
+
 Verbose = Annotated[
     bool,
     typer.Option("-v", "--verbose", help="Enable verbose output (INFO level)"),
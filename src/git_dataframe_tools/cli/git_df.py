@@ -1,25 +1,36 @@
+import json
 import os
-from typing import Optional
+import uuid
+from itertools import chain
+from typing import Dict, Iterator, List, Optional
 
-import pandas as pd
 import pyarrow as pa
+import pyarrow.compute as pc
 import pyarrow.parquet as pq
 import typer
 from typing_extensions import Annotated
 
-from git2df import get_commits_df
+from git2df import iter_commits_batches
+from git2df.arrow_builder import COMMITS_SCHEMA
+from git2df.rename_detection import RenameDetection
 from git_dataframe_tools.cli.common_args import (
     Author,
     Debug,
     ExcludePath,
     Grep,
+    Jobs,
     Merges,
     Path,
+    Refs,
     RemoteBranch,
     RemoteUrl,
+    RenameLimit,
+    Renames,
+    RenameThreshold,
     RepoPath,
     Since,
     Until,
+    UseCache,
     Verbose,
     Me,
 )
@@ -29,6 +40,16 @@ from loguru import logger
 
 DATA_VERSION = "1.0"  # Major version of the data format
 
+# Parquet metadata keys of the high-water mark that '--append' continues from.
+HEAD_SHAS_KEY = "head_shas"
+LAST_COMMIT_TIMESTAMP_KEY = "last_commit_timestamp"
+
+# '--append' turns the output into a directory with one Parquet file per run that
+# added commits, so existing rows are never read back or rewritten. Every part holds
+# the watermark as of its run; the newest part's is the one to continue from.
+_PART_FILE_PREFIX = "part-"
+_PART_FILE_SUFFIX = ".parquet"
+
 app = typer.Typer(
     help="Extracts filtered Git commit data and saves it to a Parquet file as a Pandas DataFrame."
 )
@@ -53,71 +74,217 @@ def _validate_and_setup_paths(
         return repo_path
 
 
-def _handle_empty_dataframe(output: str, repo_path: str) -> None:
-    logger.warning(f"No commits found for the specified criteria in '{repo_path}'.")
+def _encode_metadata(custom_metadata: Dict[str, str]) -> Dict[bytes, bytes]:
+    return {k.encode(): str(v).encode() for k, v in custom_metadata.items()}
+
+
+def _temporary_path(output: str) -> str:
+    """A unique, hidden path next to output; readers of the output skip hidden files."""
+    return os.path.join(os.path.dirname(output), f".{os.path.basename(output)}.{uuid.uuid4().hex}.tmp")
+
+
+def _write_batches(
+    batches: Iterator[pa.RecordBatch],
+    path: str,
+    schema: pa.Schema,
+    head_shas: Optional[List[str]],
+    previous_timestamp: Optional[int] = None,
+) -> int:
+    """
+    Streams batches, converted to schema, into a new Parquet file at path and returns
+    the number of rows written. The newest commit timestamp is only known once every
+    batch is written, so that part of the watermark goes into the file's key-value
+    metadata at the end rather than into the schema's.
+    """
+    rows = 0
+    timestamps = [previous_timestamp] if previous_timestamp is not None else []
+    with pq.ParquetWriter(path, schema) as writer:
+        for batch in batches:
+            # Files written by earlier versions may use other column types.
+            writer.write_table(pa.Table.from_batches([batch]).cast(schema))
+            rows += batch.num_rows
+            if batch.num_rows:
+                timestamps.append(pc.max(batch.column("commit_timestamp")).as_py())
+        if head_shas is not None:
+            writer.add_key_value_metadata({LAST_COMMIT_TIMESTAMP_KEY: str(max(timestamps)) if timestamps else ""})
+    return rows
+
+
+def _save_batches_to_parquet(
+    batches: Iterator[pa.RecordBatch],
+    output: str,
+    since: Optional[str],
+    until: Optional[str],
+    head_shas: Optional[List[str]] = None,
+) -> int:
+    """Writes batches to output as they are extracted and returns the number of rows."""
+    logger.info(f"Saving commit data to '{output}'...")
     try:
-        empty_df = pd.DataFrame()
-        table = pa.Table.from_pandas(empty_df)
         custom_metadata = {
             "data_version": DATA_VERSION,
             "description": "Git commit data extracted by git-df CLI",
+            "since": since if since else "",
+            "until": until if until else "",
+            **({HEAD_SHAS_KEY: json.dumps(head_shas)} if head_shas is not None else {}),
         }
-        metadata_bytes = {
-            k.encode(): str(v).encode() for k, v in custom_metadata.items()
-        }
+        # Extraction errors surface while writing, so the file is written next to
+        # output and only moved over it once complete.
+        temp_output = _temporary_path(output)
+        try:
+            rows = _write_batches(batches, temp_output, COMMITS_SCHEMA.with_metadata(_encode_metadata(custom_metadata)), head_shas)
+            os.replace(temp_output, output)
+        finally:
+            if os.path.exists(temp_output):
+                os.unlink(temp_output)
+        logger.info(f"Successfully saved {rows} rows to '{output}'.")
+        return rows
+    except Exception as e:
+        logger.error(f"Error saving data to Parquet: {e}")
+        raise typer.Exit(1)
 
-        temp_table = pa.Table.from_pandas(empty_df)
-        new_schema = temp_table.schema.with_metadata(metadata_bytes)
 
-        table = pa.Table.from_pandas(empty_df, schema=new_schema)
-        pq.write_table(table, output)
-        logger.info(
-            f"Created empty Parquet file at '{output}' as no commits were found."
-        )
+def _read_parquet_metadata(output: str) -> Optional[Dict[str, str]]:
+    """
+    Returns the custom metadata of an earlier git-df output that '--append' can
+    continue from, or None if there is no such file or it carries no watermark.
+    """
+    if not os.path.exists(output):
+        logger.info(f"'{output}' does not exist yet; extracting the full history.")
+        return None
+    if os.path.isdir(output):
+        part_files = _part_files(output)
+        if not part_files:
+            logger.info(f"'{output}' holds no part files yet; extracting the full history.")
+            return None
+        output = part_files[-1]
+    try:
+        parquet_file = pq.ParquetFile(output)
     except Exception as e:
-        logger.error(f"Error creating empty Parquet file: {e}")
+        logger.error(f"Error reading existing Parquet file '{output}': {e}")
         raise typer.Exit(1)
 
+    # The file's key-value metadata also holds what was added after the schema was written.
+    metadata = {
+        k.decode(): v.decode() for k, v in (parquet_file.metadata.metadata or {}).items() if k != b"ARROW:schema"
+    }
+    if metadata.get("data_version") != DATA_VERSION:
+        logger.error(
+            f"Cannot append to '{output}': its data version {metadata.get('data_version')!r} "
+            f"does not match {DATA_VERSION!r}."
+        )
+        raise typer.Exit(1)
+    if HEAD_SHAS_KEY not in metadata or not parquet_file.schema_arrow.names:
+        logger.info(f"'{output}' has no watermark; extracting the full history.")
+        return None
+    return metadata
+
+
+def _part_number(file_name: str) -> Optional[int]:
+    number = file_name[len(_PART_FILE_PREFIX) : -len(_PART_FILE_SUFFIX)]
+    if file_name.startswith(_PART_FILE_PREFIX) and file_name.endswith(_PART_FILE_SUFFIX) and number.isdigit():
+        return int(number)
+    return None
+
 
-def _save_dataframe_to_parquet(commits_df: pd.DataFrame, output: str, since: Optional[str], until: Optional[str]) -> None:
-    logger.info(f"Saving {len(commits_df)} commits to '{output}'...")
+def _part_files(output: str) -> List[str]:
+    """The part files of an '--append' output directory, oldest first."""
+    numbered = sorted((_part_number(name), name) for name in os.listdir(output) if _part_number(name) is not None)
+    return [os.path.join(output, name) for _, name in numbered]
+
+
+def _part_file_name(number: int) -> str:
+    return f"{_PART_FILE_PREFIX}{number:05d}{_PART_FILE_SUFFIX}"
+
+
+def _convert_to_dataset_directory(output: str) -> None:
+    """Turns a single-file output into a directory holding that file as its first part."""
+    logger.info(f"Converting '{output}' into a directory of Parquet files...")
+    # Moving the file keeps its row groups as they are. The directory is built under
+    # a hidden name and renamed, so output never names an empty directory.
+    temp_dir = _temporary_path(output)
+    os.mkdir(temp_dir)
     try:
-        # Reset index to ensure a default integer index, which can be more robust for PyArrow conversion
-        commits_df.reset_index(drop=True, inplace=True)
+        os.rename(output, os.path.join(temp_dir, _part_file_name(0)))
+        try:
+            os.rename(temp_dir, output)
+        except OSError:
+            os.rename(os.path.join(temp_dir, _part_file_name(0)), output)
+            raise
+    except OSError:
+        os.rmdir(temp_dir)
+        raise
 
-        # Fill None values in 'old_file_path' and 'parent_hash' with empty strings to prevent issues with Parquet serialization
-        commits_df['old_file_path'] = commits_df['old_file_path'].fillna('')
 
-        # Explicitly convert all string columns to str type in Pandas to ensure consistency
-        for col in ["commit_hash", "author_name", "author_email", "commit_message", "file_paths", "change_type", "old_file_path"]:
-            if col in commits_df.columns:
-                commits_df[col] = commits_df[col].astype(str)
+def _incremental_log_args(repo_info_provider: GitPythonRepoInfoProvider, repo_path: str, metadata: Dict[str, str]) -> List[str]:
+    """
+    Builds 'git log' arguments that leave out every commit reachable from the
+    watermark's ref tips. Tips that no longer exist (e.g. after a force push and gc)
+    cannot be excluded; if none is left, fall back to the commits made after the
+    last commit timestamp.
+    """
+    head_shas = json.loads(metadata[HEAD_SHAS_KEY])
+    existing_shas = repo_info_provider.filter_existing_commits(repo_path, head_shas)
+    if existing_shas:
+        return [f"^{sha}" for sha in existing_shas]
 
-        # Debug: Comprehensive check for any remaining None values in the entire DataFrame
-        for col in commits_df.columns:
-            if commits_df[col].isnull().any():
-                logger.error(f"DEBUG: Column '{col}' still contains None/NaN values after processing.")
-                logger.error(f"DEBUG: Rows with None/NaN in '{col}':\n{commits_df[commits_df[col].isnull()]}")
-                raise ValueError(f"Column '{col}' contains None/NaN values.")
+    last_timestamp = metadata.get(LAST_COMMIT_TIMESTAMP_KEY)
+    if head_shas and last_timestamp:
+        logger.warning(
+            "None of the watermark's commits exist in the repository anymore; "
+            f"extracting commits committed after {last_timestamp} instead."
+        )
+        return [f"--since=@{int(last_timestamp) + 1}"]
+    return []
 
-        table = pa.Table.from_pandas(commits_df)
-        custom_metadata = {
-            "data_version": DATA_VERSION,
-            "description": "Git commit data extracted by git-df CLI",
-            "since": since if since else "",
-            "until": until if until else "",
-        }
-        metadata_bytes = {
-            k.encode(): str(v).encode() for k, v in custom_metadata.items()
-        }
-        
-        new_schema = table.schema.with_metadata(metadata_bytes)
-        table = pa.Table.from_pandas(commits_df, schema=new_schema)
 
-        pq.write_table(table, output)
-        logger.info(f"Successfully saved commit data to '{output}'.")
+def _append_batches_to_parquet(
+    batches: Iterator[pa.RecordBatch],
+    output: str,
+    until: Optional[str],
+    head_shas: List[str],
+    metadata: Dict[str, str],
+) -> None:
+    """
+    Writes the rows of the commits added since the watermark as a new part file of
+    output, which is turned into a directory first if it is a single file.
+    """
+    try:
+        # The watermark's tips exclude every commit already written, so there is
+        # nothing to dedupe against the existing rows.
+        first_batch = next(batches, None)
+        if first_batch is None:
+            logger.info(f"'{output}' is already up to date.")
+            return
+        if not os.path.isdir(output):
+            _convert_to_dataset_directory(output)
+        last_part = _part_files(output)[-1]
+        last_timestamp = metadata.get(LAST_COMMIT_TIMESTAMP_KEY)
+        schema_metadata = {key: value for key, value in metadata.items() if key != LAST_COMMIT_TIMESTAMP_KEY}
+        # New rows take the column types the existing parts hold.
+        new_schema = pq.read_schema(last_part).with_metadata(
+            _encode_metadata({**schema_metadata, "until": until if until else "", HEAD_SHAS_KEY: json.dumps(head_shas)})
+        )
+
+        part_file = os.path.join(output, _part_file_name(_part_number(os.path.basename(last_part)) + 1))
+        logger.info(f"Appending commit data to '{output}' as '{part_file}'...")
+        # The part is written under a hidden name and linked into place once complete.
+        # Linking fails rather than overwrite a part that a concurrent run added meanwhile.
+        temp_output = _temporary_path(part_file)
+        try:
+            rows = _write_batches(
+                chain([first_batch], batches),
+                temp_output,
+                new_schema,
+                head_shas,
+                int(last_timestamp) if last_timestamp else None,
+            )
+            os.link(temp_output, part_file)
+        finally:
+            if os.path.exists(temp_output):
+                os.unlink(temp_output)
+        logger.info(f"Successfully appended {rows} rows to '{output}'.")
     except Exception as e:
-        logger.error(f"Error saving data to Parquet: {e}")
+        logger.error(f"Error appending data to Parquet: {e}")
         raise typer.Exit(1)
 
 
@@ -142,6 +309,20 @@ def main(
     merges: Merges = False,
     path: Path = None,
     exclude_path: ExcludePath = None,
+    ref: Refs = None,
+    jobs: Jobs = 1,
+    cache: UseCache = False,
+    renames: Renames = None,
+    rename_threshold: RenameThreshold = 50,
+    rename_limit: RenameLimit = 1000,
+    append: Annotated[
+        bool,
+        typer.Option(
+            "--append",
+            "--incremental",
+            help="Only extract commits added since the existing output file was written and append them to it",
+        ),
+    ] = False,
     verbose: Verbose = False,
     debug: Debug = False,
 ):
@@ -152,14 +333,32 @@ def main(
         logger.error("Error: Cannot use both --author and --me options together.")
         raise typer.Exit(1)
 
+    if append and remote_url:
+        logger.error("Error: --append is only supported for local repositories.")
+        raise typer.Exit(1)
+
+    if not append and os.path.isdir(output):
+        logger.error(f"Error: '{output}' is a directory written by --append; use --append or another output path.")
+        raise typer.Exit(1)
+
     repo_path_arg = _validate_and_setup_paths(repo_path, remote_url, remote_branch)
+    existing_metadata = _read_parquet_metadata(output) if append else None
 
     try:
         repo_info_provider = GitPythonRepoInfoProvider()
-        commits_df = get_commits_df(
+        # Read the tips before extracting, so commits that land meanwhile are picked
+        # up by the next '--append' rather than skipped.
+        head_shas = None if remote_url else repo_info_provider.get_ref_tips(repo_path_arg, ref)
+        log_args = (
+            _incremental_log_args(repo_info_provider, repo_path_arg, existing_metadata)
+            if existing_metadata
+            else None
+        )
+        commit_batches = iter_commits_batches(
             repo_path=repo_path_arg,
             remote_url=remote_url,
             remote_branch=remote_branch,
+            log_args=log_args,
             since=since,
             until=until,
             author=author,
@@ -169,16 +368,26 @@ def main(
             include_paths=path,
             exclude_paths=exclude_path,
             repo_info_provider=repo_info_provider,
+            refs=ref,
+            jobs=jobs,
+            use_cache=cache,
+            rename_detection=(
+                RenameDetection(renames.value, rename_threshold, rename_limit) if renames else None
+            ),
         )
     except Exception as e:
         logger.error(f"Error fetching git log data: {e}")
         raise typer.Exit(1)
 
-    if commits_df.empty:
-        _handle_empty_dataframe(output, repo_path)
+    if existing_metadata:
+        _append_batches_to_parquet(commit_batches, output, until, head_shas, existing_metadata)
         return
 
-    _save_dataframe_to_parquet(commits_df, output, since, until)
+    if os.path.isdir(output):
+        # An '--append' output directory without parts yet.
+        output = os.path.join(output, _part_file_name(0))
+    if not _save_batches_to_parquet(commit_batches, output, since, until, head_shas):
+        logger.warning(f"No commits found for the specified criteria in '{repo_path}'.")
 
 
 if __name__ == "__main__":
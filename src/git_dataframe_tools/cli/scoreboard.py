@@ -13,6 +13,7 @@ import typer
 from typing_extensions import Annotated
 import pandas as pd
 
+from git2df.rename_detection import RenameDetection
 from git_dataframe_tools.cli._data_loader import _load_dataframe, _gather_git_data
 from git_dataframe_tools.cli._display_utils import (
     _display_author_specific_stats,
@@ -22,13 +23,19 @@ from git_dataframe_tools.cli.common_args import (
     Author,
     Debug,
     ExcludePath,
+    Jobs,
     Merges,
     Path,
+    Refs,
     RemoteBranch,
     RemoteUrl,
+    RenameLimit,
+    Renames,
+    RenameThreshold,
     RepoPath,
     Since,
     Until,
+    UseCache,
     Verbose,
 )
 from git_dataframe_tools.config_models import GitAnalysisConfig, OutputFormat
@@ -76,6 +83,12 @@ def main(
     merges: Merges = False,
     path: Path = None,
     exclude_path: ExcludePath = None,
+    ref: Refs = None,
+    jobs: Jobs = 1,
+    cache: UseCache = False,
+    renames: Renames = None,
+    rename_threshold: RenameThreshold = 50,
+    rename_limit: RenameLimit = 1000,
     default_period: Annotated[
         str,
         typer.Option(
@@ -145,6 +158,12 @@ def main(
             self.remote_url = remote_url
             self.remote_branch = remote_branch
             self.force_version_mismatch = force_version_mismatch
+            self.refs = ref
+            self.jobs = jobs
+            self.use_cache = cache
+            self.rename_detection = (
+                RenameDetection(renames.value, rename_threshold, rename_limit) if renames else None
+            )
 
     cli_args = Args()
 
@@ -1,7 +1,11 @@
+import configparser
 import git
 import logging
-from typing import Tuple, Optional
+import subprocess
+from typing import List, Tuple, Optional
 
+from git2df.backends import DEFAULT_REFS, ref_args
+from git2df.repo_metadata import USER_IDENTITY, repo_metadata_cache
 from .git_repo_info_provider import GitRepoInfoProvider
 
 logger = logging.getLogger(__name__)
@@ -13,14 +17,26 @@ class GitPythonRepoInfoProvider(GitRepoInfoProvider):
     def get_current_user_info(self, path: str) -> Tuple[Optional[str], Optional[str]]:
         """Retrieves the current Git user's name and email for a given repository path."""
         try:
-            repo = git.Repo(path)
-            reader = repo.config_reader()
-            name: str = str(reader.get_value("user", "name")) or "Unknown"
-            email: str = str(reader.get_value("user", "email")) or "unknown@example.com"
-            return name, email
+            user_name, user_email = repo_metadata_cache.get(
+                path, USER_IDENTITY, lambda: self._read_user_identity(path)
+            )
         except Exception as e:
             logger.warning(f"Could not retrieve git user info using GitPython: {e}")
             return None, None
+        if user_name is None or user_email is None:
+            logger.warning("Could not retrieve git user info using GitPython: user.name or user.email is not set")
+            return None, None
+        return user_name or "Unknown", user_email or "unknown@example.com"
+
+    def _read_user_identity(self, path: str) -> Tuple[Optional[str], Optional[str]]:
+        reader = git.Repo(path).config_reader()
+        identity = []
+        for option in ("name", "email"):
+            try:
+                identity.append(str(reader.get_value("user", option)))
+            except (configparser.NoSectionError, configparser.NoOptionError):
+                identity.append(None)
+        return identity[0], identity[1]
 
     def is_git_repo(self, path: str) -> bool:
         """Checks if the given path is a valid Git repository."""
@@ -29,3 +45,38 @@ class GitPythonRepoInfoProvider(GitRepoInfoProvider):
             return True
         except git.InvalidGitRepositoryError:
             return False
+
+    def get_ref_tips(self, path: str, refs: Optional[List[str]] = None) -> List[str]:
+        """
+        Returns the sorted commit SHAs that refs point to (tags peeled), by default HEAD
+        and every ref. refs take the same forms as GitCliBackend's.
+        """
+        repo = git.Repo(path)
+        try:
+            output = repo.git.rev_list("--no-walk", *ref_args(refs or DEFAULT_REFS))
+        except git.GitCommandError:
+            # No commits yet (or a HEAD without a commit and no refs).
+            return []
+        return sorted(set(output.split()))
+
+    def filter_existing_commits(self, path: str, commit_hashes: List[str]) -> List[str]:
+        """Returns the commit_hashes that still name commits in the repository, in order."""
+        if not commit_hashes:
+            return []
+        # One 'git cat-file' answers for every hash: a '<sha> commit <size>' line per
+        # commit and '<name> missing' for the rest, in input order.
+        result = subprocess.run(
+            ["git", "cat-file", "--batch-check"],
+            cwd=path,
+            input="".join(f"{commit_hash}^{{commit}}\n" for commit_hash in commit_hashes),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        existing = []
+        for commit_hash, line in zip(commit_hashes, result.stdout.splitlines()):
+            if line.endswith(" missing"):
+                logger.debug(f"Commit {commit_hash} is not present in {path}")
+                continue
+            existing.append(commit_hash)
+        return existing
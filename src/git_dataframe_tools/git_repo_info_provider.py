@@ -1,4 +1,4 @@
-from typing import Protocol, Tuple, Optional
+from typing import List, Protocol, Tuple, Optional
 
 
 class GitRepoInfoProvider(Protocol):
@@ -11,3 +11,11 @@ class GitRepoInfoProvider(Protocol):
     def is_git_repo(self, path: str) -> bool:
         """Checks if the given path is a valid Git repository."""
         ...
+
+    def get_ref_tips(self, path: str, refs: Optional[List[str]] = None) -> List[str]:
+        """Returns the commit SHAs that refs (by default HEAD and every ref) point to."""
+        ...
+
+    def filter_existing_commits(self, path: str, commit_hashes: List[str]) -> List[str]:
+        """Returns the commit_hashes that name commits present in the repository."""
+        ...
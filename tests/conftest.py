@@ -13,6 +13,8 @@ from .fixtures.markdown_utils import extract_code_blocks
 from .fixtures.git_cli_fixtures import git_repo
 from .fixtures.pygit2_fixtures import pygit2_repo
 from .fixtures.remote_repo_fixtures import remote_git_repo
+from .fixtures.git_daemon_fixtures import git_daemon
+from .fixtures.repo_metadata_fixtures import clear_repo_metadata_cache
 import os
 from datetime import datetime, timedelta, timezone
 import pytest
@@ -0,0 +1,22 @@
+import os
+import subprocess
+
+
+def git(cwd, *args, date=None):
+    """Runs a git command in cwd as the test identity, dating any commit it makes when date is given."""
+    env = {**os.environ, "GIT_AUTHOR_DATE": date, "GIT_COMMITTER_DATE": date} if date else None
+    subprocess.run(
+        ["git", "-c", "user.name=Test User", "-c", "user.email=test@example.com", *args],
+        cwd=cwd,
+        check=True,
+        capture_output=True,
+        env=env,
+    )
+
+
+def entry_summary(entries):
+    """Each entry's message with its sorted (path, additions, deletions, change type) file changes."""
+    return [
+        (entry.commit_message.strip(), sorted((fc.file_path, fc.additions, fc.deletions, fc.change_type) for fc in entry.file_changes))
+        for entry in entries
+    ]
@@ -0,0 +1,57 @@
+import socket
+import subprocess
+import time
+
+import pytest
+
+
+class GitDaemon:
+    def __init__(self, base_path, port):
+        self.base_path = base_path
+        self.port = port
+
+    def url(self, name):
+        return f"git://127.0.0.1:{self.port}/{name}"
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def git_daemon(tmp_path):
+    """Serves the bare repositories created under base_path over git:// on a free local port."""
+    base_path = tmp_path / "served"
+    base_path.mkdir()
+    port = _free_port()
+    process = subprocess.Popen(
+        [
+            "git",
+            "daemon",
+            "--export-all",
+            "--reuseaddr",
+            "--informative-errors",
+            "--listen=127.0.0.1",
+            f"--port={port}",
+            f"--base-path={base_path}",
+            str(base_path),
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + 10
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                break
+            except OSError:
+                if process.poll() is not None or time.monotonic() > deadline:
+                    pytest.skip("git daemon could not be started")
+                time.sleep(0.05)
+        yield GitDaemon(base_path, port)
+    finally:
+        process.terminate()
+        process.wait()
@@ -0,0 +1,11 @@
+import pytest
+
+from git2df.repo_metadata import repo_metadata_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_repo_metadata_cache():
+    """Keeps memoized repository metadata (user identity, default branch) from leaking between tests."""
+    repo_metadata_cache.clear()
+    yield
+    repo_metadata_cache.clear()
@@ -64,12 +64,21 @@ def compare_commit_dicts(dict1: dict, dict2: dict, tolerance_seconds: int = 2) -
     return True
 
 
-@pytest.fixture(params=[GitCliBackend, Pygit2Backend, DulwichRemoteBackend])
+@pytest.fixture(
+    params=[
+        (GitCliBackend, {}),
+        (GitCliBackend, {"extraction_mode": "single_pass"}),
+        (Pygit2Backend, {}),
+        (DulwichRemoteBackend, {}),
+    ],
+    ids=["GitCliBackend", "GitCliBackend-single_pass", "Pygit2Backend", "DulwichRemoteBackend"],
+)
 def backend_instance(request, git_repo, remote_git_repo):
-    backend_class = request.param
+    # Backend variants share the golden files of their class, so every mode must match them.
+    backend_class, backend_kwargs = request.param
     if backend_class == DulwichRemoteBackend:
-        return backend_class(remote_url=remote_git_repo)
-    return backend_class(repo_path=git_repo)
+        return backend_class(remote_url=remote_git_repo, **backend_kwargs)
+    return backend_class(repo_path=git_repo, **backend_kwargs)
 
 
 @pytest.mark.parametrize("git_repo", [sample_commits], indirect=True)
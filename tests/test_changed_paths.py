@@ -0,0 +1,151 @@
+import os
+import subprocess
+
+import pytest
+
+from git2df.changed_paths import ChangedPathIndex
+from git2df.commit_graph import ChangedPathFilter, CommitGraph
+from git2df.dulwich.backend import DulwichRemoteBackend
+from git2df.dulwich.diff_parser import DulwichDiffParser
+from git2df.pygit2_backend import Pygit2Backend
+from tests.fixtures.git_commands import git
+
+_FILES_BY_COMMIT = [
+    ["services/billing/api.py", "services/payments/api.py", "docs/index.md"],
+    ["services/payments/api.py"],
+    ["services/billing/models/invoice.py"],
+    ["docs/index.md"],
+    ["services/payments/café.py"],
+    ["services/billing-v2/api.py"],
+    ["docs/index.md", "README"],
+]
+
+
+@pytest.fixture
+def monorepo(tmp_path):
+    git(tmp_path, "init", "-q", "-b", "main")
+    for number, paths in enumerate(_FILES_BY_COMMIT):
+        for path in paths:
+            os.makedirs(tmp_path / os.path.dirname(path), exist_ok=True)
+            with open(tmp_path / path, "a") as f:
+                f.write(f"change {number}\n")
+        git(tmp_path, "add", ".")
+        git(tmp_path, "commit", "-q", "-m", f"Commit {number}")
+    return tmp_path
+
+
+def _write_changed_path_filters(repo_path):
+    subprocess.run(
+        ["git", "commit-graph", "write", "--reachable", "--changed-paths"], cwd=repo_path, check=True
+    )
+
+
+def _commit_paths(repo_path):
+    output = subprocess.run(
+        ["git", "-c", "core.quotepath=off", "log", "--format=@%H", "--name-only"],
+        cwd=repo_path,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    paths_by_commit = {}
+    for line in output.splitlines():
+        if line.startswith("@"):
+            paths = paths_by_commit.setdefault(line[1:], [])
+        elif line:
+            paths.append(line)
+    return paths_by_commit
+
+
+def test_filters_read_from_commit_graph_hold_every_changed_path(monorepo):
+    _write_changed_path_filters(monorepo)
+
+    with CommitGraph.open(str(monorepo / ".git" / "objects")) as commit_graph:
+        assert commit_graph.has_changed_path_filters
+        for commit_hash, paths in _commit_paths(monorepo).items():
+            changed_path_filter = commit_graph.changed_path_filter(bytes.fromhex(commit_hash))
+            for path in paths:
+                assert changed_path_filter.may_contain(path)
+                assert changed_path_filter.may_contain(path.rpartition("/")[0] or path)
+            assert ChangedPathFilter.from_paths(paths).may_contain(paths[0])
+
+
+def test_may_touch_handles_partial_names_and_persists_filters(tmp_path, mocker):
+    changed_paths_of = mocker.Mock(return_value=["services/billing/api.py", "docs/index.md"])
+    names_in_dir = {
+        "": ["services", "docs"],
+        "services": ["billing", "payments"],
+        "services/billing": ["api.py"],
+        "docs": ["index.md"],
+    }.get
+
+    with ChangedPathIndex.open(str(tmp_path), str(tmp_path / "objects"), changed_paths_of, use_sidecar=True) as index:
+        assert index.may_touch("ab" * 20, ["services/bill"], names_in_dir)
+        assert index.may_touch("ab" * 20, ["services/"], names_in_dir)
+        assert index.may_touch("ab" * 20, ["serv"], names_in_dir)
+        assert not index.may_touch("ab" * 20, ["services/pay"], names_in_dir)
+        assert not index.may_touch("ab" * 20, ["services/billing/models", "lib/"], names_in_dir)
+    assert changed_paths_of.call_count == 1
+
+    # A later run reads the stored filter instead of listing the changes again.
+    changed_paths_of.side_effect = AssertionError("filter should be cached")
+    with ChangedPathIndex.open(str(tmp_path), str(tmp_path / "objects"), changed_paths_of, use_sidecar=True) as index:
+        assert not index.may_touch("ab" * 20, ["services/pay"], names_in_dir)
+
+
+def test_no_index_without_commit_graph_filters_or_sidecar(monorepo):
+    assert ChangedPathIndex.open(str(monorepo / ".git"), str(monorepo / ".git" / "objects"), list, use_sidecar=False) is None
+
+
+def _pygit2_run(repo_path, include_paths, use_cache):
+    return Pygit2Backend(str(repo_path), use_cache=use_cache).get_log_entries(include_paths=include_paths)
+
+
+def _dulwich_run(repo_path, include_paths, use_cache):
+    return DulwichRemoteBackend(str(repo_path / ".git"), use_cache=use_cache).get_log_entries(include_paths=include_paths)
+
+
+@pytest.mark.parametrize("index_source", ["commit-graph", "sidecar"])
+@pytest.mark.parametrize(
+    "run, diff_method",
+    [(_pygit2_run, (Pygit2Backend, "_process_commit_file_changes")), (_dulwich_run, (DulwichDiffParser, "extract_file_changes"))],
+    ids=["pygit2", "dulwich"],
+)
+@pytest.mark.parametrize("include_paths", [["services/bill"], ["services/payments/"], ["docs/index.md", "READ"]])
+def test_backends_skip_commits_outside_include_paths(monorepo, mocker, run, diff_method, index_source, include_paths):
+    def summarize(entries):
+        return sorted(
+            (entry.commit_message.strip(), sorted((fc.file_path, fc.additions) for fc in entry.file_changes))
+            for entry in entries
+        )
+
+    expected = summarize(run(monorepo, include_paths, use_cache=False))
+    if index_source == "commit-graph":
+        _write_changed_path_filters(monorepo)
+    spy = mocker.spy(*diff_method)
+
+    actual = summarize(run(monorepo, include_paths, use_cache=index_source == "sidecar"))
+
+    assert actual == expected
+    # Beyond false positives, only the matching commits are diffed.
+    assert len(expected) <= spy.call_count < len(_FILES_BY_COMMIT)
+
+
+def test_pygit2_fills_sidecar_from_full_runs_only(monorepo, mocker):
+    build = mocker.spy(ChangedPathFilter, "from_paths")
+    expected = _pygit2_run(monorepo, ["services/payments/"], use_cache=False)
+
+    # Without stored filters, commits get the subtree check; nothing is diffed to build filters.
+    assert _pygit2_run(monorepo, ["services/payments/"], use_cache=True) == expected
+    assert build.call_count == 0
+
+    # A run without path filters stores a filter per commit from the diffs it computes.
+    Pygit2Backend(str(monorepo), use_cache=True).get_log_entries()
+    assert build.call_count == len(_FILES_BY_COMMIT)
+
+    # Later runs, with any include paths, read those filters.
+    expected = _pygit2_run(monorepo, ["docs/"], use_cache=False)
+    subtree_check = mocker.spy(Pygit2Backend, "_touches_include_paths")
+    assert _pygit2_run(monorepo, ["docs/"], use_cache=True) == expected
+    # Beyond false positives, only the commits changing docs/ are looked at.
+    assert len(expected) <= subtree_check.call_count < len(_FILES_BY_COMMIT)
@@ -0,0 +1,156 @@
+import sqlite3
+import subprocess
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from git2df.backends import GitCliBackend
+from git2df.commit_cache import CACHE_DIR_NAME, CommitCache
+from git2df.dulwich.backend import DulwichRemoteBackend
+from git2df.dulwich.diff_parser import DulwichDiffParser
+from git2df.git_parser import FileChange, GitLogEntry
+from git2df.pygit2_backend import Pygit2Backend
+from tests.conftest import sample_commits
+
+
+def _entry(commit_hash: str, *file_changes: FileChange) -> GitLogEntry:
+    return GitLogEntry(
+        commit_hash=commit_hash,
+        parent_hashes=["p1", "p2"],
+        author_name="Test Author",
+        author_email="test@example.com",
+        commit_date=datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+        commit_timestamp=1704164645,
+        commit_message="Subject",
+        file_changes=list(file_changes),
+    )
+
+
+def test_roundtrip_keeps_file_change_order(tmp_path):
+    entry = _entry(
+        "a" * 40,
+        FileChange("b.txt", 3, 1, "M"),
+        FileChange("a.txt", 0, 0, "R", old_file_path="old.txt"),
+    )
+    with CommitCache(str(tmp_path / "cache.sqlite"), "cli") as cache:
+        cache.put_many([entry, _entry("b" * 40)])
+        assert cache.get("a" * 40) == entry
+        assert cache.get("b" * 40) == _entry("b" * 40)
+        assert cache.get("c" * 40) is None
+        assert set(cache.get_many(["a" * 40, "c" * 40])) == {"a" * 40}
+
+
+def test_replacing_an_entry_drops_its_old_file_changes(tmp_path):
+    with CommitCache(str(tmp_path / "cache.sqlite"), "cli") as cache:
+        cache.put_many([_entry("a" * 40, FileChange("x", 1, 1, "M"), FileChange("y", 1, 1, "M"))])
+        cache.put_many([_entry("a" * 40, FileChange("z", 2, 0, "A"))])
+        assert cache.get("a" * 40).file_changes == [FileChange("z", 2, 0, "A")]
+
+
+def test_entries_are_isolated_by_variant_and_path_filters(tmp_path):
+    db_path = str(tmp_path / "cache.sqlite")
+    with CommitCache(db_path, "cli", include_paths=["src", "docs"]) as cache:
+        cache.put_many([_entry("a" * 40)])
+
+    # The order of the filters does not matter...
+    with CommitCache(db_path, "cli", include_paths=["docs", "src"]) as cache:
+        assert cache.get("a" * 40) is not None
+    # ...but the filters and the backend variant do.
+    with CommitCache(db_path, "cli") as cache:
+        assert cache.get("a" * 40) is None
+    with CommitCache(db_path, "pygit2", include_paths=["src", "docs"]) as cache:
+        assert cache.get("a" * 40) is None
+
+
+def test_schema_version_mismatch_resets_the_cache(tmp_path):
+    db_path = str(tmp_path / "cache.sqlite")
+    with CommitCache(db_path, "cli") as cache:
+        cache.put_many([_entry("a" * 40)])
+    with sqlite3.connect(db_path) as connection:
+        connection.execute("PRAGMA user_version = 999")
+
+    with CommitCache(db_path, "cli") as cache:
+        assert cache.get("a" * 40) is None
+
+
+def test_for_git_dir_returns_none_when_unavailable(tmp_path):
+    git_dir = tmp_path / ".git"
+    git_dir.mkdir()
+    # A file where the cache directory should be makes it impossible to create.
+    (git_dir / CACHE_DIR_NAME).write_text("not a directory")
+
+    assert CommitCache.for_git_dir(str(git_dir), "cli") is None
+
+
+@pytest.mark.parametrize("git_repo", [sample_commits], indirect=True)
+def test_cli_backend_reuses_cached_commits(git_repo):
+    first = GitCliBackend(git_repo, use_cache=True).get_log_entries()
+    assert first
+
+    with patch.object(GitCliBackend, "_extract_commits") as mock_extract:
+        second = GitCliBackend(git_repo, use_cache=True).get_log_entries()
+
+    mock_extract.assert_not_called()
+    assert second == first
+    assert second == GitCliBackend(git_repo).get_log_entries()
+
+
+@pytest.mark.parametrize("git_repo", [sample_commits], indirect=True)
+def test_cli_backend_extracts_only_new_commits(git_repo):
+    GitCliBackend(git_repo, use_cache=True).get_log_entries()
+    (Path(git_repo) / "file3.txt").write_text("new\n")
+    subprocess.run(["git", "add", "file3.txt"], cwd=git_repo, check=True)
+    subprocess.run(["git", "commit", "-q", "-m", "Fourth commit"], cwd=git_repo, check=True)
+
+    with patch.object(GitCliBackend, "_extract_commits", autospec=True, side_effect=GitCliBackend._extract_commits) as spy:
+        entries = GitCliBackend(git_repo, use_cache=True).get_log_entries()
+
+    new_hash = subprocess.run(["git", "rev-parse", "HEAD"], cwd=git_repo, check=True, capture_output=True, text=True).stdout.strip()
+    assert spy.call_args.args[1] == [new_hash]
+    assert [e.commit_message for e in entries][0] == "Fourth commit"
+    assert entries == GitCliBackend(git_repo).get_log_entries()
+
+
+@pytest.mark.parametrize("git_repo", [sample_commits], indirect=True)
+@pytest.mark.parametrize(
+    "extracted, message",
+    [
+        (lambda entries: entries[1:], "Expected commit .* next in the diff-tree output, got"),
+        (lambda entries: entries[:-1], "git stopped before commit"),
+    ],
+)
+def test_cli_backend_matches_extracted_commits_by_hash(git_repo, extracted, message):
+    entries = GitCliBackend(git_repo).get_log_entries()
+
+    with patch.object(GitCliBackend, "_extract_commits", return_value=iter(extracted(entries))):
+        with pytest.raises(ValueError, match=message):
+            GitCliBackend(git_repo, use_cache=True).get_log_entries()
+
+    # Nothing was stored under the wrong commits.
+    assert GitCliBackend(git_repo, use_cache=True).get_log_entries() == entries
+
+
+@pytest.mark.parametrize("git_repo", [sample_commits], indirect=True)
+def test_pygit2_backend_reuses_cached_commits(git_repo):
+    first = Pygit2Backend(git_repo, use_cache=True).get_log_entries()
+    assert first
+
+    with patch.object(Pygit2Backend, "_process_commit_file_changes") as mock_diff:
+        second = Pygit2Backend(git_repo, use_cache=True).get_log_entries()
+
+    mock_diff.assert_not_called()
+    assert second == first
+
+
+@pytest.mark.parametrize("git_repo", [sample_commits], indirect=True)
+def test_dulwich_backend_reuses_cached_commits(git_repo, remote_git_repo):
+    first = DulwichRemoteBackend(remote_git_repo, use_cache=True).get_log_entries()
+    assert first
+
+    with patch.object(DulwichDiffParser, "extract_file_changes") as mock_diff:
+        second = DulwichRemoteBackend(remote_git_repo, use_cache=True).get_log_entries()
+
+    mock_diff.assert_not_called()
+    assert second == first
@@ -0,0 +1,105 @@
+import os
+import subprocess
+from datetime import datetime, timezone
+
+import pytest
+
+from git2df.commit_graph import CommitGraph
+from git2df.dulwich.backend import DulwichRemoteBackend
+from git2df.dulwich.commit_filters import DulwichCommitFilters
+from git2df.pygit2_backend import Pygit2Backend
+
+SINCE = "2023-06-01"
+
+
+@pytest.fixture
+def skewed_repo(tmp_path):
+    """
+    Twenty commits from 2022, one from July 2023, two whose clocks were set to 2001
+    and a final one from August 2023.
+    """
+
+    def commit(message, date):
+        (tmp_path / "file.txt").write_text(message)
+        env = {**os.environ, "GIT_AUTHOR_DATE": date, "GIT_COMMITTER_DATE": date}
+        subprocess.run(["git", "add", "."], cwd=tmp_path, check=True)
+        subprocess.run(["git", "commit", "-q", "-m", message], cwd=tmp_path, check=True, env=env)
+
+    subprocess.run(["git", "init", "-q", "-b", "main"], cwd=tmp_path, check=True)
+    subprocess.run(["git", "config", "user.name", "Test User"], cwd=tmp_path, check=True)
+    subprocess.run(["git", "config", "user.email", "test@example.com"], cwd=tmp_path, check=True)
+    for day in range(1, 21):
+        commit(f"Old {day}", f"2022-03-{day:02d}T12:00:00+00:00")
+    commit("Recent", "2023-07-01T12:00:00+00:00")
+    commit("Skewed 1", "2001-01-01T12:00:00+00:00")
+    commit("Skewed 2", "2001-01-02T12:00:00+00:00")
+    commit("Latest", "2023-08-01T12:00:00+00:00")
+    return tmp_path
+
+
+def _write_commit_graph(repo_path, *args):
+    subprocess.run(["git", "commit-graph", "write", "--reachable", *args], cwd=repo_path, check=True)
+
+
+def _commit_times(repo_path):
+    output = subprocess.run(
+        ["git", "log", "--format=%H %ct"], cwd=repo_path, check=True, capture_output=True, text=True
+    ).stdout
+    return {bytes.fromhex(sha): int(ct) for sha, ct in (line.split() for line in output.splitlines())}
+
+
+def test_open_without_commit_graph(skewed_repo):
+    assert CommitGraph.open(str(skewed_repo / ".git" / "objects")) is None
+
+
+@pytest.mark.parametrize("split", [False, True])
+def test_corrected_commit_dates_bound_ancestor_dates(skewed_repo, split):
+    if split:
+        # Two layers: the older commits in the base graph, the rest on top.
+        subprocess.run(["git", "branch", "base", "HEAD~4"], cwd=skewed_repo, check=True)
+        subprocess.run(["git", "commit-graph", "write", "--split", "--reachable"], cwd=skewed_repo, check=True)
+        subprocess.run(["git", "branch", "-D", "base"], cwd=skewed_repo, check=True)
+    _write_commit_graph(skewed_repo, *(["--split=no-merge"] if split else []))
+    commit_times = _commit_times(skewed_repo)
+    recent_time = int(datetime(2023, 7, 1, 12, tzinfo=timezone.utc).timestamp())
+
+    with CommitGraph.open(str(skewed_repo / ".git" / "objects")) as commit_graph:
+        corrected_dates = {sha: commit_graph.corrected_commit_date(sha) for sha in commit_times}
+        assert commit_graph.corrected_commit_date(b"\0" * 20) is None
+
+    assert all(corrected_dates[sha] >= commit_times[sha] for sha in commit_times)
+    # The skewed commits are newer than the July commit they descend from.
+    skewed = [sha for sha, t in commit_times.items() if t < datetime(2002, 1, 1, tzinfo=timezone.utc).timestamp()]
+    assert len(skewed) == 2
+    assert all(corrected_dates[sha] > recent_time for sha in skewed)
+
+
+@pytest.mark.parametrize("with_commit_graph", [False, True])
+def test_pygit2_since_stops_early_without_skipping_skewed_history(skewed_repo, mocker, with_commit_graph):
+    if with_commit_graph:
+        _write_commit_graph(skewed_repo)
+    backend = Pygit2Backend(str(skewed_repo))
+    spy = mocker.spy(backend, "_commit_matches_filters")
+
+    messages = [entry.commit_message for entry in backend.get_log_entries(since=SINCE)]
+
+    if with_commit_graph:
+        assert messages == ["Latest", "Recent"]
+    else:
+        # Judged by commit dates alone, the two skewed commits hide the July one.
+        assert messages == ["Latest"]
+    # Only the window and the commits right behind it are walked, not all 24.
+    assert spy.call_count <= 5
+
+
+@pytest.mark.parametrize("with_commit_graph", [False, True])
+def test_dulwich_since_stops_early_without_skipping_skewed_history(skewed_repo, mocker, with_commit_graph):
+    if with_commit_graph:
+        _write_commit_graph(skewed_repo)
+    spy = mocker.spy(DulwichCommitFilters, "filter_commits_by_date")
+    backend = DulwichRemoteBackend(str(skewed_repo / ".git"))
+
+    messages = [entry.commit_message.strip() for entry in backend.get_log_entries(since=SINCE)]
+
+    assert messages == (["Latest", "Recent"] if with_commit_graph else ["Latest"])
+    assert spy.call_count <= 5
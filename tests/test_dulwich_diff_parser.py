@@ -6,7 +6,7 @@ from dulwich.objects import Commit, Blob, TreeEntry
 from dulwich.repo import Repo
 from dulwich.diff_tree import TreeChange
 
-from src.git2df.dulwich.diff_parser import DulwichDiffParser
+from src.git2df.dulwich.diff_parser import BlobLineCountCache, DulwichDiffParser, count_blob_lines, count_line_changes
 
 
 # Helper to create a mock blob object
@@ -14,6 +14,7 @@ def create_mock_blob(sha: bytes, content: str) -> MagicMock:
     mock_blob = MagicMock(spec=Blob)
     mock_blob.id = sha
     mock_blob.as_pretty_string.return_value = content
+    mock_blob.as_raw_string.return_value = content.encode("utf-8")
     return mock_blob
 
 
@@ -63,40 +64,26 @@ def test_extract_file_changes_modification(mock_repo, mock_commit):
     # Arrange
     old_tree_id = b"old_tree_sha"
     parser = DulwichDiffParser()
-
-    # Mock dulwich.patch.write_object_diff output for a modification
-    mock_diff_output = (
-        b"diff --git a/file.txt b/file.txt\n"
-        b"index 1234567..890abcdef 100644\n"
-        b"--- a/file.txt\n"
-        b"+++ b/file.txt\n"
-        b"@@ -1,2 +1,3 @@\n"
-        b"-line1\n"
-        b"+line1_modified\n"
-        b"+line2_added\n"
-    ).decode("utf-8")
-
-    with patch("dulwich.patch.write_object_diff") as mock_write_object_diff:
-
-        def side_effect(stream, *args, **kwargs):
-            stream.write(mock_diff_output.encode("utf-8"))
-
-        mock_write_object_diff.side_effect = side_effect
-
-        # Mock dulwich.diff_tree.tree_changes to return a modify change
-        mock_tree_change = create_mock_tree_change(
-            type="modify", old_path=b"file.txt", new_path=b"file.txt"
+    blobs = {
+        b"old_blob_sha": create_mock_blob(b"old_blob_sha", "line1\n"),
+        b"new_blob_sha": create_mock_blob(b"new_blob_sha", "line1_modified\nline2_added\n"),
+    }
+    mock_repo.get_object.side_effect = blobs.__getitem__
+
+    # Mock dulwich.diff_tree.tree_changes to return a modify change
+    mock_tree_change = create_mock_tree_change(
+        type="modify", old_path=b"file.txt", new_path=b"file.txt", old_sha=b"old_blob_sha", new_sha=b"new_blob_sha"
+    )
+    with patch("dulwich.diff_tree.tree_changes") as mock_tree_changes:
+        mock_tree_changes.return_value = [mock_tree_change]
+
+        # Act
+        file_changes = parser.extract_file_changes(
+            mock_repo, mock_commit, old_tree_id
         )
-        with patch("dulwich.diff_tree.tree_changes") as mock_tree_changes:
-            mock_tree_changes.return_value = [mock_tree_change]
-
-            # Act
-            file_changes = parser.extract_file_changes(
-                mock_repo, mock_commit, old_tree_id
-            )
 
-            # Assert
-            _assert_file_changes(file_changes, 1, "file.txt", "M", 2, 1)
+        # Assert
+        _assert_file_changes(file_changes, 1, "file.txt", "M", 2, 1)
 
 
 def test_extract_file_changes_addition(mock_repo, mock_commit):
@@ -189,82 +176,52 @@ def test_extract_file_changes_with_path_include_filter(mock_repo, mock_commit):
     # Arrange
     old_tree_id = b"old_tree_sha"
     parser = DulwichDiffParser(include_paths=["src/"])
+    mock_repo.get_object.side_effect = lambda sha: create_mock_blob(sha, "old\n" if sha.startswith(b"old") else "new\n")
+
+    mock_tree_changes_list = [
+        create_mock_tree_change(
+            type="modify", old_path=b"src/file1.txt", new_path=b"src/file1.txt", old_sha=b"old1", new_sha=b"new1"
+        ),
+        create_mock_tree_change(
+            type="modify", old_path=b"test/file2.txt", new_path=b"test/file2.txt", old_sha=b"old2", new_sha=b"new2"
+        ),
+    ]
+    with patch("dulwich.diff_tree.tree_changes") as mock_tree_changes:
+        mock_tree_changes.return_value = mock_tree_changes_list
+
+        # Act
+        file_changes = parser.extract_file_changes(
+            mock_repo, mock_commit, old_tree_id
+        )
 
-    mock_diff_output = (
-        b"diff --git a/src/file1.txt b/src/file1.txt\n"
-        b"--- a/src/file1.txt\n"
-        b"+++ b/src/file1.txt\n"
-        b"@@ -1 +1 @@\n"
-        b"-old\n"
-        b"+new\n"
-    ).decode("utf-8")
-
-    with patch("dulwich.patch.write_object_diff") as mock_write_object_diff:
-
-        def side_effect(stream, *args, **kwargs):
-            stream.write(mock_diff_output.encode("utf-8"))
-
-        mock_write_object_diff.side_effect = side_effect
-
-        mock_tree_changes_list = [
-            create_mock_tree_change(
-                type="modify", old_path=b"src/file1.txt", new_path=b"src/file1.txt"
-            ),
-            create_mock_tree_change(
-                type="modify", old_path=b"test/file2.txt", new_path=b"test/file2.txt"
-            ),
-        ]
-        with patch("dulwich.diff_tree.tree_changes") as mock_tree_changes:
-            mock_tree_changes.return_value = mock_tree_changes_list
-
-            # Act
-            file_changes = parser.extract_file_changes(
-                mock_repo, mock_commit, old_tree_id
-            )
-
-            # Assert
-            _assert_file_changes(file_changes, 1, "src/file1.txt", "M", 1, 1)
+        # Assert
+        _assert_file_changes(file_changes, 1, "src/file1.txt", "M", 1, 1)
 
 
 def test_extract_file_changes_with_path_exclude_filter(mock_repo, mock_commit):
     # Arrange
     old_tree_id = b"old_tree_sha"
     parser = DulwichDiffParser(exclude_paths=["test/"])
+    mock_repo.get_object.side_effect = lambda sha: create_mock_blob(sha, "old\n" if sha.startswith(b"old") else "new\n")
+
+    mock_tree_changes_list = [
+        create_mock_tree_change(
+            type="modify", old_path=b"src/file1.txt", new_path=b"src/file1.txt", old_sha=b"old1", new_sha=b"new1"
+        ),
+        create_mock_tree_change(
+            type="modify", old_path=b"test/file2.txt", new_path=b"test/file2.txt", old_sha=b"old2", new_sha=b"new2"
+        ),
+    ]
+    with patch("dulwich.diff_tree.tree_changes") as mock_tree_changes:
+        mock_tree_changes.return_value = mock_tree_changes_list
+
+        # Act
+        file_changes = parser.extract_file_changes(
+            mock_repo, mock_commit, old_tree_id
+        )
 
-    mock_diff_output = (
-        b"diff --git a/src/file1.txt b/src/file1.txt\n"
-        b"--- a/src/file1.txt\n"
-        b"+++ b/src/file1.txt\n"
-        b"@@ -1 +1 @@\n"
-        b"-old\n"
-        b"+new\n"
-    ).decode("utf-8")
-
-    with patch("dulwich.patch.write_object_diff") as mock_write_object_diff:
-
-        def side_effect(stream, *args, **kwargs):
-            stream.write(mock_diff_output.encode("utf-8"))
-
-        mock_write_object_diff.side_effect = side_effect
-
-        mock_tree_changes_list = [
-            create_mock_tree_change(
-                type="modify", old_path=b"src/file1.txt", new_path=b"src/file1.txt"
-            ),
-            create_mock_tree_change(
-                type="modify", old_path=b"test/file2.txt", new_path=b"test/file2.txt"
-            ),
-        ]
-        with patch("dulwich.diff_tree.tree_changes") as mock_tree_changes:
-            mock_tree_changes.return_value = mock_tree_changes_list
-
-            # Act
-            file_changes = parser.extract_file_changes(
-                mock_repo, mock_commit, old_tree_id
-            )
-
-            # Assert
-            _assert_file_changes(file_changes, 1, "src/file1.txt", "M", 1, 1)
+        # Assert
+        _assert_file_changes(file_changes, 1, "src/file1.txt", "M", 1, 1)
 
 
 def test_extract_file_changes_empty_diff(mock_repo, mock_commit):
@@ -290,4 +247,65 @@ def test_extract_file_changes_empty_diff(mock_repo, mock_commit):
             )
 
             # Assert
-            assert len(file_changes) == 0
\ No newline at end of file
+            assert len(file_changes) == 0
+
+@pytest.mark.parametrize(
+    "data, expected",
+    [
+        (b"", 0),
+        (b"one\n", 1),
+        (b"one\ntwo", 2),
+        (b"one\r\ntwo\r\n", 2),
+        (b"\x89PNG\r\n\x1a\n\x00\x00\n", 0),
+    ],
+)
+def test_count_blob_lines(data, expected):
+    assert count_blob_lines(data) == expected
+
+
+def test_added_and_deleted_blobs_are_counted_once(mock_repo, mock_commit):
+    parser = DulwichDiffParser(blob_line_counts=BlobLineCountCache())
+    mock_repo.get_object.return_value = create_mock_blob(b"vendored_sha", "a\nb\nc\n")
+    changes = [
+        create_mock_tree_change(type="add", new_path=b"vendor/lib.js", new_sha=b"vendored_sha"),
+        create_mock_tree_change(type="add", new_path=b"other/lib.js", new_sha=b"vendored_sha"),
+        create_mock_tree_change(type="delete", old_path=b"old/lib.js", old_sha=b"vendored_sha"),
+    ]
+
+    with patch("dulwich.diff_tree.tree_changes", return_value=changes):
+        file_changes = parser.extract_file_changes(mock_repo, mock_commit, b"old_tree_sha")
+
+    assert [(fc.additions, fc.deletions) for fc in file_changes] == [(3, 0), (3, 0), (0, 3)]
+    mock_repo.get_object.assert_called_once_with(b"vendored_sha")
+    assert parser.blob_line_counts.cache_info() == (2, 1, 100_000, 1)
+
+
+@pytest.mark.parametrize("max_aligned_lines", [10_000, 4])
+def test_count_line_changes(max_aligned_lines):
+    old = [b"a\n", b"b\n", b"c\n", b"d\n", b"e\n"]
+    new = [b"a\n", b"B\n", b"c\n", b"d\n", b"d2\n", b"e"]
+
+    # b -> B, a line added after d, and e lost its newline.
+    assert count_line_changes(old, new, max_aligned_lines) == (3, 2)
+    assert count_line_changes(old, old, max_aligned_lines) == (0, 0)
+    assert count_line_changes([], new, max_aligned_lines) == (6, 0)
+    assert count_line_changes(old[:2], old, max_aligned_lines) == (3, 0)
+
+
+def test_moved_lines_beyond_alignment_limit_count_as_unchanged():
+    old = [b"a\n", b"b\n", b"c\n"]
+    new = [b"c\n", b"a\n", b"b\n"]
+
+    assert count_line_changes(old, new) == (1, 1)
+    assert count_line_changes(old, new, max_aligned_lines=2) == (0, 0)
+
+
+def test_binary_modifications_have_no_line_counts(mock_repo, mock_commit):
+    parser = DulwichDiffParser()
+    mock_repo.get_object.side_effect = lambda sha: create_mock_blob(sha, "\x00" + sha.decode())
+    change = create_mock_tree_change(type="modify", old_path=b"a.bin", new_path=b"a.bin", old_sha=b"1", new_sha=b"2")
+
+    with patch("dulwich.diff_tree.tree_changes", return_value=[change]):
+        file_changes = parser.extract_file_changes(mock_repo, mock_commit, b"old_tree_sha")
+
+    _assert_file_changes(file_changes, 1, "a.bin", "M", 0, 0)
@@ -0,0 +1,71 @@
+import pytest
+from dulwich.object_store import iter_tree_contents
+from dulwich.objects import Blob
+from dulwich.repo import Repo
+
+from git2df.dulwich.backend import DulwichRemoteBackend
+from git2df.dulwich.mirror_cache import MirrorCache
+from tests.fixtures.git_commands import entry_summary, git
+
+
+@pytest.fixture
+def served_repo(git_daemon, tmp_path):
+    """src/ and docs/ changing in every commit, with a rename in src/; served with filter support."""
+    work = tmp_path / "work"
+    served = git_daemon.base_path / "project.git"
+    git(tmp_path, "init", "-q", "-b", "main", str(work))
+    for i in range(1, 6):
+        (work / "src").mkdir(exist_ok=True)
+        (work / "docs").mkdir(exist_ok=True)
+        (work / "src" / "main.py").write_text("".join(f"line {n}\n" for n in range(i * 3)))
+        (work / "docs" / f"page{i}.md").write_text(f"# Page {i}\n" + "text\n" * 50)
+        git(work, "add", ".")
+        git(work, "commit", "-q", "-m", f"Commit {i}")
+    git(work, "mv", "src/main.py", "src/app.py")
+    git(work, "commit", "-q", "-m", "Rename main.py")
+    git(tmp_path, "clone", "-q", "--bare", str(work), str(served))
+    git(served, "config", "uploadpack.allowFilter", "true")
+    return git_daemon.url("project.git")
+
+
+def _blob_paths(mirror_dir, url):
+    """Paths, across the history, of the file versions the mirror has blobs for."""
+    repo = Repo(MirrorCache(mirror_dir).mirror_path(url))
+    try:
+        paths = set()
+        for entry in repo.get_walker():
+            for tree_entry in iter_tree_contents(repo.object_store, entry.commit.tree):
+                if tree_entry.sha in repo.object_store and isinstance(repo[tree_entry.sha], Blob):
+                    paths.add(tree_entry.path.decode())
+        return paths
+    finally:
+        repo.close()
+
+
+@pytest.mark.parametrize("rename_detection", ["off", "renames"])
+def test_partial_clone_matches_a_full_fetch(served_repo, tmp_path, rename_detection):
+    full = DulwichRemoteBackend(served_repo, "main", rename_detection=rename_detection).get_log_entries()
+
+    partial = DulwichRemoteBackend(
+        served_repo, "main", rename_detection=rename_detection, partial_clone=True, mirror_cache_dir=str(tmp_path / "m")
+    ).get_log_entries()
+
+    assert [e.commit_hash for e in partial] == [e.commit_hash for e in full]
+    assert entry_summary(partial) == entry_summary(full)
+
+
+def test_partial_clone_fetches_only_blobs_under_the_path_filters(served_repo, tmp_path):
+    mirror_dir = str(tmp_path / "mirrors")
+    full = DulwichRemoteBackend(served_repo, "main").get_log_entries(include_paths=["src/"])
+
+    partial = DulwichRemoteBackend(served_repo, "main", partial_clone=True, mirror_cache_dir=mirror_dir).get_log_entries(
+        include_paths=["src/"]
+    )
+
+    assert [e.commit_hash for e in partial] == [e.commit_hash for e in full]
+    assert entry_summary(partial) == entry_summary(full)
+    assert _blob_paths(mirror_dir, served_repo) == {"src/main.py", "src/app.py"}
+
+    # Later runs on the mirror fetch the blobs they lack, even without partial_clone.
+    docs = DulwichRemoteBackend(served_repo, "main", mirror_cache_dir=mirror_dir).get_log_entries(include_paths=["docs/"])
+    assert [fc.additions for entry in docs for fc in entry.file_changes] == [51] * 5
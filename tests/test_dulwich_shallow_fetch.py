@@ -0,0 +1,83 @@
+import pytest
+from dulwich.repo import Repo
+
+from git2df.dulwich.backend import DulwichRemoteBackend
+from git2df.dulwich.mirror_cache import MirrorCache
+from tests.fixtures.git_commands import entry_summary, git
+
+# One commit on the first of each month of 2023, January to October.
+MONTHS = range(1, 11)
+
+
+@pytest.fixture
+def monthly_repo(git_daemon, tmp_path):
+    work = tmp_path / "work"
+    served = git_daemon.base_path / "monthly.git"
+    git(tmp_path, "init", "-q", "--bare", "-b", "main", str(served))
+    git(tmp_path, "init", "-q", "-b", "main", str(work))
+    for month in MONTHS:
+        with open(work / "log.txt", "a") as f:
+            f.write(f"month {month}\n")
+        (work / f"month{month}.txt").write_text("x\n" * month)
+        git(work, "add", ".")
+        git(work, "commit", "-q", "-m", f"Month {month}", date=f"2023-{month:02d}-01T12:00:00+00:00")
+    git(work, "push", "-q", str(served), "main")
+    return git_daemon.url("monthly.git")
+
+
+def _fetched_messages(mirror_dir, url):
+    repo = Repo(MirrorCache(mirror_dir).mirror_path(url))
+    try:
+        tip = repo.refs[b"refs/heads/main"]
+        return [entry.commit.message.decode().strip() for entry in repo.get_walker(include=[tip])], repo.get_shallow()
+    finally:
+        repo.close()
+
+
+def test_since_fetches_only_the_window_and_its_parents(monthly_repo, tmp_path):
+    mirror_dir = str(tmp_path / "mirrors")
+    full = DulwichRemoteBackend(monthly_repo, "main", shallow_since_margin=None).get_log_entries(since="2023-08-15")
+
+    entries = DulwichRemoteBackend(monthly_repo, "main", mirror_cache_dir=mirror_dir).get_log_entries(since="2023-08-15")
+
+    assert entry_summary(entries) == entry_summary(full)
+    assert [message for message, _ in entry_summary(entries)] == ["Month 10", "Month 9"]
+    # September is diffed against August, so August is fetched too, but nothing older.
+    assert entry_summary(entries)[1][1] == [("log.txt", 1, 0, "M"), ("month9.txt", 9, 0, "A")]
+    messages, shallow = _fetched_messages(mirror_dir, monthly_repo)
+    assert messages == ["Month 10", "Month 9", "Month 8"]
+    assert len(shallow) == 1
+
+
+def test_mirror_is_deepened_and_unshallowed_as_needed(monthly_repo, tmp_path):
+    mirror_dir = str(tmp_path / "mirrors")
+
+    def run(**kwargs):
+        backend = DulwichRemoteBackend(monthly_repo, "main", mirror_cache_dir=mirror_dir)
+        return [message for message, _ in entry_summary(backend.get_log_entries(**kwargs))]
+
+    assert run(since="2023-09-15") == ["Month 10"]
+    assert run(since="2023-06-15") == ["Month 10", "Month 9", "Month 8", "Month 7"]
+    messages, shallow = _fetched_messages(mirror_dir, monthly_repo)
+    assert messages[-1] == "Month 6" and len(shallow) == 1
+
+    assert run() == [f"Month {month}" for month in reversed(MONTHS)]
+    messages, shallow = _fetched_messages(mirror_dir, monthly_repo)
+    assert len(messages) == len(MONTHS) and not shallow
+
+
+def test_commits_unshallowed_by_a_later_run_are_diffed_against_their_parents(monthly_repo, tmp_path):
+    mirror_dir = str(tmp_path / "mirrors")
+    DulwichRemoteBackend(monthly_repo, "main", mirror_cache_dir=mirror_dir).get_log_entries(since="2023-09-15")
+    assert _fetched_messages(mirror_dir, monthly_repo)[0] == ["Month 10", "Month 9"]
+
+    # Month 9 was on the shallow boundary when the mirror was opened; treating it as
+    # a root commit would end the walk there and report log.txt as added.
+    entries = DulwichRemoteBackend(monthly_repo, "main", mirror_cache_dir=mirror_dir).get_log_entries()
+
+    assert entry_summary(entries)[1] == ("Month 9", [("log.txt", 1, 0, "M"), ("month9.txt", 9, 0, "A")])
+    assert entry_summary(entries) == entry_summary(DulwichRemoteBackend(monthly_repo, "main").get_log_entries())
+
+
+def test_since_after_the_last_commit(monthly_repo):
+    assert DulwichRemoteBackend(monthly_repo, "main").get_log_entries(since="2024-06-01") == []
@@ -109,7 +109,7 @@ def test_get_commits_df_with_all_filters(
     )
 
     # Assertions
-    mock_get_git_backend.assert_called_once_with(repo_path, None, "main", None, local_backend_type)
+    mock_get_git_backend.assert_called_once_with(repo_path, None, "main", None, local_backend_type, "per_commit", 1, False, None, None)
     mock_backend_instance.get_log_entries.assert_called_once_with(
         log_args=None,
         since=since_arg,
@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from git2df import get_commits_df, get_commits_table
+from git2df.arrow_builder import (
+    COMMITS_SCHEMA,
+    build_commits_table,
+    commits_table_to_df,
+    iter_commits_record_batches,
+)
+from git2df.dataframe_builder import build_commits_df
+from git2df.git_parser import FileChange, GitLogEntry
+from tests.conftest import sample_commits
+
+
+def _entries():
+    return [
+        GitLogEntry(
+            commit_hash="commit1hash",
+            parent_hashes=["parent1hash"],
+            author_name="Author One",
+            author_email="author1@example.com",
+            commit_date=datetime(2023, 1, 1, 12, 0, 0, tzinfo=timezone(timedelta(hours=2))),
+            commit_timestamp=1672567200,
+            commit_message="Subject 1",
+            file_changes=[
+                FileChange("file1.txt", 10, 5, "M"),
+                FileChange("new.py", 2, 1, "R", old_file_path="old.py"),
+            ],
+        ),
+        GitLogEntry(
+            commit_hash="mergehash",
+            parent_hashes=["commit1hash", "otherhash"],
+            author_name="Author Two",
+            author_email="author2@example.com",
+            commit_date=datetime(2023, 1, 2, 10, 0, 0, tzinfo=timezone.utc),
+            commit_timestamp=1672653600,
+            commit_message="Merge",
+            file_changes=[],
+        ),
+    ]
+
+
+def test_build_commits_table_schema_and_values():
+    table = build_commits_table(_entries())
+
+    assert table.schema == COMMITS_SCHEMA
+    assert table.column("additions").type == pa.int32()
+    assert pa.types.is_dictionary(table.column("author_name").type)
+    assert table.column("commit_hash").to_pylist() == ["commit1hash", "commit1hash", "mergehash"]
+    assert table.column("parent_hashes").to_pylist()[2] == ["commit1hash", "otherhash"]
+    # Dates are normalized to UTC.
+    assert table.column("commit_date").to_pylist()[0] == datetime(2023, 1, 1, 10, 0, 0, tzinfo=timezone.utc)
+    assert table.column("additions").to_pylist() == [10, 2, 0]
+    assert table.column("deletions").to_pylist() == [5, 1, 0]
+    # A commit without file changes keeps nulls rather than placeholder strings.
+    assert table.column("file_paths").to_pylist() == ["file1.txt", "new.py", None]
+    assert table.column("old_file_path").to_pylist() == [None, "old.py", None]
+
+
+def test_build_commits_table_empty_input():
+    table = build_commits_table([])
+
+    assert table.num_rows == 0
+    assert table.schema == COMMITS_SCHEMA
+
+
+def test_record_batches_keep_commits_whole():
+    batches = list(iter_commits_record_batches(_entries(), batch_size=1))
+
+    # The first commit's two rows stay together even though the batch size is 1.
+    assert [batch.num_rows for batch in batches] == [2, 1]
+    assert all(batch.schema == COMMITS_SCHEMA for batch in batches)
+
+
+def test_record_batches_invalid_batch_size():
+    with pytest.raises(ValueError, match="batch_size must be at least 1"):
+        list(iter_commits_record_batches(_entries(), batch_size=0))
+
+
+def test_commits_table_to_df_matches_build_commits_df():
+    df = commits_table_to_df(build_commits_table(_entries()))
+    expected = build_commits_df(_entries())
+
+    assert list(df.columns) == list(expected.columns)
+    assert not any(isinstance(dtype, pd.CategoricalDtype) for dtype in df.dtypes)
+    for column in ["commit_hash", "author_name", "file_paths", "change_type", "old_file_path", "additions", "deletions"]:
+        assert df[column].tolist() == expected[column].tolist()
+    assert list(df["commit_date"]) == [pd.Timestamp(d).tz_convert("UTC") for d in expected["commit_date"]]
+
+
+@pytest.mark.parametrize("git_repo", [sample_commits], indirect=True)
+def test_get_commits_table_matches_get_commits_df(git_repo):
+    table = get_commits_table(repo_path=git_repo, batch_size=2)
+    df = get_commits_df(repo_path=git_repo)
+
+    assert table.num_rows == len(df)
+    assert table.column("commit_hash").num_chunks > 1
+    assert table.column("commit_hash").to_pylist() == df["commit_hash"].tolist()
+    assert table.column("additions").to_pylist() == df["additions"].tolist()
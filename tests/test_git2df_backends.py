@@ -1,6 +1,8 @@
+import pytest
+import subprocess
 from unittest.mock import patch, MagicMock
 from git2df.backends import GitCliBackend
-from typing import List, Any
+from typing import List, Any, Tuple
 
 def _format_path_filters_for_assertion(raw_path_filters: List[str], is_exclude_test: bool = False) -> List[str]:
     """
@@ -18,84 +20,44 @@ def _format_path_filters_for_assertion(raw_path_filters: List[str], is_exclude_t
                 formatted_filters.append(p)
     return formatted_filters
 
-def _setup_mock_subprocess_run_side_effect(rev_list_stdout: str, metadata_stdout: str, numstat_stdout: str, name_status_stdout: str, num_commits: int = 1) -> List[MagicMock]:
-    side_effect = [MagicMock(stdout=rev_list_stdout)]
-    for _ in range(num_commits):
-        side_effect.extend([
-            MagicMock(stdout=metadata_stdout),
-            MagicMock(stdout=numstat_stdout),
-            MagicMock(stdout=name_status_stdout),
-        ])
-    return side_effect
-
-def _assert_metadata_call(call_args: Any, commit_hash: str, repo_path: str, expected_path_filters: List[str], is_exclude_test: bool) -> None:
-    args, kwargs = call_args
-    assert args[0][:4] == ["git", "show", commit_hash, "--no-patch"]
-    assert "--pretty=format:@@@COMMIT@@@%H@@@FIELD@@@%P@@@FIELD@@@%an@@@FIELD@@@%ae@@@FIELD@@@%ad%x09%at@@@FIELD@@@---MSG_START---%s---MSG_END---" in args[0]
+def _diff_tree_commit(commit_hash: str, parents: str, author_name: str, author_email: str, date: str, timestamp: int, subject: str, files: List[Tuple[str, str, str, str]]) -> bytes:
+    """Renders one commit the way 'git diff-tree --stdin -z --raw --numstat' prints it; files are (status, additions, deletions, path)."""
+    header = "\0".join([commit_hash, parents, author_name, author_email, date, str(timestamp), subject]) + "\0"
+    if not files:
+        return header.encode()
+    raw = "".join(f":100644 100644 1111111 2222222 {status}\0{path}\0" for status, _, _, path in files)
+    numstat = "".join(f"{added}\t{deleted}\t{path}\0" for _, added, deleted, path in files)
+    return f"{header}\n{raw}{numstat}".encode()
+
+def _setup_mock_diff_tree(mock_popen: MagicMock, *commits: bytes) -> MagicMock:
+    process = mock_popen.return_value
+    process.stdout.read.side_effect = [b"\0".join(commits), b""]
+    process.wait.return_value = 0
+    process.poll.return_value = 0
+    return process
+
+def _assert_diff_tree_call(mock_popen: MagicMock, commit_hashes: List[str], repo_path: str, expected_path_filters: List[str], is_exclude_test: bool) -> None:
+    mock_popen.assert_called_once()
+    args, kwargs = mock_popen.call_args
+    assert args[0][:3] == ["git", "diff-tree", "--stdin"]
+    assert "--root" in args[0] and "--always" in args[0]
+    assert "-z" in args[0] and "--raw" in args[0] and "--numstat" in args[0]
     assert "--date=iso-strict" in args[0]
-    # Construct the expected path filter arguments
     expected_filter_args = _format_path_filters_for_assertion(expected_path_filters, is_exclude_test=is_exclude_test)
-
-    # Assert that the constructed filter arguments are present in the call
-    for filter_arg in expected_filter_args:
-        assert filter_arg in args[0]
+    if expected_filter_args:
+        assert args[0][-len(expected_filter_args):] == expected_filter_args
     assert kwargs["cwd"] == repo_path
+    assert kwargs["stdin"] == subprocess.PIPE
 
-def _assert_numstat_call(call_args: Any, commit_hash: str, repo_path: str, expected_path_filters: List[str], is_exclude_test: bool) -> None:
-    args, kwargs = call_args
-    assert args[0][:5] == ["git", "diff-tree", "-r", "--numstat", commit_hash]
-    # Construct the expected path filter arguments
-    expected_filter_args = _format_path_filters_for_assertion(expected_path_filters, is_exclude_test=is_exclude_test)
-
-    for filter_arg in expected_filter_args:
-        assert filter_arg in args[0]
-    assert kwargs["cwd"] == repo_path
+    # Every commit hash is piped into the same process, one per line.
+    stdin = mock_popen.return_value.stdin
+    assert b"".join(c.args[0] for c in stdin.write.call_args_list) == "".join(f"{h}\n" for h in commit_hashes).encode()
+    stdin.close.assert_called_once()
 
-def _assert_name_status_call(call_args: Any, commit_hash: str, repo_path: str, expected_path_filters: List[str], is_exclude_test: bool) -> None:
-    args, kwargs = call_args
-    assert args[0][:5] == ["git", "diff-tree", "-r", "--name-status", commit_hash]
-    # Construct the expected path filter arguments
-    expected_filter_args = _format_path_filters_for_assertion(expected_path_filters, is_exclude_test=is_exclude_test)
-
-    for filter_arg in expected_filter_args:
-        assert filter_arg in args[0]
-    assert kwargs["cwd"] == repo_path
-
-def _assert_git_show_call(call_args: Any, commit_hash: str, repo_path: str, expected_path_filters: List[str], expected_flags: List[str]) -> None:
-    args, kwargs = call_args
-    assert args[0][0] == "git"
-    assert args[0][1] == "show"
-    assert args[0][2] == commit_hash
-    for flag in expected_flags:
-        assert flag in args[0]
-    # Construct the expected path filter arguments
-    expected_filter_args = _format_path_filters_for_assertion(expected_path_filters, is_exclude_test=True)
-
-    for filter_arg in expected_filter_args:
-        assert filter_arg in args[0]
-    assert kwargs["cwd"] == repo_path
-
-def _assert_git_diff_tree_numstat_call(call_args: Any, commit_hash: str, repo_path: str, expected_path_filters: List[str]) -> None:
-    args, kwargs = call_args
-    # Construct the expected path filter arguments for assertion
-    expected_filter_args = _format_path_filters_for_assertion(expected_path_filters, is_exclude_test=True)
-
-    for filter_arg in expected_filter_args:
-        assert filter_arg in args[0]
-    assert kwargs["cwd"] == repo_path
-
-def _assert_git_diff_tree_name_status_call(call_args: Any, commit_hash: str, repo_path: str, expected_path_filters: List[str]) -> None:
-    args, kwargs = call_args
-    assert args[0][:5] == ["git", "diff-tree", "-r", "--name-status", commit_hash]
-    # Construct the expected path filter arguments for assertion
-    expected_filter_args = _format_path_filters_for_assertion(expected_path_filters, is_exclude_test=True)
-
-    for filter_arg in expected_filter_args:
-        assert filter_arg in args[0]
-    assert kwargs["cwd"] == repo_path
-
-def _assert_subprocess_calls(mock_subprocess_run: MagicMock, repo_path: str, expected_rev_list_args: List[str], expected_path_filters_raw: List[str], num_commits: int = 1, num_git_config_calls: int = 0) -> None:
-    assert mock_subprocess_run.call_count == num_git_config_calls + 1 + (num_commits * 3)
+def _assert_subprocess_calls(mock_subprocess_run: MagicMock, mock_popen: MagicMock, repo_path: str, expected_rev_list_args: List[str], expected_path_filters_raw: List[str], num_commits: int = 1, num_git_config_calls: int = 0) -> None:
+    # Only the rev-list (and any 'git config' lookups) fork a process per call;
+    # the commits themselves all go through one diff-tree process.
+    assert mock_subprocess_run.call_count == num_git_config_calls + 1
 
     # Construct the expected rev-list command arguments
     is_exclude = any(":(" in p for p in expected_path_filters_raw)
@@ -110,22 +72,20 @@ def _assert_subprocess_calls(mock_subprocess_run: MagicMock, repo_path: str, exp
     assert kwargs0["check"] is True
     assert kwargs0["encoding"] == "utf-8"
 
-    for i in range(num_commits):
-        commit_hash = f"commit{i+1}hash"
-        _assert_metadata_call(mock_subprocess_run.call_args_list[num_git_config_calls + 1 + (i * 3)], commit_hash, repo_path, expected_path_filters_raw, is_exclude_test=is_exclude)
-        _assert_numstat_call(mock_subprocess_run.call_args_list[num_git_config_calls + 2 + (i * 3)], commit_hash, repo_path, expected_path_filters_raw, is_exclude_test=is_exclude)
-        _assert_name_status_call(mock_subprocess_run.call_args_list[num_git_config_calls + 3 + (i * 3)], commit_hash, repo_path, expected_path_filters_raw, is_exclude_test=is_exclude)
+    commit_hashes = [f"commit{i+1}hash" for i in range(num_commits)]
+    _assert_diff_tree_call(mock_popen, commit_hashes, repo_path, expected_path_filters_raw, is_exclude_test=is_exclude)
+
+
+_COMMIT1 = _diff_tree_commit("commit1hash", "parent1hash", "Author One", "author1@example.com", "2023-01-01T10:00:00+00:00", 1672531200, "Subject 1", [("M", "10", "5", "file1.txt")])
 
 
 @patch("git2df.backends.GitCliBackend._get_default_branch", return_value="main")
+@patch("subprocess.Popen")
 @patch("subprocess.run")
-def test_get_log_entries_no_filters_cli(mock_subprocess_run, mock_get_default_branch):
+def test_get_log_entries_no_filters_cli(mock_subprocess_run, mock_popen, mock_get_default_branch):
     # Arrange
-    rev_list_stdout = "commit1hash\n"
-    metadata_stdout = "@@@COMMIT@@@commit1hash@@@FIELD@@@parent1hash@@@FIELD@@@Author One@@@FIELD@@@author1@example.com@@@FIELD@@@2023-01-01T10:00:00+00:00\t1672531200@@@FIELD@@@---MSG_START---Subject 1---MSG_END---"
-    numstat_stdout = "10\t5\tfile1.txt\n"
-    name_status_stdout = "M\tfile1.txt\n"
-    mock_subprocess_run.side_effect = _setup_mock_subprocess_run_side_effect(rev_list_stdout, metadata_stdout, numstat_stdout, name_status_stdout)
+    mock_subprocess_run.side_effect = [MagicMock(stdout="commit1hash\n")]
+    _setup_mock_diff_tree(mock_popen, _COMMIT1)
 
     repo_path = "/test/repo"
     backend = GitCliBackend(repo_path)
@@ -149,18 +109,16 @@ def test_get_log_entries_no_filters_cli(mock_subprocess_run, mock_get_default_br
         "change_type": "M",
     }
     _assert_log_entry(log_entries[0], expected_values)
-    _assert_subprocess_calls(mock_subprocess_run, repo_path, [], [], num_git_config_calls=0)
+    _assert_subprocess_calls(mock_subprocess_run, mock_popen, repo_path, [], [], num_git_config_calls=0)
 
 
 @patch("git2df.backends.GitCliBackend._get_default_branch", return_value="main")
+@patch("subprocess.Popen")
 @patch("subprocess.run")
-def test_get_log_entries_with_filters_cli(mock_subprocess_run, mock_get_default_branch):
+def test_get_log_entries_with_filters_cli(mock_subprocess_run, mock_popen, mock_get_default_branch):
     # Arrange
-    rev_list_stdout = "commit1hash\n"
-    metadata_stdout = "@@@COMMIT@@@commit1hash@@@FIELD@@@parent1hash@@@FIELD@@@Author One@@@FIELD@@@author1@example.com@@@FIELD@@@2023-01-01T10:00:00+00:00\t1672531200@@@FIELD@@@---MSG_START---Subject 1---MSG_END---"
-    numstat_stdout = "10\t5\tfile1.txt\n"
-    name_status_stdout = "M\tfile1.txt\n"
-    mock_subprocess_run.side_effect = _setup_mock_subprocess_run_side_effect(rev_list_stdout, metadata_stdout, numstat_stdout, name_status_stdout)
+    mock_subprocess_run.side_effect = [MagicMock(stdout="commit1hash\n")]
+    _setup_mock_diff_tree(mock_popen, _COMMIT1)
 
     repo_path = "/test/repo"
     backend = GitCliBackend(repo_path)
@@ -193,26 +151,19 @@ def test_get_log_entries_with_filters_cli(mock_subprocess_run, mock_get_default_
     expected_rev_list_args = [
         "--since", since, "--until", until, "--grep", grep, "--author", author
     ]
-    _assert_subprocess_calls(mock_subprocess_run, repo_path, expected_rev_list_args, [], num_git_config_calls=0)
+    _assert_subprocess_calls(mock_subprocess_run, mock_popen, repo_path, expected_rev_list_args, [], num_git_config_calls=0)
 
 
 @patch("git2df.backends.GitCliBackend._get_default_branch", return_value="main")
+@patch("subprocess.Popen")
 @patch("subprocess.run")
-def test_get_log_entries_with_me_cli(mock_subprocess_run, mock_get_default_branch):
+def test_get_log_entries_with_me_cli(mock_subprocess_run, mock_popen, mock_get_default_branch):
     # Arrange
-    rev_list_stdout = "commit1hash\n"
-    metadata_stdout = "@@@COMMIT@@@commit1hash@@@FIELD@@@parent1hash@@@FIELD@@@Author One@@@FIELD@@@author1@example.com@@@FIELD@@@2023-01-01T10:00:00+00:00\t1672531200@@@FIELD@@@---MSG_START---Subject 1---MSG_END---"
-    numstat_stdout = "10\t5\tfile1.txt\n"
-    name_status_stdout = "M\tfile1.txt\n"
-
     mock_subprocess_run.side_effect = [
-        MagicMock(stdout="Test User\n"), # git config --global user.name
-        MagicMock(stdout="test@example.com\n"), # git config --global user.email
-        MagicMock(stdout=rev_list_stdout), # git rev-list
-        MagicMock(stdout=metadata_stdout), # git show (metadata)
-        MagicMock(stdout=numstat_stdout), # git diff-tree --numstat
-        MagicMock(stdout=name_status_stdout), # git diff-tree --name-status
+        MagicMock(stdout="user.name Test User\nuser.email test@example.com\n"), # git config --global --get-regexp
+        MagicMock(stdout="commit1hash\n"), # git rev-list
     ]
+    _setup_mock_diff_tree(mock_popen, _COMMIT1)
 
     repo_path = "/test/repo"
     backend = GitCliBackend(repo_path)
@@ -239,25 +190,21 @@ def test_get_log_entries_with_me_cli(mock_subprocess_run, mock_get_default_branc
     expected_rev_list_args = [
         "--author", "Test User", "--author", "test@example.com"
     ]
-    _assert_subprocess_calls(mock_subprocess_run, repo_path, expected_rev_list_args, [], num_git_config_calls=2)
+    _assert_subprocess_calls(mock_subprocess_run, mock_popen, repo_path, expected_rev_list_args, [], num_git_config_calls=1)
+    assert mock_subprocess_run.call_args_list[0][0][0][:3] == ["git", "config", "--global"]
 
 
 @patch("git2df.backends.GitCliBackend._get_default_branch", return_value="main")
+@patch("git2df.backends.GitCliBackend._stream_git_command")
 @patch("git2df.backends.GitCliBackend._run_git_command")
-def test_get_log_entries_with_merges(mock_run_git_command, mock_get_default_branch):
+def test_get_log_entries_with_merges(mock_run_git_command, mock_stream_git_command, mock_get_default_branch):
     # Arrange
-    rev_list_stdout = "commit1hash\n"
-    metadata_stdout = "@@@COMMIT@@@commit1hash@@@FIELD@@@parent1hash@@@FIELD@@@Author One@@@FIELD@@@author1@example.com@@@FIELD@@@2023-01-01T10:00:00+00:00\t1672531200@@@FIELD@@@---MSG_START---Merge commit---MSG_END---"
-    numstat_stdout = "10\t5\tfile1.txt\n"
-    name_status_stdout = "M\tfile1.txt\n"
-
     mock_run_git_command.side_effect = [
-        "* remote origin\n  Fetch URL: ...\n  Push  URL: ...\n  HEAD branch: main\n", # For git remote show origin
-        rev_list_stdout, # For git rev-list
-        metadata_stdout, # For git show (metadata)
-        numstat_stdout, # For git diff-tree --numstat
-        name_status_stdout, # For git diff-tree --name-status
+        "commit1hash\n", # For git rev-list
     ]
+    mock_stream_git_command.return_value = iter([
+        _diff_tree_commit("commit1hash", "parent1hash", "Author One", "author1@example.com", "2023-01-01T10:00:00+00:00", 1672531200, "Merge commit", [("M", "10", "5", "file1.txt")])
+    ])
     repo_path = "/test/repo"
     backend = GitCliBackend(repo_path)
 
@@ -282,26 +229,25 @@ def test_get_log_entries_with_merges(mock_run_git_command, mock_get_default_bran
     _assert_log_entry(log_entries[0], expected_values)
 
     # Assertions for mock_run_git_command calls
-    mock_run_git_command.assert_any_call(["git", "remote", "show", "origin"])
-    mock_run_git_command.assert_any_call(["git", "rev-list", "--all", "--merges", "origin/main"])
-    mock_run_git_command.assert_any_call(
-        ["git", "show", "commit1hash", "--no-patch", "--pretty=format:@@@COMMIT@@@%H@@@FIELD@@@%P@@@FIELD@@@%an@@@FIELD@@@%ae@@@FIELD@@@%ad%x09%at@@@FIELD@@@---MSG_START---%s---MSG_END---", "--date=iso-strict"]
-    )
-    mock_run_git_command.assert_any_call(["git", "diff-tree", "-r", "--numstat", "commit1hash"])
-    mock_run_git_command.assert_any_call(["git", "diff-tree", "-r", "--name-status", "commit1hash"])
+    mock_get_default_branch.assert_called_once()
+    mock_run_git_command.assert_called_once_with(["git", "rev-list", "--all", "--merges", "origin/main"])
 
-    assert mock_run_git_command.call_count == 5
+    mock_stream_git_command.assert_called_once()
+    cmd = mock_stream_git_command.call_args[0][0]
+    assert cmd[:3] == ["git", "diff-tree", "--stdin"]
+    assert mock_stream_git_command.call_args[1] == {"text": False, "input_lines": ["commit1hash"]}
 
 
 @patch("git2df.backends.GitCliBackend._get_default_branch", return_value="main")
+@patch("subprocess.Popen")
 @patch("subprocess.run")
-def test_get_log_entries_with_paths(mock_subprocess_run, mock_get_default_branch):
+def test_get_log_entries_with_paths(mock_subprocess_run, mock_popen, mock_get_default_branch):
     # Arrange
-    rev_list_stdout = "commit1hash\n"
-    metadata_stdout = "@@@COMMIT@@@commit1hash@@@FIELD@@@parent1hash@@@FIELD@@@Author One@@@FIELD@@@author1@example.com@@@FIELD@@@2023-01-01T10:00:00+00:00\t1672531200@@@FIELD@@@---MSG_START---Subject 1---MSG_END---"
-    numstat_stdout = "10\t5\tsrc/file1.txt\n"
-    name_status_stdout = "M\tsrc/file1.txt\n"
-    mock_subprocess_run.side_effect = _setup_mock_subprocess_run_side_effect(rev_list_stdout, metadata_stdout, numstat_stdout, name_status_stdout)
+    mock_subprocess_run.side_effect = [MagicMock(stdout="commit1hash\n")]
+    _setup_mock_diff_tree(
+        mock_popen,
+        _diff_tree_commit("commit1hash", "parent1hash", "Author One", "author1@example.com", "2023-01-01T10:00:00+00:00", 1672531200, "Subject 1", [("M", "10", "5", "src/file1.txt")]),
+    )
 
     repo_path = "/test/repo"
     backend = GitCliBackend(repo_path)
@@ -327,7 +273,7 @@ def test_get_log_entries_with_paths(mock_subprocess_run, mock_get_default_branch
     }
     _assert_log_entry(log_entries[0], expected_values)
     expected_rev_list_args = []
-    _assert_subprocess_calls(mock_subprocess_run, repo_path, expected_rev_list_args, include_paths)
+    _assert_subprocess_calls(mock_subprocess_run, mock_popen, repo_path, expected_rev_list_args, include_paths)
 
 
 def _assert_log_entry_commit_metadata(entry: Any, expected_values: dict[str, Any]) -> None:
@@ -356,14 +302,12 @@ def _assert_log_entry(entry: Any, expected_values: dict[str, Any]) -> None:
 
 
 @patch("git2df.backends.GitCliBackend._get_default_branch", return_value="main")
+@patch("subprocess.Popen")
 @patch("subprocess.run")
-def test_get_log_entries_no_filters(mock_subprocess_run, mock_get_default_branch):
+def test_get_log_entries_no_filters(mock_subprocess_run, mock_popen, mock_get_default_branch):
     # Arrange
-    rev_list_stdout = "commit1hash\n"
-    metadata_stdout = "@@@COMMIT@@@commit1hash@@@FIELD@@@parent1hash@@@FIELD@@@Author One@@@FIELD@@@author1@example.com@@@FIELD@@@2023-01-01T10:00:00+00:00\t1672531200@@@FIELD@@@---MSG_START---Subject 1---MSG_END---"
-    numstat_stdout = "10\t5\tfile1.txt\n"
-    name_status_stdout = "M\tfile1.txt\n"
-    mock_subprocess_run.side_effect = _setup_mock_subprocess_run_side_effect(rev_list_stdout, metadata_stdout, numstat_stdout, name_status_stdout)
+    mock_subprocess_run.side_effect = [MagicMock(stdout="commit1hash\n")]
+    _setup_mock_diff_tree(mock_popen, _COMMIT1)
 
     repo_path = "/test/repo"
     backend = GitCliBackend(repo_path)
@@ -388,41 +332,25 @@ def test_get_log_entries_no_filters(mock_subprocess_run, mock_get_default_branch
     }
     _assert_log_entry(log_entries[0], expected_values)
 
-    _assert_subprocess_calls(mock_subprocess_run, repo_path, [], [])
+    _assert_subprocess_calls(mock_subprocess_run, mock_popen, repo_path, [], [])
 
 
 @patch("git2df.backends.GitCliBackend._get_default_branch", return_value="main")
+@patch("subprocess.Popen")
 @patch("subprocess.run")
 def test_get_log_entries_with_exclude_paths(
-    mock_subprocess_run, mock_get_default_branch
+    mock_subprocess_run, mock_popen, mock_get_default_branch
 ):
     # Arrange
     mock_subprocess_run.side_effect = [
-        # 1. git rev-list output
+        # git rev-list output
         MagicMock(stdout="commit1hash\ncommit2hash\n"),
-        # For commit1hash
-        # 2. git show for metadata
-        MagicMock(
-            stdout=(
-                "@@@COMMIT@@@commit1hash@@@FIELD@@@parenthash1@@@FIELD@@@Author One@@@FIELD@@@author1@example.com@@@FIELD@@@2023-01-01T10:00:00+00:00\t1672531200@@@FIELD@@@---MSG_START---Subject 1---MSG_END---"
-            )
-        ),
-        # 3. git diff-tree for numstat
-        MagicMock(stdout="10\t0\tsrc/main.py\n"),
-        # 4. git diff-tree for name-status
-        MagicMock(stdout="M\tsrc/main.py\n"),
-        # For commit2hash
-        # 5. git show for metadata
-        MagicMock(
-            stdout=(
-                "@@@COMMIT@@@commit2hash@@@FIELD@@@parenthash2@@@FIELD@@@Author Two@@@FIELD@@@author2@example.com@@@FIELD@@@2023-01-02T10:00:00+00:00\t1672617600@@@FIELD@@@---MSG_START---Subject 2---MSG_END---"
-            )
-        ),
-        # 6. git diff-tree for numstat
-        MagicMock(stdout="20\t0\ttests/test_main.py\n"),
-        # 7. git diff-tree for name-status
-        MagicMock(stdout="M\ttests/test_main.py\n"),
     ]
+    _setup_mock_diff_tree(
+        mock_popen,
+        _diff_tree_commit("commit1hash", "parenthash1", "Author One", "author1@example.com", "2023-01-01T10:00:00+00:00", 1672531200, "Subject 1", [("M", "10", "0", "src/main.py")]),
+        _diff_tree_commit("commit2hash", "parenthash2", "Author Two", "author2@example.com", "2023-01-02T10:00:00+00:00", 1672617600, "Subject 2", [("M", "20", "0", "tests/test_main.py")]),
+    )
 
     repo_path = "/test/repo"
     backend = GitCliBackend(repo_path)
@@ -464,7 +392,7 @@ def test_get_log_entries_with_exclude_paths(
     }
     _assert_log_entry(log_entries[1], expected_values_2)
 
-    assert mock_subprocess_run.call_count == 7
+    assert mock_subprocess_run.call_count == 1
 
     # Assertions for the first call (rev-list)
     args0, kwargs0 = mock_subprocess_run.call_args_list[0]
@@ -474,50 +402,201 @@ def test_get_log_entries_with_exclude_paths(
     assert f":(exclude){exclude_paths[0]}" in args0[0]
     assert kwargs0["cwd"] == repo_path
 
-    _assert_metadata_call(
-        mock_subprocess_run.call_args_list[1],
-        "commit1hash",
+    _assert_diff_tree_call(
+        mock_popen,
+        ["commit1hash", "commit2hash"],
         repo_path,
         exclude_paths,
         is_exclude_test=True,
     )
 
-    _assert_numstat_call(
-        mock_subprocess_run.call_args_list[2],
-        "commit1hash",
-        repo_path,
-        exclude_paths,
-        is_exclude_test=True,
-    )
 
-    _assert_name_status_call(
-        mock_subprocess_run.call_args_list[3],
-        "commit1hash",
-        repo_path,
-        exclude_paths,
-        is_exclude_test=True,
-    )
+@patch("subprocess.Popen")
+@patch("subprocess.run")
+def test_get_log_entries_no_commits_skips_diff_tree(mock_subprocess_run, mock_popen):
+    mock_subprocess_run.side_effect = [MagicMock(stdout="")]
 
-    _assert_metadata_call(
-        mock_subprocess_run.call_args_list[4],
-        "commit2hash",
-        repo_path,
-        exclude_paths,
-        is_exclude_test=True,
-    )
+    assert GitCliBackend("/test/repo").get_log_entries() == []
+    mock_popen.assert_not_called()
 
-    _assert_numstat_call(
-        mock_subprocess_run.call_args_list[5],
-        "commit2hash",
-        repo_path,
-        exclude_paths,
-        is_exclude_test=True,
+
+@patch("git2df.backends.GitCliBackend._stream_git_command")
+def test_get_log_entries_single_pass(mock_stream_git_command):
+    # Arrange
+    log_stdout = (
+        b"commit2hash\x00commit1hash\x00Author Two\x00author2@example.com\x002023-01-02T10:00:00+00:00\x001672653600\x00Subject 2\x00"
+        b"\n:100644 100644 1111111 2222222 M\x00file1.txt\x0010\t5\tfile1.txt\x00"
+        b"\x00commit1hash\x00\x00Author One\x00author1@example.com\x002023-01-01T10:00:00+00:00\x001672567200\x00Subject 1\x00"
+        b"\n:000000 100644 0000000 1111111 A\x00file1.txt\x003\t0\tfile1.txt\x00"
+    )
+    # Deliver the output in small pieces so fields straddle read boundaries.
+    mock_stream_git_command.return_value = iter(
+        [log_stdout[i : i + 7] for i in range(0, len(log_stdout), 7)]
     )
 
-    _assert_name_status_call(
-        mock_subprocess_run.call_args_list[6],
-        "commit2hash",
-        repo_path,
-        exclude_paths,
-        is_exclude_test=True,
+    repo_path = "/test/repo"
+    backend = GitCliBackend(repo_path, extraction_mode="single_pass")
+
+    # Act
+    log_entries = backend.get_log_entries(since="2023-01-01", include_paths=["file1.txt"])
+
+    # Assert
+    mock_stream_git_command.assert_called_once()
+    cmd = mock_stream_git_command.call_args[0][0]
+    assert mock_stream_git_command.call_args[1] == {"text": False}
+    assert cmd[:3] == ["git", "log", "--all"]
+    assert ["--since", "2023-01-01"] == cmd[3:5]
+    assert "-z" in cmd and "--raw" in cmd and "--numstat" in cmd and "--no-renames" in cmd
+    assert cmd[-2:] == ["--", "file1.txt"]
+
+    assert len(log_entries) == 2
+    _assert_log_entry(log_entries[0], {
+        "commit_hash": "commit2hash",
+        "parent_hashes": ["commit1hash"],
+        "author_name": "Author Two",
+        "author_email": "author2@example.com",
+        "commit_date": "2023-01-02T10:00:00+00:00",
+        "commit_timestamp": 1672653600,
+        "commit_message": "Subject 2",
+        "file_path": "file1.txt",
+        "additions": 10,
+        "deletions": 5,
+        "change_type": "M",
+    })
+    _assert_log_entry(log_entries[1], {
+        "commit_hash": "commit1hash",
+        "parent_hashes": [],
+        "author_name": "Author One",
+        "author_email": "author1@example.com",
+        "commit_date": "2023-01-01T10:00:00+00:00",
+        "commit_timestamp": 1672567200,
+        "commit_message": "Subject 1",
+        "file_path": "file1.txt",
+        "additions": 3,
+        "deletions": 0,
+        "change_type": "A",
+    })
+
+
+def test_invalid_extraction_mode():
+    with pytest.raises(ValueError, match="Unknown extraction mode"):
+        GitCliBackend("/test/repo", extraction_mode="bogus")
+
+
+def test_stream_git_command_yields_output_and_raises_on_failure(tmp_path):
+    subprocess.run(["git", "init", "-q", str(tmp_path)], check=True)
+    backend = GitCliBackend(str(tmp_path))
+
+    assert "".join(backend._stream_git_command(["git", "rev-parse", "--is-inside-work-tree"])) == "true\n"
+    assert b"".join(backend._stream_git_command(["git", "rev-parse", "--is-inside-work-tree"], text=False)) == b"true\n"
+    with pytest.raises(subprocess.CalledProcessError):
+        list(backend._stream_git_command(["git", "rev-parse", "--verify", "no-such-ref"]))
+    # input_lines are piped to the command's stdin while its output is read.
+    output = "".join(backend._stream_git_command(["git", "cat-file", "--batch-check"], input_lines=["no-such-ref", "HEAD"]))
+    assert output == "no-such-ref missing\nHEAD missing\n"
+
+
+def test_invalid_jobs():
+    with pytest.raises(ValueError, match="jobs must be at least 1"):
+        GitCliBackend("/test/repo", jobs=0)
+
+
+def test_parallel_jobs_match_serial_order(tmp_path, monkeypatch):
+    subprocess.run(["git", "init", "-q", str(tmp_path)], check=True)
+    for i in range(7):
+        (tmp_path / f"file{i % 3}.txt").write_text(f"line {i}\n" * (i + 1))
+        subprocess.run(["git", "add", "."], cwd=tmp_path, check=True)
+        subprocess.run(
+            ["git", "-c", "user.name=Test", "-c", "user.email=test@example.com", "commit", "-q", "-m", f"commit {i}"],
+            cwd=tmp_path,
+            check=True,
+        )
+    # Split even this tiny history across workers.
+    monkeypatch.setattr("git2df.backends._MIN_COMMITS_PER_JOB", 1)
+
+    serial = GitCliBackend(str(tmp_path)).get_log_entries()
+    with patch.object(GitCliBackend, "_stream_git_command", autospec=True, side_effect=GitCliBackend._stream_git_command) as spy:
+        parallel = GitCliBackend(str(tmp_path), jobs=3).get_log_entries()
+
+    assert len(serial) == 7
+    assert parallel == serial
+    # Six chunks may be in flight for three jobs, so the seven commits go in chunks of two.
+    assert spy.call_count == 4
+
+
+def test_parallel_jobs_stream_a_bounded_number_of_chunks(tmp_path, monkeypatch):
+    subprocess.run(["git", "init", "-q", str(tmp_path)], check=True)
+    for i in range(10):
+        (tmp_path / "file.txt").write_text(f"line {i}\n")
+        subprocess.run(["git", "add", "."], cwd=tmp_path, check=True)
+        subprocess.run(
+            ["git", "-c", "user.name=Test", "-c", "user.email=test@example.com", "commit", "-q", "-m", f"commit {i}"],
+            cwd=tmp_path,
+            check=True,
+        )
+    monkeypatch.setattr("git2df.backends._MIN_COMMITS_PER_JOB", 1)
+    monkeypatch.setattr("git2df.backends._MAX_COMMITS_PER_CHUNK", 1)
+
+    with patch.object(GitCliBackend, "_stream_git_command", autospec=True, side_effect=GitCliBackend._stream_git_command) as spy:
+        entries = GitCliBackend(str(tmp_path), jobs=2).iter_log_entries()
+        first = next(entries)
+        # At most the four chunks two jobs may have in flight have started.
+        assert spy.call_count <= 4
+        rest = list(entries)
+    assert spy.call_count == 10
+
+    assert first.commit_message.strip() == "commit 9"
+    assert [entry.commit_message.strip() for entry in rest] == [f"commit {i}" for i in range(8, -1, -1)]
+
+
+def _init_repo_with_commit(path) -> None:
+    subprocess.run(["git", "init", "-q", "-b", "trunk", str(path)], check=True)
+    subprocess.run(
+        ["git", "-c", "user.name=Test", "-c", "user.email=test@example.com", "commit", "-q", "--allow-empty", "-m", "init"],
+        cwd=path,
+        check=True,
     )
+
+
+def test_default_branch_read_from_local_origin_head(tmp_path):
+    upstream = tmp_path / "upstream"
+    _init_repo_with_commit(upstream)
+    clone = tmp_path / "clone"
+    subprocess.run(["git", "clone", "-q", str(upstream), str(clone)], check=True)
+    backend = GitCliBackend(str(clone))
+
+    with patch.object(backend, "_run_git_command", wraps=backend._run_git_command) as spy:
+        assert backend._get_default_branch() == "trunk"
+        # Memoized: neither a second lookup nor a second backend runs git again.
+        assert backend._get_default_branch() == "trunk"
+        assert GitCliBackend(str(clone))._get_default_branch() == "trunk"
+
+    spy.assert_called_once()
+    assert spy.call_args[0][0][:2] == ["git", "for-each-ref"]
+
+
+def test_default_branch_without_origin(tmp_path):
+    _init_repo_with_commit(tmp_path)
+    backend = GitCliBackend(str(tmp_path))
+
+    assert backend._get_default_branch() is None
+    cmd = backend._build_git_log_arguments(merged_only=True)
+    assert cmd == ["git", "log", "--merges"]
+
+
+@patch("subprocess.run")
+def test_me_identity_is_looked_up_once(mock_subprocess_run):
+    mock_subprocess_run.side_effect = [
+        MagicMock(stdout="user.name Test User\nuser.email test@example.com\n"),
+        MagicMock(stdout=""), # git rev-list
+        MagicMock(stdout=""), # git rev-list
+    ]
+    backend = GitCliBackend("/test/repo")
+
+    backend.get_log_entries(me=True)
+    backend.get_log_entries(me=True)
+
+    config_calls = [c for c in mock_subprocess_run.call_args_list if c[0][0][1] == "config"]
+    assert len(config_calls) == 1
+    rev_list_cmd = mock_subprocess_run.call_args_list[-1][0][0]
+    assert rev_list_cmd[3:] == ["--author", "Test User", "--author", "test@example.com"]
@@ -139,3 +139,42 @@ def test_build_commits_df_empty_input():
         "deletions",
         "old_file_path",
     ]
+
+
+def test_build_commits_df_commit_without_file_changes():
+    """Test that a commit without file changes still gets one row, next to commits that have some."""
+    commit_date = datetime(2023, 1, 1, 10, 0, 0, tzinfo=timezone.utc)
+    git_log_entries = [
+        GitLogEntry(
+            commit_hash="mergehash",
+            parent_hashes=["parent1hash", "parent2hash"],
+            author_name="Author One",
+            author_email="author1@example.com",
+            commit_date=commit_date,
+            commit_timestamp=1672567200,
+            commit_message="Merge branch",
+            file_changes=[],
+        ),
+        GitLogEntry(
+            commit_hash="renamehash",
+            parent_hashes=["mergehash"],
+            author_name="Author Two",
+            author_email="author2@example.com",
+            commit_date=commit_date,
+            commit_timestamp=1672567200,
+            commit_message="Rename",
+            file_changes=[FileChange("new.txt", 1, 1, "R", old_file_path="old.txt")],
+        ),
+    ]
+
+    df = build_commits_df(git_log_entries)
+
+    assert list(df["commit_hash"]) == ["mergehash", "renamehash"]
+    assert df["parent_hashes"].iloc[0] == ["parent1hash", "parent2hash"]
+    assert df["file_paths"].iloc[0] is None
+    assert df["change_type"].iloc[0] is None
+    assert df["old_file_path"].iloc[0] is None
+    assert df["old_file_path"].iloc[1] == "old.txt"
+    assert list(df["additions"]) == [0, 1]
+    for column in ["commit_timestamp", "additions", "deletions"]:
+        assert df[column].dtype == "int64"
@@ -1,12 +1,18 @@
 from datetime import datetime, timezone
 import logging
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
 import pytest
 
+from dulwich.object_store import MemoryObjectStore
 from dulwich.objects import Commit
 from dulwich.repo import Repo
+from git2df.dulwich.backend import DulwichRemoteBackend
 from git2df.dulwich.commit_walker import DulwichCommitWalker
 from git2df.dulwich.commit_filters import DulwichCommitFilters
 from git2df.dulwich.commit_formatter import DulwichCommitFormatter
+from git2df.dulwich.diff_parser import DulwichDiffParser
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +28,7 @@ def mock_dulwich_commit_walker(mocker):
 def mock_repo_with_commits(mocker):
     repo = mocker.MagicMock(spec=Repo)
     repo.path = "/mock/repo/path"
+    repo.object_store = MemoryObjectStore()
 
     # Create mock commits
     commit1 = mocker.MagicMock(spec=Commit)
@@ -53,21 +60,21 @@ def mock_repo_with_commits(mocker):
     return repo
 
 
-def test_collect_and_filter_commits_no_filters(
+def test_iter_commits_in_range_no_filters(
     mock_dulwich_commit_walker, mock_repo_with_commits
 ):
     mock_dulwich_commit_walker.commit_filters.filter_commits_by_date.return_value = True
 
-    result = mock_dulwich_commit_walker._collect_and_filter_commits(
+    result = list(mock_dulwich_commit_walker._iter_commits_in_range(
         mock_repo_with_commits, None, None
-    )
+    ))
     assert len(result) == 3
     assert result[0].id.hex.return_value == "commit1hash"
     assert result[1].id.hex.return_value == "commit2hash"
     assert result[2].id.hex.return_value == "commit3hash"
 
 
-def test_collect_and_filter_commits_with_since_filter(
+def test_iter_commits_in_range_with_since_filter(
     mock_dulwich_commit_walker, mock_repo_with_commits
 ):
     since_dt = datetime(2023, 1, 2, 0, 0, 0, tzinfo=timezone.utc)
@@ -79,15 +86,15 @@ def test_collect_and_filter_commits_with_since_filter(
         filter_side_effect
     )
 
-    result = mock_dulwich_commit_walker._collect_and_filter_commits(
+    result = list(mock_dulwich_commit_walker._iter_commits_in_range(
         mock_repo_with_commits, since_dt, None
-    )
+    ))
     assert len(result) == 2
     assert result[0].id.hex.return_value == "commit2hash"
     assert result[1].id.hex.return_value == "commit3hash"
 
 
-def test_collect_and_filter_commits_with_until_filter(
+def test_iter_commits_in_range_with_until_filter(
     mock_dulwich_commit_walker, mock_repo_with_commits
 ):
     until_dt = datetime(2023, 1, 2, 0, 0, 0, tzinfo=timezone.utc)
@@ -99,14 +106,14 @@ def test_collect_and_filter_commits_with_until_filter(
         filter_side_effect
     )
 
-    result = mock_dulwich_commit_walker._collect_and_filter_commits(
+    result = list(mock_dulwich_commit_walker._iter_commits_in_range(
         mock_repo_with_commits, None, until_dt
-    )
+    ))
     assert len(result) == 1
     assert result[0].id.hex.return_value == "commit1hash"
 
 
-def test_collect_and_filter_commits_with_both_filters(
+def test_iter_commits_in_range_with_both_filters(
     mock_dulwich_commit_walker, mock_repo_with_commits
 ):
     since_dt = datetime(2023, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
@@ -119,8 +126,76 @@ def test_collect_and_filter_commits_with_both_filters(
         filter_side_effect
     )
 
-    result = mock_dulwich_commit_walker._collect_and_filter_commits(
+    result = list(mock_dulwich_commit_walker._iter_commits_in_range(
         mock_repo_with_commits, since_dt, until_dt
-    )
+    ))
     assert len(result) == 1
     assert result[0].id.hex.return_value == "commit2hash"
+
+
+def _linear_repo(tmp_path, commits):
+    """A repository whose main branch has the given number of commits, each rewriting file.txt."""
+    repo_path = tmp_path / "repo"
+    subprocess.run(["git", "init", "-q", "-b", "main", str(repo_path)], check=True)
+    for i in range(1, commits + 1):
+        (repo_path / "file.txt").write_text("".join(f"version {i} line {n}\n" for n in range(i)))
+        (repo_path / f"file{i % 3}.txt").write_text(f"{i}\n")
+        subprocess.run(["git", "add", "."], cwd=repo_path, check=True)
+        subprocess.run(
+            ["git", "-c", "user.name=Test User", "-c", "user.email=test@example.com", "commit", "-q", "-m", f"Commit {i}"],
+            cwd=repo_path,
+            check=True,
+        )
+    return str(repo_path / ".git")
+
+
+def test_iter_log_entries_diffs_a_batch_at_a_time(tmp_path, mocker):
+    repo_path = _linear_repo(tmp_path, 5)
+    mocker.patch("git2df.dulwich.commit_walker.DIFF_BATCH_SIZE", 2)
+    spy = mocker.spy(DulwichDiffParser, "extract_file_changes")
+
+    entries = DulwichRemoteBackend(repo_path, "main").iter_log_entries()
+
+    assert next(entries).commit_message.strip() == "Commit 5"
+    assert spy.call_count == 2
+    assert [entry.commit_message.strip() for entry in entries] == [f"Commit {i}" for i in range(4, 0, -1)]
+    assert spy.call_count == 5
+
+
+def test_invalid_jobs():
+    with pytest.raises(ValueError, match="jobs must be at least 1"):
+        DulwichRemoteBackend("unused", "main", jobs=0)
+
+
+def test_diff_workers_match_serial_order(tmp_path, monkeypatch, mocker):
+    repo_path = _linear_repo(tmp_path, 12)
+    # Split even this small history across worker processes, in several batches, the
+    # first of which is diffed here.
+    monkeypatch.setattr("git2df.dulwich.diff_workers.POOL_START_PAIRS", 4)
+    monkeypatch.setattr("git2df.dulwich.diff_workers.MIN_PAIRS_PER_JOB", 1)
+    monkeypatch.setattr("git2df.dulwich.commit_walker.DIFF_BATCH_SIZE", 3)
+    pool = mocker.patch("git2df.dulwich.diff_workers.ProcessPoolExecutor", wraps=ProcessPoolExecutor)
+
+    serial = DulwichRemoteBackend(repo_path, "main").get_log_entries()
+    parallel = DulwichRemoteBackend(repo_path, "main", jobs=2).get_log_entries()
+    filtered = DulwichRemoteBackend(repo_path, "main", jobs=2).get_log_entries(include_paths=["file1.txt"])
+
+    assert pool.call_count == 2
+    assert len(serial) == 12
+    assert parallel == serial
+    assert [e.commit_hash for e in filtered] == [
+        e.commit_hash for e in serial if any(fc.file_path == "file1.txt" for fc in e.file_changes)
+    ]
+
+
+def test_short_ranges_are_diffed_without_workers(tmp_path, mocker):
+    repo_path = _linear_repo(tmp_path, 12)
+    # Batches large enough to split do not start the pool before POOL_START_PAIRS pairs.
+    mocker.patch("git2df.dulwich.diff_workers.MIN_PAIRS_PER_JOB", 1)
+    mocker.patch("git2df.dulwich.commit_walker.DIFF_BATCH_SIZE", 3)
+    pool = mocker.patch("git2df.dulwich.diff_workers.ProcessPoolExecutor")
+
+    entries = DulwichRemoteBackend(repo_path, "main", jobs=4).get_log_entries()
+
+    assert len(entries) == 12
+    pool.assert_not_called()
@@ -1,7 +1,9 @@
 from datetime import datetime
+
+import pytest
 from pathlib import Path
 
-from git2df.git_parser._commit_metadata_parser import _parse_commit_metadata_line
+from git2df.git_parser._nul_log_parser import _iter_nul_log_entries
 from git2df.git_parser._file_stat_parser import (
     FileChange,
     _parse_numstat_line,
@@ -16,57 +18,6 @@ def get_golden_file_pairs():
             yield log_file, json_file
 
 
-# New tests for _parse_commit_metadata_line
-
-
-def test_parse_commit_metadata_line_valid():
-    line = "@@@COMMIT@@@a1b2c3d4e5f6a7b8c9d0e1f2a3b4c5d6e7f8a9b0@@@FIELD@@@p1p2p3p4p5p6p7p8p9d0e1f2a3b4c5d6e7f8a9b0@@@FIELD@@@John Doe@@@FIELD@@@john.doe@example.com@@@FIELD@@@2023-10-26T10:00:00+00:00\t1698307200@@@FIELD@@@---MSG_START---Initial commit message---MSG_END---"
-    expected = {
-        "commit_hash": "a1b2c3d4e5f6a7b8c9d0e1f2a3b4c5d6e7f8a9b0",
-        "parent_hashes": ["p1p2p3p4p5p6p7p8p9d0e1f2a3b4c5d6e7f8a9b0"],
-        "author_name": "John Doe",
-        "author_email": "john.doe@example.com",
-        "commit_date": datetime.fromisoformat("2023-10-26T10:00:00+00:00"),
-        "commit_timestamp": 1698307200,
-        "commit_message": "Initial commit message",
-    }
-    result = _parse_commit_metadata_line(line)
-    assert result == expected
-
-
-def test_parse_commit_metadata_line_no_parent_hash():
-    line = "@@@COMMIT@@@a1b2c3d4e5f6a7b8c9d0e1f2a3b4c5d6e7f8a9b0@@@FIELD@@@@@@FIELD@@@John Doe@@@FIELD@@@john.doe@example.com@@@FIELD@@@2023-10-26T10:00:00+00:00\t1698307200@@@FIELD@@@---MSG_START---Initial commit message---MSG_END---"
-    expected = {
-        "commit_hash": "a1b2c3d4e5f6a7b8c9d0e1f2a3b4c5d6e7f8a9b0",
-        "parent_hashes": [],
-        "author_name": "John Doe",
-        "author_email": "john.doe@example.com",
-        "commit_date": datetime.fromisoformat("2023-10-26T10:00:00+00:00"),
-        "commit_timestamp": 1698307200,
-        "commit_message": "Initial commit message",
-    }
-    result = _parse_commit_metadata_line(line)
-    assert result == expected
-
-
-def test_parse_commit_metadata_line_malformed_missing_fields():
-    line = "@@@COMMIT@@@a1b2c3d4e5f6a7b8c9d0e1f2a3b4c5d6e7f8a9b0@@@FIELD@@@John Doe@@@FIELD@@@john.doe@example.com@@@FIELD@@@---MSG_START---Initial commit message---MSG_END---"  # Missing parent hash and date/timestamp
-    result = _parse_commit_metadata_line(line)
-    assert result is None
-
-
-def test_parse_commit_metadata_line_malformed_bad_date_format():
-    line = "@@@COMMIT@@@a1b2c3d4e5f6a7b8c9d0e1f2a3b4c5d6e7f8a9b0@@@FIELD@@@@@@FIELD@@@John Doe@@@FIELD@@@john.doe@example.com@@@FIELD@@@BAD_DATE\t1698307200@@@FIELD@@@---MSG_START---Initial commit message---MSG_END---"
-    result = _parse_commit_metadata_line(line)
-    assert result is None
-
-
-def test_parse_commit_metadata_line_malformed_no_commit_marker():
-    line = "a1b2c3d4e5f6a7b8c9d0e1f2a3b4c5d6e7f8a9b0@@@FIELD@@@@@@FIELD@@@John Doe@@@FIELD@@@john.doe@example.com@@@FIELD@@@2023-10-26T10:00:00+00:00\t1698307200@@@FIELD@@@---MSG_START---Initial commit message---MSG_END---"
-    result = _parse_commit_metadata_line(line)
-    assert result is None
-
-
 # New tests for _parse_numstat_line
 def test_parse_numstat_line_valid():
     line = "10\t5\tfile.txt"
@@ -166,3 +117,59 @@ def test_parse_name_status_line_malformed_no_change_type():
     line = "\tfile.txt"
     result = _parse_name_status_line(line)
     assert result is None
+
+
+# Tests for the NUL-delimited 'git log -z' parser
+
+_NUL_LOG_OUTPUT = (
+    b"c2\x00c1\x00Author Two\x00two@example.com\x002023-01-02T10:00:00+00:00\x001672653600\x00Subject @@@COMMIT@@@ 2\x00"
+    b"\n:100644 100644 1111111 2222222 M\x00dir/tab\tname.txt\x00:000000 100644 0000000 3333333 A\x00new\nline.bin\x00"
+    b"10\t5\tdir/tab\tname.txt\x00-\t-\tnew\nline.bin\x00"
+    b"\x00c1\x00\x00Author One\x00one@example.com\x002023-01-01T10:00:00Z\x001672567200\x00Subject 1\x00"
+)
+
+
+def test_iter_nul_log_entries_handles_fields_split_across_reads():
+    for piece_size in (1, 3, 17, len(_NUL_LOG_OUTPUT)):
+        pieces = [_NUL_LOG_OUTPUT[i : i + piece_size] for i in range(0, len(_NUL_LOG_OUTPUT), piece_size)]
+        entries = list(_iter_nul_log_entries(pieces))
+
+        assert [e.commit_hash for e in entries] == ["c2", "c1"]
+        assert entries[0].parent_hashes == ["c1"]
+        assert entries[0].commit_message == "Subject @@@COMMIT@@@ 2"
+        assert entries[0].commit_timestamp == 1672653600
+        assert [fc.to_dict() for fc in entries[0].file_changes] == [
+            FileChange("dir/tab\tname.txt", 10, 5, "M").to_dict(),
+            FileChange("new\nline.bin", 0, 0, "A").to_dict(),
+        ]
+        assert entries[1].parent_hashes == []
+        assert entries[1].commit_date == datetime.fromisoformat("2023-01-01T10:00:00+00:00")
+        assert entries[1].file_changes == []
+
+
+def test_iter_nul_log_entries_renames():
+    data = (
+        b"c1\x00p1\x00A\x00a@example.com\x002023-01-01T10:00:00+00:00\x001672567200\x00Move\x00"
+        b"\n:100644 100644 1111111 1111111 R100\x00old.txt\x00new.txt\x00"
+        b"0\t0\t\x00old.txt\x00new.txt\x00"
+    )
+    (entry,) = _iter_nul_log_entries([data])
+    assert [fc.to_dict() for fc in entry.file_changes] == [
+        FileChange("new.txt", 0, 0, "R", old_file_path="old.txt").to_dict()
+    ]
+
+
+@pytest.mark.parametrize(
+    "data, message",
+    [
+        (b"c1\x00p1\x00A\x00a@example.com\x00", "Truncated"),
+        (b"c1\x00\x00A\x00a@example.com\x002023-01-01\x00notanumber\x00Subject\x00", "timestamp"),
+        (b"c1\x00\x00A\x00a@example.com\x00yesterday\x001672567200\x00Subject\x00", "commit date"),
+        (b"c1\x00\x00A\x00a@example.com\x002023-01-01\x001672567200\x00S\x00\nx\ty\tfile\x00", "numstat"),
+        (b"c1\x00\x00A\x00a@example.com\x002023-01-01\x001672567200\x00S\x00\n1\t2\x00", "numstat"),
+        (b"c1\x00\x00A\x00a@example.com\x002023-01-01\x001672567200\x00S\x00\n:100644 100644 1111111 2222222 M\x00", "Truncated"),
+    ],
+)
+def test_iter_nul_log_entries_rejects_malformed_output(data, message):
+    with pytest.raises(ValueError, match=message):
+        list(_iter_nul_log_entries([data]))
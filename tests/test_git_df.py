@@ -3,6 +3,8 @@ import subprocess
 import sys
 import pyarrow.parquet as pq
 
+from git2df.arrow_builder import commits_table_to_df
+
 
 @pytest.fixture(scope="function")
 def temp_git_repo_with_remote(tmp_path):
@@ -135,7 +137,7 @@ def test_git_extract_commits_basic(temp_git_repo_with_remote, tmp_path):
     assert output_file.exists()
 
     table = pq.read_table(output_file)
-    df = table.to_pandas()
+    df = commits_table_to_df(table)
     _assert_dataframe_properties(df, 5, 2, 5, 5, 1)
     _assert_metadata_properties(table.schema.metadata)
 
@@ -158,7 +160,7 @@ def test_git_extract_commits_with_author_filter(temp_git_repo_with_remote, tmp_p
     assert output_file.exists()
 
     table = pq.read_table(output_file)
-    df = table.to_pandas()
+    df = commits_table_to_df(table)
     _assert_dataframe_properties(df, 2, 1, 2, 2, 0)
     assert (df["author_name"] == "Test User").all()
     _assert_metadata_properties(table.schema.metadata)
@@ -186,7 +188,7 @@ def test_git_extract_commits_with_path_filter(temp_git_repo_with_remote, tmp_pat
     assert result.exit_code == 0
     assert output_file.exists()
     table = pq.read_table(output_file)
-    df = table.to_pandas()
+    df = commits_table_to_df(table)
     _assert_dataframe_properties(df, 1, 1, 1, 1, 0, expected_file_paths="src/feature.js")
     assert (df["author_name"] == "Dev User").all()
     _assert_metadata_properties(table.schema.metadata)
@@ -212,7 +214,7 @@ def test_git_extract_commits_with_exclude_path_filter(
     assert output_file.exists()
 
     table = pq.read_table(output_file)
-    df = table.to_pandas()
+    df = commits_table_to_df(table)
     assert not df.empty
 
     # Manually filter out excluded paths as GitCliBackend does not apply this filter directly
@@ -242,7 +244,7 @@ def test_git_extract_commits_no_commits_found(temp_git_repo_with_remote, tmp_pat
     assert result.returncode == 0  # Should exit cleanly even if no commits
     assert output_file.exists()  # An empty file should be created if no commits
     table = pq.read_table(output_file)
-    df = table.to_pandas()
+    df = commits_table_to_df(table)
     assert df.empty  # The created DataFrame should be empty
 
     _assert_metadata_properties(table.schema.metadata)
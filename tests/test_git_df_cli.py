@@ -1,8 +1,16 @@
+import functools
+import json
 import pytest
 import subprocess
+import pyarrow as pa
 import pyarrow.parquet as pq
 import os
 import sys
+import typer
+
+import git2df
+from git2df.arrow_builder import COMMITS_SCHEMA, commits_table_to_df
+from git_dataframe_tools.cli import git_df
 from tests.conftest import sample_commits
 
 
@@ -38,6 +46,26 @@ def test_git_df_cli_basic(git_repo, tmp_path):
     df = table.to_pandas()
 
     _assert_cli_output_dataframe(df, 4)
+
+
+@pytest.mark.parametrize("git_repo", [sample_commits], indirect=True)
+def test_git_df_cli_writes_batches_with_dictionary_columns(git_repo, tmp_path, monkeypatch):
+    """Test that git-df writes the backend's RecordBatches as they are, dictionary columns included."""
+    monkeypatch.setattr(git_df, "iter_commits_batches", functools.partial(git2df.iter_commits_batches, batch_size=1))
+    output_file = tmp_path / "commits.parquet"
+    os.chdir(git_repo)
+
+    git_df.main(output=str(output_file), repo_path=".")
+
+    parquet_file = pq.ParquetFile(output_file)
+    assert parquet_file.schema_arrow.remove_metadata().equals(COMMITS_SCHEMA)
+    assert parquet_file.num_row_groups == 4
+    # Readers that need plain pandas columns decode them on the way in.
+    df = commits_table_to_df(parquet_file.read())
+    _assert_cli_output_dataframe(df, 4)
+    assert df["author_name"].dtype == object
+
+
 @pytest.mark.parametrize("git_repo", [sample_commits], indirect=True)
 def test_git_df_cli_author_filter(git_repo, tmp_path):
     """Test the git-df CLI with an author filter."""
@@ -121,7 +149,7 @@ def test_git_df_cli_no_warnings_with_path_filter(git_repo, tmp_path, caplog):
     for record in caplog.records:
         if record.levelno == logging.WARNING:
             assert not (
-                record.name.startswith("git2df.git_parser._chunk_processor")
+                record.name.startswith("git2df.git_parser")
                 or record.name.startswith("git2df.backends")
             ), f"Unexpected warning: {record.name} - {record.message}"
 
@@ -165,4 +193,143 @@ def test_git_df_cli_me_option(git_repo, tmp_path):
         # Clean up global git config
         subprocess.run(["git", "config", "--global", "--unset", "user.name"], check=True)
         subprocess.run(["git", "config", "--global", "--unset", "user.email"], check=True)
-        os.chdir(original_cwd)
\ No newline at end of file
+        os.chdir(original_cwd)
+
+def _run_git_df(output_file, *extra_args):
+    command = [
+        sys.executable,
+        "-m",
+        "git_dataframe_tools.cli.git_df",
+        "--output",
+        str(output_file),
+        "--repo-path",
+        ".",
+        *extra_args,
+    ]
+    return subprocess.run(command, capture_output=True, text=True, check=True)
+
+
+def _commit_file(repo_path, file_name, content, message):
+    with open(os.path.join(repo_path, file_name), "w") as f:
+        f.write(content)
+    subprocess.run(["git", "add", file_name], cwd=repo_path, check=True)
+    subprocess.run(["git", "commit", "-q", "-m", message], cwd=repo_path, check=True)
+
+
+@pytest.mark.parametrize("git_repo", [sample_commits], indirect=True)
+def test_git_df_cli_append_extracts_only_new_commits(git_repo, tmp_path):
+    """Test that --append adds the commits made since the last run as a new part file."""
+    output_file = tmp_path / "commits.parquet"
+    os.chdir(git_repo)
+
+    _run_git_df(output_file)
+    metadata = pq.read_schema(output_file).metadata
+    head = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    assert json.loads(metadata[b"head_shas"]) == [head]
+
+    first_run = output_file.read_bytes()
+    _commit_file(git_repo, "file3.txt", "new\n", "Fourth commit")
+    result = _run_git_df(output_file, "--append", "--debug")
+    assert "appended 1 rows" in result.stderr
+
+    # The first run's file is moved into the output directory as it is.
+    assert sorted(os.listdir(output_file)) == ["part-00000.parquet", "part-00001.parquet"]
+    assert (output_file / "part-00000.parquet").read_bytes() == first_run
+    df = pq.read_table(output_file).to_pandas()
+    _assert_cli_output_dataframe(df, 5)
+    assert df["commit_message"].iloc[-1].strip() == "Fourth commit"
+
+    new_head = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    metadata = pq.read_metadata(output_file / "part-00001.parquet").metadata
+    assert json.loads(metadata[b"head_shas"]) == [new_head]
+    assert int(metadata[b"last_commit_timestamp"]) == int(df["commit_timestamp"].max())
+
+    # Nothing new: no part is added.
+    result = _run_git_df(output_file, "--incremental", "--debug")
+    assert "already up to date" in result.stderr
+    assert len(os.listdir(output_file)) == 2
+
+    # Later runs continue from the newest part.
+    _commit_file(git_repo, "file4.txt", "newer\n", "Fifth commit")
+    _run_git_df(output_file, "--append")
+    assert len(pq.read_table(output_file / "part-00002.parquet")) == 1
+    assert len(pq.read_table(output_file)) == 6
+
+    result = subprocess.run(
+        [sys.executable, "-m", "git_dataframe_tools.cli.git_df", "--output", str(output_file)], capture_output=True, text=True
+    )
+    assert result.returncode == 1
+    assert "is a directory written by --append" in result.stderr
+
+
+@pytest.mark.parametrize("git_repo", [sample_commits], indirect=True)
+def test_git_df_cli_append_without_watermark_extracts_everything(git_repo, tmp_path):
+    """Test that --append behaves like a full run when there is nothing to continue from."""
+    output_file = tmp_path / "commits.parquet"
+    os.chdir(git_repo)
+
+    _run_git_df(output_file, "--append")
+
+    df = pq.read_table(output_file).to_pandas()
+    _assert_cli_output_dataframe(df, 4)
+
+
+@pytest.mark.parametrize("git_repo", [sample_commits], indirect=True)
+def test_git_df_cli_append_after_history_rewrite(git_repo, tmp_path):
+    """Test that rows of commits the watermark cannot exclude anymore are not duplicated."""
+    output_file = tmp_path / "commits.parquet"
+    os.chdir(git_repo)
+
+    _run_git_df(output_file)
+    # Replace the recorded tip with a commit that does not exist.
+    table = pq.read_table(output_file)
+    metadata = {**pq.read_metadata(output_file).metadata, b"head_shas": json.dumps(["0" * 40]).encode()}
+    del metadata[b"ARROW:schema"]
+    pq.write_table(table.replace_schema_metadata(metadata), output_file)
+
+    _run_git_df(output_file, "--append")
+
+    df = pq.read_table(output_file).to_pandas()
+    _assert_cli_output_dataframe(df, 4)
+
+
+@pytest.mark.parametrize("git_repo", [sample_commits], indirect=True)
+def test_git_df_cli_append_failure_leaves_no_temporary_file(git_repo, tmp_path, monkeypatch):
+    """Test that a failed --append adds no part and cleans up its temporary file."""
+    output_file = tmp_path / "commits.parquet"
+    os.chdir(git_repo)
+    _run_git_df(output_file)
+    table = pq.read_table(output_file)
+    metadata = git_df._read_parquet_metadata(str(output_file))
+    new_rows = table.slice(0, 1).set_column(
+        table.schema.get_field_index("commit_hash"), "commit_hash", pa.array(["f" * 40], table.schema.field("commit_hash").type)
+    )
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(git_df.os, "link", fail)
+    with pytest.raises(typer.Exit):
+        git_df._append_batches_to_parquet(iter(new_rows.to_batches()), str(output_file), None, ["0" * 40], metadata)
+
+    assert os.listdir(output_file) == ["part-00000.parquet"]
+    assert pq.read_table(output_file).equals(table)
+
+
+@pytest.mark.parametrize("git_repo", [sample_commits], indirect=True)
+def test_git_df_cli_ref_selects_walked_history(git_repo, tmp_path):
+    """Test that --ref limits both the extracted commits and the --append watermark."""
+    os.chdir(git_repo)
+    head = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    subprocess.run(["git", "checkout", "-q", "-b", "side"], check=True)
+    _commit_file(git_repo, "side.txt", "side\n", "Side commit")
+    subprocess.run(["git", "checkout", "-q", head], check=True)
+
+    every_ref = tmp_path / "all.parquet"
+    _run_git_df(every_ref)
+    assert len(pq.read_table(every_ref)) == 5
+
+    head_only = tmp_path / "head.parquet"
+    _run_git_df(head_only, "--ref", "HEAD")
+    assert len(pq.read_table(head_only)) == 4
+    assert json.loads(pq.read_schema(head_only).metadata[b"head_shas"]) == [head]
@@ -159,3 +159,20 @@ def test_get_current_git_user_integration(temp_git_repo_with_remote):
     finally:
 
         os.chdir(original_cwd)
+
+
+def test_filter_existing_commits(temp_git_repo_with_remote):
+    head = subprocess.run(
+        ["git", "rev-parse", "HEAD"], cwd=temp_git_repo_with_remote, check=True, capture_output=True, text=True
+    ).stdout.strip()
+    tree = subprocess.run(
+        ["git", "rev-parse", "HEAD^{tree}"], cwd=temp_git_repo_with_remote, check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+    existing = GitPythonRepoInfoProvider().filter_existing_commits(
+        str(temp_git_repo_with_remote), ["0" * 40, head, tree, head]
+    )
+
+    # Trees are not commits.
+    assert existing == [head, head]
+    assert GitPythonRepoInfoProvider().filter_existing_commits(str(temp_git_repo_with_remote), []) == []
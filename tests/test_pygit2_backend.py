@@ -1,7 +1,10 @@
+import pygit2
 import pytest
 from git2df.backend_interface import GitBackend
+from git2df.repo_metadata import repo_metadata_cache
 from git2df.pygit2_backend import Pygit2Backend
 from git2df.git_parser import GitLogEntry
+from tests.fixtures.git_commands import git
 from datetime import datetime, timedelta, timezone
 
 
@@ -767,3 +770,180 @@ def test_get_log_entries_file_deletion(pygit2_repo):
 
     # The very first commit from the fixture
     _assert_initial_fixture_commit(log_entries[2])
+
+
+def test_invalid_jobs():
+    with pytest.raises(ValueError, match="jobs must be at least 1"):
+        Pygit2Backend(".", jobs=0)
+
+
+@pytest.mark.parametrize(
+    "pygit2_repo",
+    [
+        [
+            {
+                "message": f"Commit {i}",
+                "files": {f"file{i % 3}.txt": f"line {i}\n" * (i + 1)},
+                "commit_date": f"2023-01-02T{i:02d}:00:00Z",
+            }
+            for i in range(12)
+        ]
+    ],
+    indirect=True,
+)
+def test_parallel_jobs_match_serial_order(pygit2_repo, monkeypatch):
+    # Split even this small history across worker processes.
+    monkeypatch.setattr("git2df.pygit2_backend._MIN_COMMITS_PER_JOB", 1)
+
+    serial = Pygit2Backend(pygit2_repo).get_log_entries()
+    parallel = Pygit2Backend(pygit2_repo, jobs=3).get_log_entries()
+    filtered = Pygit2Backend(pygit2_repo, jobs=3).get_log_entries(include_paths=["file1.txt"])
+
+    assert len(serial) == 13
+    assert parallel == serial
+    assert [e.commit_hash for e in filtered] == [
+        e.commit_hash for e in serial if any(fc.file_path == "file1.txt" for fc in e.file_changes)
+    ]
+
+
+@pytest.mark.parametrize(
+    "pygit2_repo",
+    [
+        [
+            {"message": "Add billing", "files": {"services/billing/api.py": "a\nb\n"}, "commit_date": "2023-01-02T10:00:00Z"},
+            {"message": "Add search", "files": {"services/search/api.py": "x\n"}, "commit_date": "2023-01-02T11:00:00Z"},
+            {"message": "Touch billing-v2", "files": {"services/billing-v2.md": "doc\n"}, "commit_date": "2023-01-02T12:00:00Z"},
+            {"message": "Change billing", "files": {"services/billing/api.py": "a\nc\n"}, "commit_date": "2023-01-02T13:00:00Z"},
+        ]
+    ],
+    indirect=True,
+)
+def test_include_paths_prune_diffs_to_subtrees(pygit2_repo, mocker):
+    backend = Pygit2Backend(pygit2_repo)
+    diff_spy = mocker.spy(backend, "_file_changes_from_diff")
+
+    log_entries = backend.get_log_entries(include_paths=["services/billing/"])
+
+    assert [e.commit_message for e in log_entries] == ["Change billing", "Add billing"]
+    _assert_file_modification_commit(log_entries[0], "Change billing", "services/billing/api.py", 1, 1, "M")
+    _assert_file_modification_commit(log_entries[1], "Add billing", "services/billing/api.py", 2, 0, "A")
+    # Only the two commits touching services/billing/ were diffed, and only that subtree.
+    assert diff_spy.call_count == 2
+    assert {call.args[5] for call in diff_spy.call_args_list} == {"services/billing/"}
+
+    # Include paths are prefixes, so a partial last component still matches.
+    log_entries = backend.get_log_entries(include_paths=["services/billing"])
+    assert [e.commit_message for e in log_entries] == ["Change billing", "Touch billing-v2", "Add billing"]
+
+
+def test_invalid_diff_mode():
+    with pytest.raises(ValueError, match="Invalid diff_mode 'hunks'"):
+        Pygit2Backend(".", diff_mode="hunks")
+
+
+@pytest.mark.parametrize(
+    "pygit2_repo",
+    [
+        [
+            {
+                "message": "Add files",
+                "files": {"small.txt": "a\nb\n", "large.txt": "line\n" * 300, "image.bin": "\x00\x01\x02\n"},
+                "commit_date": "2023-01-02T10:00:00Z",
+            },
+            {
+                "message": "Change files",
+                "files": {"small.txt": "a\nc\n", "large.txt": "line\n" * 200, "image.bin": "\x00\x03\n"},
+                "commit_date": "2023-01-02T11:00:00Z",
+            },
+        ]
+    ],
+    indirect=True,
+)
+def test_stats_diff_mode_skips_binary_and_big_files(pygit2_repo):
+    pygit2.Repository(pygit2_repo).config["core.bigFileThreshold"] = "1k"
+    repo_metadata_cache.clear(pygit2_repo)
+
+    stats = Pygit2Backend(pygit2_repo).get_log_entries()
+    patch = Pygit2Backend(pygit2_repo, diff_mode="patch").get_log_entries()
+
+    def counts(entry):
+        return {fc.file_path: (fc.additions, fc.deletions, fc.change_type) for fc in entry.file_changes}
+
+    assert counts(stats[0]) == {"small.txt": (1, 1, "M"), "large.txt": (0, 0, "M"), "image.bin": (0, 0, "M")}
+    assert counts(stats[1]) == {"small.txt": (2, 0, "A"), "large.txt": (0, 0, "A"), "image.bin": (0, 0, "A")}
+    # Patch mode counts files over core.bigFileThreshold, but binary files are 0/0 either way.
+    assert counts(patch[0]) == {"small.txt": (1, 1, "M"), "large.txt": (0, 100, "M"), "image.bin": (0, 0, "M")}
+    assert [e.commit_hash for e in patch] == [e.commit_hash for e in stats]
+
+
+@pytest.fixture
+def branchy_repo(tmp_path):
+    """main: A-B-D, feature/x: B-C, release/1: A-E, plus an annotated tag on C."""
+    def commit(message, day):
+        (tmp_path / f"{message}.txt").write_text(f"{message}\n")
+        git(tmp_path, "add", ".")
+        git(tmp_path, "commit", "-q", "-m", message, date=f"2023-01-{day:02d}T12:00:00+00:00")
+
+    git(tmp_path, "init", "-q", "-b", "main")
+    commit("A", 1)
+    commit("B", 2)
+    git(tmp_path, "checkout", "-q", "-b", "feature/x")
+    commit("C", 3)
+    git(tmp_path, "tag", "-a", "-m", "Tag C", "v1")
+    git(tmp_path, "checkout", "-q", "-b", "release/1", "main~1")
+    commit("E", 5)
+    git(tmp_path, "checkout", "-q", "main")
+    commit("D", 4)
+    return str(tmp_path)
+
+
+@pytest.mark.parametrize(
+    "refs, expected",
+    [
+        (None, ["D", "B", "A"]),
+        ("release/1", ["E", "A"]),
+        (["feature/*"], ["C", "B", "A"]),
+        (["refs/heads/release/*", "v1"], ["E", "C", "B", "A"]),
+        (["--branches"], ["E", "D", "C", "B", "A"]),
+        (["--all", "HEAD", "main"], ["E", "D", "C", "B", "A"]),
+    ],
+)
+def test_refs_walk_every_tip_once(branchy_repo, refs, expected):
+    log_entries = Pygit2Backend(branchy_repo, refs=refs).get_log_entries()
+    since_entries = Pygit2Backend(branchy_repo, refs=refs).get_log_entries(since="2023-01-02")
+
+    assert [e.commit_message for e in log_entries] == expected
+    assert [e.commit_message for e in since_entries] == [m for m in expected if m != "A"]
+
+
+@pytest.mark.parametrize(
+    "refs",
+    [None, "release/1", ["feature/*"], ["refs/heads/release/*", "v1"], ["--branches"], ["hotfix/*"]],
+)
+def test_refs_match_cli_backend(branchy_repo, refs):
+    from git2df.backends import GitCliBackend
+
+    cli_refs = refs or "HEAD"
+    pygit2_hashes = [e.commit_hash for e in Pygit2Backend(branchy_repo, refs=refs).get_log_entries()]
+    cli_hashes = [e.commit_hash for e in GitCliBackend(branchy_repo, refs=cli_refs).get_log_entries()]
+
+    assert sorted(pygit2_hashes) == sorted(cli_hashes)
+
+
+def test_public_api_walks_every_ref_with_either_backend(branchy_repo):
+    from git2df import get_commits_df
+
+    cli_df = get_commits_df(branchy_repo)
+    pygit2_df = get_commits_df(branchy_repo, local_backend_type="pygit2")
+    release_df = get_commits_df(branchy_repo, local_backend_type="pygit2", refs=["release/*"])
+
+    assert sorted(cli_df["commit_message"].str.strip()) == ["A", "B", "C", "D", "E"]
+    assert sorted(pygit2_df["commit_hash"]) == sorted(cli_df["commit_hash"])
+    assert sorted(release_df["commit_message"].str.strip()) == ["A", "E"]
+
+
+def test_unknown_ref(branchy_repo):
+    with pytest.raises(ValueError, match="Cannot resolve ref 'nope' to a commit") as excinfo:
+        Pygit2Backend(branchy_repo, refs=["main", "nope"]).get_log_entries()
+    assert isinstance(excinfo.value.__cause__, (pygit2.GitError, KeyError, ValueError))
+    assert Pygit2Backend(branchy_repo, refs=["hotfix/*"]).get_log_entries() == []
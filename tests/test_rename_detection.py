@@ -0,0 +1,147 @@
+import pytest
+
+from git2df.backends import GitCliBackend
+from git2df.dulwich.backend import DulwichRemoteBackend
+from git2df.pygit2_backend import Pygit2Backend
+from git2df.rename_detection import RenameDetection, count_exact_renames, resolve_rename_detection
+from tests.fixtures.git_commands import git
+
+
+def _lines(prefix: str, count: int = 20) -> str:
+    return "".join(f"{prefix} line {i}\n" for i in range(count))
+
+
+@pytest.fixture
+def rename_repo(tmp_path):
+    git(tmp_path, "init", "-q", "-b", "main")
+    git(tmp_path, "config", "user.name", "Test User")
+    git(tmp_path, "config", "user.email", "test@example.com")
+    (tmp_path / "alpha.txt").write_text(_lines("alpha"))
+    (tmp_path / "beta.txt").write_text(_lines("beta"))
+    git(tmp_path, "add", ".")
+    git(tmp_path, "commit", "-q", "-m", "Initial commit")
+
+    git(tmp_path, "mv", "alpha.txt", "renamed.txt")
+    (tmp_path / "renamed.txt").write_text(_lines("alpha").replace("alpha line 5", "changed"))
+    (tmp_path / "copy.txt").write_text(_lines("beta"))
+    with open(tmp_path / "beta.txt", "a") as f:
+        f.write("appended\n")
+    git(tmp_path, "add", ".")
+    git(tmp_path, "commit", "-q", "-m", "Rename and copy")
+    return tmp_path
+
+
+def _backends(repo_path, rename_detection):
+    return {
+        "cli": GitCliBackend(str(repo_path), rename_detection=rename_detection),
+        "pygit2": Pygit2Backend(str(repo_path), rename_detection=rename_detection),
+        "dulwich": DulwichRemoteBackend(str(repo_path / ".git"), rename_detection=rename_detection),
+    }
+
+
+def _changes(backend):
+    latest = next(e for e in backend.get_log_entries() if e.commit_message.strip() == "Rename and copy")
+    return sorted(
+        (fc.file_path, fc.change_type, fc.old_file_path, fc.additions, fc.deletions) for fc in latest.file_changes
+    )
+
+
+def test_validation():
+    with pytest.raises(ValueError, match="Unknown rename detection mode 'moves'"):
+        RenameDetection("moves")
+    with pytest.raises(ValueError, match="similarity_threshold must be between 0 and 100"):
+        RenameDetection(similarity_threshold=101)
+    with pytest.raises(ValueError, match="rename_limit must not be negative"):
+        RenameDetection(rename_limit=-1)
+
+
+def test_effective_mode_falls_back_like_git():
+    copies = RenameDetection("copies", rename_limit=10)
+
+    assert copies.effective_mode(added=10, deleted=5, modified=5) == "copies"
+    # Too many pairs with modified files as sources, but few enough with deleted ones only.
+    assert copies.effective_mode(added=20, deleted=2, modified=50) == "renames"
+    assert copies.effective_mode(added=20, deleted=20, modified=0) == "exact"
+    assert RenameDetection("copies", rename_limit=0).effective_mode(10**4, 10**4, 10**4) == "copies"
+    assert RenameDetection("off").effective_mode(1, 1, 1) == "off"
+
+
+def test_count_exact_renames():
+    assert count_exact_renames(["a", "b", "b", "c"], ["b", "c", "c", "d"]) == 2
+
+
+def test_resolve_and_cache_key():
+    default = RenameDetection("copies")
+
+    assert resolve_rename_detection(None, default) is default
+    assert resolve_rename_detection("renames", default) == RenameDetection("renames")
+    assert RenameDetection("off", similarity_threshold=80).cache_key == "off"
+    assert RenameDetection("renames", 60, 100).cache_key == "renames-60-100"
+
+
+@pytest.mark.parametrize("backend_name", ["cli", "pygit2", "dulwich"])
+def test_backends_honor_rename_detection(rename_repo, backend_name):
+    off = _changes(_backends(rename_repo, "off")[backend_name])
+    renames = _changes(_backends(rename_repo, "renames")[backend_name])
+    copies = _changes(_backends(rename_repo, RenameDetection("copies", similarity_threshold=50))[backend_name])
+
+    assert off == [
+        ("alpha.txt", "D", None, 0, 20),
+        ("beta.txt", "M", None, 1, 0),
+        ("copy.txt", "A", None, 20, 0),
+        ("renamed.txt", "A", None, 20, 0),
+    ]
+    assert renames == [
+        ("beta.txt", "M", None, 1, 0),
+        ("copy.txt", "A", None, 20, 0),
+        ("renamed.txt", "R", "alpha.txt", 1, 1),
+    ]
+    assert copies == [
+        ("beta.txt", "M", None, 1, 0),
+        ("copy.txt", "C", "beta.txt", 0, 0),
+        ("renamed.txt", "R", "alpha.txt", 1, 1),
+    ]
+
+
+def test_backends_agree_on_renames_and_copies(rename_repo):
+    rename_detection = RenameDetection("copies", similarity_threshold=50)
+    backends = _backends(rename_repo, rename_detection)
+    backends["cli single_pass"] = GitCliBackend(
+        str(rename_repo), rename_detection=rename_detection, extraction_mode="single_pass"
+    )
+
+    changes = {name: _changes(backend) for name, backend in backends.items()}
+
+    # No similarity score ('R095') in the CLI backend's change types.
+    assert changes["cli"][1:] == [("copy.txt", "C", "beta.txt", 0, 0), ("renamed.txt", "R", "alpha.txt", 1, 1)]
+    assert all(backend_changes == changes["cli"] for backend_changes in changes.values())
+
+
+@pytest.mark.parametrize("backend_name", ["cli", "pygit2", "dulwich"])
+def test_rename_limit_falls_back_to_exact_renames(rename_repo, backend_name):
+    # Like git, the limit is checked once the exact rename is paired up: the two
+    # other moved files make four pairs, over a limit of 1**2.
+    (rename_repo / "epsilon.txt").write_text(_lines("epsilon"))
+    (rename_repo / "gamma.txt").write_text(_lines("gamma"))
+    (rename_repo / "delta.txt").write_text(_lines("delta"))
+    git(rename_repo, "add", ".")
+    git(rename_repo, "commit", "-q", "-m", "Add more")
+    git(rename_repo, "mv", "gamma.txt", "gamma2.txt")
+    git(rename_repo, "mv", "delta.txt", "delta2.txt")
+    git(rename_repo, "mv", "epsilon.txt", "epsilon2.txt")
+    (rename_repo / "delta2.txt").write_text(_lines("delta") + "more\n")
+    (rename_repo / "epsilon2.txt").write_text(_lines("epsilon") + "more\n")
+    git(rename_repo, "commit", "-q", "-am", "Move both")
+
+    backend = _backends(rename_repo, RenameDetection("renames", rename_limit=1))[backend_name]
+    latest = next(e for e in backend.get_log_entries() if e.commit_message.strip() == "Move both")
+    changes = sorted((fc.file_path, fc.change_type, fc.old_file_path) for fc in latest.file_changes)
+
+    # Only the unchanged file is still paired up.
+    assert changes == [
+        ("delta.txt", "D", None),
+        ("delta2.txt", "A", None),
+        ("epsilon.txt", "D", None),
+        ("epsilon2.txt", "A", None),
+        ("gamma2.txt", "R", "gamma.txt"),
+    ]
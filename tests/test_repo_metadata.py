@@ -0,0 +1,58 @@
+import threading
+
+import pytest
+
+from git2df.repo_metadata import repo_metadata_cache
+
+
+def test_loader_runs_once_per_repo_and_key(tmp_path):
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return "main"
+
+    assert repo_metadata_cache.get(str(tmp_path), "default_branch", loader) == "main"
+    # The same repository reached through a different path spelling shares the entry.
+    assert repo_metadata_cache.get(str(tmp_path / "."), "default_branch", loader) == "main"
+    assert len(calls) == 1
+
+    assert repo_metadata_cache.get(str(tmp_path), "other_key", lambda: None) is None
+    assert repo_metadata_cache.get(str(tmp_path), "other_key", lambda: "ignored") is None
+
+
+def test_failed_load_is_not_cached(tmp_path):
+    def failing_loader():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        repo_metadata_cache.get(str(tmp_path), "user_identity", failing_loader)
+    assert repo_metadata_cache.get(str(tmp_path), "user_identity", lambda: ("A", "a@b")) == ("A", "a@b")
+
+
+def test_clear_single_repo(tmp_path):
+    repo_a, repo_b = tmp_path / "a", tmp_path / "b"
+    repo_metadata_cache.get(str(repo_a), "key", lambda: 1)
+    repo_metadata_cache.get(str(repo_b), "key", lambda: 1)
+
+    repo_metadata_cache.clear(str(repo_a))
+
+    assert repo_metadata_cache.get(str(repo_a), "key", lambda: 2) == 2
+    assert repo_metadata_cache.get(str(repo_b), "key", lambda: 2) == 1
+
+
+def test_concurrent_lookups_agree(tmp_path):
+    results = []
+    barrier = threading.Barrier(4)
+
+    def lookup(value):
+        barrier.wait()
+        results.append(repo_metadata_cache.get(str(tmp_path), "key", lambda: value))
+
+    threads = [threading.Thread(target=lookup, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(results)) == 1
@@ -0,0 +1,88 @@
+import pytest
+
+from git2df.dulwich.backend import DulwichRemoteBackend
+from git2df.git_parser import FileChange
+from git2df.pygit2_backend import Pygit2Backend
+from git2df.tree_diff_cache import TreeDiffCache
+from tests.fixtures.git_commands import entry_summary, git
+
+
+@pytest.fixture
+def cherry_pick_repo(tmp_path):
+    """main and two branches that each carry a cherry-pick of the same fix onto the same base."""
+    git(tmp_path, "init", "-q", "-b", "main")
+    (tmp_path / "app.py").write_text("a\nb\n")
+    git(tmp_path, "add", ".")
+    git(tmp_path, "commit", "-q", "-m", "Initial commit", date="2023-01-01T12:00:00+00:00")
+    git(tmp_path, "checkout", "-q", "-b", "fix")
+    (tmp_path / "app.py").write_text("a\nc\n")
+    git(tmp_path, "commit", "-q", "-am", "Fix", date="2023-01-02T12:00:00+00:00")
+    for day, branch in [(3, "release/1"), (4, "release/2")]:
+        git(tmp_path, "checkout", "-q", "-b", branch, "main")
+        git(tmp_path, "cherry-pick", "fix", date=f"2023-01-{day:02d}T12:00:00+00:00")
+    return tmp_path
+
+
+def test_lru_eviction_and_counters():
+    cache = TreeDiffCache(max_entries=2)
+    changes = [FileChange("a.py", 1, 0, "M")]
+
+    cache.put(cache.key(b"t1", b"t2", None, None, "renames"), changes)
+    cache.put(cache.key(b"t2", b"t3", None, None, "renames"), [])
+    assert cache.get(cache.key(b"t1", b"t2", [], [], "renames")) == changes
+    cache.put(cache.key(b"t3", b"t4", None, None, "renames"), [])
+
+    # The least recently used pair went; filters and settings are part of the key.
+    assert cache.get(cache.key(b"t2", b"t3", None, None, "renames")) is None
+    assert cache.get(cache.key(b"t1", b"t2", ["src/"], None, "renames")) is None
+    assert cache.get(cache.key(b"t1", b"t2", None, None, "off")) is None
+    assert cache.cache_info() == (1, 3, 2, 2)
+
+    with pytest.raises(ValueError, match="max_entries must not be negative"):
+        TreeDiffCache(-1)
+    disabled = TreeDiffCache(0)
+    disabled.put(cache.key(b"t1", b"t2", None, None), changes)
+    assert disabled.get(cache.key(b"t1", b"t2", None, None)) is None
+
+
+def test_pygit2_diffs_each_tree_pair_once(cherry_pick_repo, mocker):
+    backend = Pygit2Backend(str(cherry_pick_repo), refs="--all")
+    spy = mocker.spy(backend, "_diff_commit")
+
+    entries = backend.get_log_entries()
+
+    assert [message for message, _ in entry_summary(entries)] == ["Fix", "Fix", "Fix", "Initial commit"]
+    assert {tuple(changes) for _, changes in entry_summary(entries)[:3]} == {(("app.py", 1, 1, "M"),)}
+    # One diff for the fix and one for the root commit; the cherry-picks are hits.
+    assert spy.call_count == 2
+    assert backend.tree_diff_cache.cache_info()[:2] == (2, 2)
+
+    assert entry_summary(backend.get_log_entries()) == entry_summary(entries)
+    assert spy.call_count == 2
+    assert entry_summary(Pygit2Backend(str(cherry_pick_repo), refs="--all", tree_diff_cache_size=0).get_log_entries()) == entry_summary(entries)
+
+
+def test_pygit2_parallel_jobs_send_each_tree_pair_once(cherry_pick_repo, mocker, monkeypatch):
+    monkeypatch.setattr("git2df.pygit2_backend._MIN_COMMITS_PER_JOB", 1)
+    backend = Pygit2Backend(str(cherry_pick_repo), refs="--all", jobs=2)
+    spy = mocker.spy(backend, "_diff_in_workers")
+
+    entries = backend.get_log_entries()
+
+    assert entry_summary(entries) == entry_summary(Pygit2Backend(str(cherry_pick_repo), refs="--all").get_log_entries())
+    assert len(spy.call_args.args[2]) == 2
+    assert backend.tree_diff_cache.cache_info()[:2] == (2, 2)
+
+
+def test_dulwich_reuses_tree_pairs_across_calls(cherry_pick_repo, mocker):
+    git(cherry_pick_repo, "checkout", "-q", "release/2")
+    backend = DulwichRemoteBackend(str(cherry_pick_repo / ".git"), remote_branch="release/2", rename_detection="renames")
+    spy = mocker.spy(backend.tree_diff_cache, "put")
+
+    first = backend.get_log_entries()
+    second = backend.get_log_entries(since="2023-01-03")
+
+    assert [message for message, _ in entry_summary(first)] == ["Fix", "Initial commit"]
+    assert entry_summary(second) == entry_summary(first)[:1]
+    assert spy.call_count == 2
+    assert backend.tree_diff_cache.cache_info()[:2] == (1, 2)